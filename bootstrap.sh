@@ -144,13 +144,12 @@ if [ "$START_FROM_LAYER" != "services" ]; then
     KUBECONFIG_PATH="${TERRAFORM_DIR}/01-infrastructure/kubeconfig"
     export KUBECONFIG="$KUBECONFIG_PATH"
 
-    # Wait for cluster API
-    log "⏳ Waiting for Kubernetes API..."
-    timeout 300 bash -c 'until kubectl cluster-info; do sleep 5; done'
-
-    # Wait for all nodes ready
-    log "⏳ Waiting for all nodes to be ready..."
-    timeout 600 bash -c 'until [ $(kubectl get nodes --no-headers | grep Ready | wc -l) -eq 6 ]; do sleep 10; done'
+    # Wait for the API and all nodes ready (the node watch retries until the API is up)
+    log "⏳ Waiting for Kubernetes API and all nodes to be ready..."
+    if ! python3 "${SCRIPT_DIR}/scripts/wait-ready.py" --timeout 900 nodes=6; then
+        log "❌ FATAL: Cluster nodes did not become ready"
+        exit 1
+    fi
 
     echo "✅ Infrastructure layer ready"
 fi
@@ -175,23 +174,16 @@ if ! terraform apply -auto-approve; then
     exit 1
 fi
 
-# Wait for critical services to be ready
-log "⏳ Waiting for services to be ready..."
-
-# Wait for Authentik
-log "⏳ Waiting for Authentik deployment..."
-timeout 300 bash -c 'until kubectl get deployment authentik -n authentik-system 2>/dev/null; do sleep 10; done'
-kubectl wait --for=condition=available deployment/authentik -n authentik-system --timeout=600s
-
-# Wait for PowerDNS
-log "⏳ Waiting for PowerDNS deployment..."
-timeout 300 bash -c 'until kubectl get deployment powerdns -n powerdns-system 2>/dev/null; do sleep 10; done'
-kubectl wait --for=condition=available deployment/powerdns -n powerdns-system --timeout=600s
-
-# Wait for PowerDNS API to be responsive
-log "⏳ Waiting for PowerDNS API to be ready..."
+# Wait for critical services to be ready, all at once
+log "⏳ Waiting for Authentik, PowerDNS and the PowerDNS API..."
 CLUSTER_VIP="10.2.3.1"  # TODO: Get from terraform output
-timeout 300 bash -c "until curl -sf http://${CLUSTER_VIP}:8081/api/v1/servers; do sleep 5; done"
+if ! python3 "${SCRIPT_DIR}/scripts/wait-ready.py" --timeout 900 \
+    deployment/authentik-system/authentik \
+    deployment/powerdns-system/powerdns \
+    "http=http://${CLUSTER_VIP}:8081/api/v1/servers"; then
+    log "❌ FATAL: Services did not become ready"
+    exit 1
+fi
 
 log "✅ Services layer ready"
 
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Dependency closure benchmark
+Builds synthetic dependsOn graphs with thousands of kustomizations and times
+the precomputed closure against a per-question graph search.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gitops_validation.dependency_graph import DependencyClosure  # noqa: E402
+
+
+def synthetic_graph(size: int, fanout: int, seed: int) -> dict:
+    """Layered DAG: each kustomization depends on up to `fanout` earlier ones"""
+    rng = random.Random(seed)
+    graph = {}
+    for i in range(size):
+        name = f"k{i}"
+        picks = rng.sample(range(i), min(fanout, i))
+        # Always extend the chain so depth grows with size
+        deps = {f"k{i - 1}"} if i else set()
+        deps.update(f"k{j}" for j in picks)
+        graph[name] = sorted(deps)
+    return graph
+
+
+def search_depends_on(graph: dict, dependent: str, prerequisite: str) -> bool:
+    """Baseline: fresh iterative DFS for every question"""
+    seen = set()
+    stack = list(graph.get(dependent, []))
+    while stack:
+        node = stack.pop()
+        if node == prerequisite:
+            return True
+        if node not in seen:
+            seen.add(node)
+            stack.extend(graph.get(node, []))
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dependency closure")
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        graph = synthetic_graph(size, args.fanout, args.seed)
+        rng = random.Random(args.seed)
+        queries = [
+            (f"k{rng.randrange(size)}", f"k{rng.randrange(size)}")
+            for _ in range(args.queries)
+        ]
+
+        started = time.perf_counter()
+        closure = DependencyClosure(graph)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        fast = [closure.depends_on(a, b) for a, b in queries]
+        lookup = time.perf_counter() - started
+
+        started = time.perf_counter()
+        slow = [search_depends_on(graph, a, b) for a, b in queries]
+        search = time.perf_counter() - started
+
+        status = "✅" if fast == slow else "❌"
+        print(
+            f"{status} {size:6d} kustomizations: closure build {build * 1000:8.1f} ms, "
+            f"{len(queries)} lookups {lookup * 1000:6.2f} ms "
+            f"(per-query search {search * 1000:9.1f} ms)"
+        )
+        if fast != slow:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
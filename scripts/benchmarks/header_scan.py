@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Header scan benchmark
+Compares full yaml.safe_load_all() construction against the header-only
+scanner on the real manifest tree, and checks both produce identical summaries.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gitops_validation.header_scan import (  # noqa: E402
+    HAVE_LIBYAML,
+    scan_summaries,
+    summarize_document,
+)
+
+
+def full_load(text: str):
+    return [
+        summarize_document(doc) if isinstance(doc, dict) else None
+        for doc in yaml.safe_load_all(text)
+    ]
+
+
+def bench(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark YAML header scanning")
+    parser.add_argument("roots", nargs="*", default=[Path("k8s")], type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = sorted(f for root in args.roots for f in root.rglob("*.yaml"))
+    texts = []
+    for f in files:
+        try:
+            text = f.read_text()
+            full_load(text)
+        except (OSError, UnicodeDecodeError, yaml.YAMLError):
+            continue
+        texts.append(text)
+
+    mismatches = sum(1 for text in texts if full_load(text) != scan_summaries(text))
+
+    print(f"📋 {len(texts)} files, {sum(map(len, texts)) / 1024:.0f} KiB")
+    print(f"   libyaml available: {HAVE_LIBYAML}")
+    full = bench(full_load, texts, args.repeat)
+    scan = bench(scan_summaries, texts, args.repeat)
+    print(f"   yaml.safe_load_all: {full * 1000:8.1f} ms")
+    print(f"   header scan:        {scan * 1000:8.1f} ms ({full / scan:.1f}x)")
+
+    if mismatches:
+        print(f"❌ {mismatches} files summarized differently")
+        return 1
+    print("✅ Summaries identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Synthetic GitOps repository generator
+Writes a k8s/ tree shaped like this repository's (one directory per Flux
+Kustomization with its flux-kustomization.yaml, kustomization.yaml,
+HelmRelease, workloads and ExternalSecrets, all listed from k8s/
+kustomization.yaml) at any size, plus a dependency policy it satisfies, so
+the validators can be benchmarked at sizes the real tree hasn't reached yet.
+"""
+
+import argparse
+import random
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+SECRET_STORE = "secret-store"
+
+POLICY = {
+    "ordering": [],
+    "resources": [
+        {
+            "kind": "ExternalSecret",
+            "apiGroup": "external-secrets.io",
+            "requires": SECRET_STORE,
+            "reason": "ExternalSecrets need the ClusterSecretStore",
+        }
+    ],
+}
+
+
+@dataclass
+class RepoShape:
+    # Flux Kustomizations, including the secret store (external-secrets and its
+    # ClusterSecretStore) every other one builds on
+    kustomizations: int = 45
+    # dependsOn layers; layer 0 is the secret store
+    depth: int = 6
+    # dependsOn edges from each kustomization to the layer before it
+    fanout: int = 2
+    # Documents in each workloads file
+    docs_per_file: int = 4
+    # Fraction of kustomizations that have ExternalSecrets
+    external_secrets: float = 0.5
+    # Leaf keys in each HelmRelease's values
+    values_keys: int = 50
+    seed: int = 0
+
+
+def _dump(path: Path, docs: List[Dict]) -> int:
+    text = yaml.safe_dump_all(docs, sort_keys=False, explicit_start=True)
+    path.write_text(text)
+    return len(text)
+
+
+def _flux_kustomization(name: str, depends_on: List[str]) -> Dict:
+    spec = {
+        "interval": "10m",
+        "sourceRef": {"kind": "GitRepository", "name": "flux-system"},
+        "path": f"./k8s/{name}",
+        "prune": True,
+        "wait": True,
+    }
+    if depends_on:
+        spec["dependsOn"] = [{"name": dep} for dep in depends_on]
+    return {
+        "apiVersion": "kustomize.toolkit.fluxcd.io/v1",
+        "kind": "Kustomization",
+        "metadata": {"name": name, "namespace": "flux-system"},
+        "spec": spec,
+    }
+
+
+def _values(rng: random.Random, name: str, keys: int) -> Dict:
+    """Nested helm values with `keys` leaves, three levels deep"""
+    values: Dict = {"image": {"repository": f"ghcr.io/example/{name}", "tag": "1.0.0"}}
+    for i in range(keys):
+        section = values.setdefault(f"component{i % 7}", {})
+        group = section.setdefault(f"group{i % 5}", {})
+        group[f"setting{i}"] = rng.choice(
+            [True, False, rng.randrange(1000), f"value-{rng.randrange(10**6)}"]
+        )
+    return values
+
+
+def _workload(kind: str, name: str, namespace: str, index: int) -> Dict:
+    metadata = {"name": f"{name}-{index}", "namespace": namespace}
+    if kind == "Deployment":
+        labels = {"app": metadata["name"]}
+        return {
+            "apiVersion": "apps/v1",
+            "kind": kind,
+            "metadata": metadata,
+            "spec": {
+                "replicas": 1,
+                "selector": {"matchLabels": labels},
+                "template": {
+                    "metadata": {"labels": labels},
+                    "spec": {
+                        "containers": [
+                            {
+                                "name": "app",
+                                "image": f"docker.io/example/{name}:{index}.0",
+                                "ports": [{"containerPort": 8080}],
+                            }
+                        ]
+                    },
+                },
+            },
+        }
+    if kind == "Service":
+        return {
+            "apiVersion": "v1",
+            "kind": kind,
+            "metadata": metadata,
+            "spec": {
+                "selector": {"app": metadata["name"]},
+                "ports": [{"port": 80, "targetPort": 8080}],
+            },
+        }
+    return {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": metadata,
+        "data": {f"key{i}": f"value {i}" for i in range(8)},
+    }
+
+
+def _external_secret(name: str, namespace: str, index: int) -> Dict:
+    return {
+        "apiVersion": "external-secrets.io/v1",
+        "kind": "ExternalSecret",
+        "metadata": {"name": f"{name}-secret-{index}", "namespace": namespace},
+        "spec": {
+            "refreshInterval": "1h",
+            "secretStoreRef": {"kind": "ClusterSecretStore", "name": "vault"},
+            "target": {"name": f"{name}-secret-{index}"},
+            "data": [
+                {
+                    "secretKey": "password",
+                    "remoteRef": {"key": f"{name}/{index}", "property": "password"},
+                }
+            ],
+        },
+    }
+
+
+def _layers(shape: RepoShape) -> List[List[str]]:
+    apps = [f"app-{i:03d}" for i in range(max(shape.kustomizations - 1, 0))]
+    depth = max(shape.depth - 1, 1)
+    layers: List[List[str]] = [[SECRET_STORE]] + [[] for _ in range(depth)]
+    for i, app in enumerate(apps):
+        layers[1 + i * depth // max(len(apps), 1)].append(app)
+    return [layer for layer in layers if layer]
+
+
+def generate(root: Path, shape: RepoShape) -> Dict:
+    """Write the synthetic repository below root; returns its size"""
+    rng = random.Random(shape.seed)
+    k8s = root / "k8s"
+    (k8s / "flux-system").mkdir(parents=True, exist_ok=True)
+    stats = {"files": 0, "documents": 0, "bytes": 0}
+
+    def write(path: Path, docs: List[Dict]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stats["bytes"] += _dump(path, docs)
+        stats["files"] += 1
+        stats["documents"] += len(docs)
+
+    write(
+        k8s / "flux-system" / "gotk-sync.yaml",
+        [
+            {
+                "apiVersion": "source.toolkit.fluxcd.io/v1",
+                "kind": "GitRepository",
+                "metadata": {"name": "flux-system", "namespace": "flux-system"},
+                "spec": {
+                    "interval": "1m0s",
+                    "ref": {"branch": "main"},
+                    "url": "ssh://git@example.com/cluster.git",
+                },
+            },
+            {
+                "apiVersion": "kustomize.toolkit.fluxcd.io/v1",
+                "kind": "Kustomization",
+                "metadata": {"name": "flux-system", "namespace": "flux-system"},
+                "spec": {
+                    "interval": "10m0s",
+                    "path": "./k8s",
+                    "prune": True,
+                    "sourceRef": {"kind": "GitRepository", "name": "flux-system"},
+                },
+            },
+        ],
+    )
+
+    layers = _layers(shape)
+    names = []
+    for depth, layer in enumerate(layers):
+        for name in layer:
+            names.append(name)
+            directory = k8s / name
+            depends_on = (
+                sorted(
+                    rng.sample(
+                        layers[depth - 1], min(shape.fanout, len(layers[depth - 1]))
+                    )
+                )
+                if depth
+                else []
+            )
+            write(
+                directory / "flux-kustomization.yaml",
+                [_flux_kustomization(name, depends_on)],
+            )
+
+            resources = ["namespace.yaml"]
+            write(
+                directory / "namespace.yaml",
+                [{"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": name}}],
+            )
+            if name == SECRET_STORE:
+                resources += ["external-secrets.yaml", "cluster-secret-store.yaml"]
+                write(
+                    directory / "external-secrets.yaml",
+                    [
+                        {
+                            "apiVersion": "source.toolkit.fluxcd.io/v1",
+                            "kind": "HelmRepository",
+                            "metadata": {"name": "external-secrets", "namespace": name},
+                            "spec": {
+                                "interval": "1h",
+                                "url": "https://charts.external-secrets.io",
+                            },
+                        },
+                        {
+                            "apiVersion": "helm.toolkit.fluxcd.io/v2",
+                            "kind": "HelmRelease",
+                            "metadata": {"name": "external-secrets", "namespace": name},
+                            "spec": {
+                                "interval": "15m",
+                                "chart": {
+                                    "spec": {
+                                        "chart": "external-secrets",
+                                        "version": "0.19.2",
+                                        "sourceRef": {
+                                            "kind": "HelmRepository",
+                                            "name": "external-secrets",
+                                        },
+                                    }
+                                },
+                            },
+                        },
+                    ],
+                )
+                write(
+                    directory / "cluster-secret-store.yaml",
+                    [
+                        {
+                            "apiVersion": "external-secrets.io/v1",
+                            "kind": "ClusterSecretStore",
+                            "metadata": {"name": "vault"},
+                            "spec": {
+                                "provider": {
+                                    "vault": {
+                                        "server": "http://vault.vault:8200",
+                                        "path": "secret",
+                                    }
+                                }
+                            },
+                        }
+                    ],
+                )
+            else:
+                resources += ["helmrelease.yaml", "workloads.yaml"]
+                write(
+                    directory / "helmrelease.yaml",
+                    [
+                        {
+                            "apiVersion": "source.toolkit.fluxcd.io/v1",
+                            "kind": "HelmRepository",
+                            "metadata": {"name": name, "namespace": name},
+                            "spec": {
+                                "interval": "1h",
+                                "url": f"https://charts.example.com/{name}",
+                            },
+                        },
+                        {
+                            "apiVersion": "helm.toolkit.fluxcd.io/v2",
+                            "kind": "HelmRelease",
+                            "metadata": {"name": name, "namespace": name},
+                            "spec": {
+                                "interval": "15m",
+                                "chart": {
+                                    "spec": {
+                                        "chart": name,
+                                        "version": "1.0.0",
+                                        "sourceRef": {
+                                            "kind": "HelmRepository",
+                                            "name": name,
+                                        },
+                                    }
+                                },
+                                "values": _values(rng, name, shape.values_keys),
+                            },
+                        },
+                    ],
+                )
+                kinds = ("Deployment", "Service", "ConfigMap")
+                write(
+                    directory / "workloads.yaml",
+                    [
+                        _workload(kinds[i % len(kinds)], name, name, i)
+                        for i in range(shape.docs_per_file)
+                    ],
+                )
+                if rng.random() < shape.external_secrets:
+                    resources.append("externalsecrets.yaml")
+                    write(
+                        directory / "externalsecrets.yaml",
+                        [
+                            _external_secret(name, name, i)
+                            for i in range(max(shape.docs_per_file // 2, 1))
+                        ],
+                    )
+            write(
+                directory / "kustomization.yaml",
+                [
+                    {
+                        "apiVersion": "kustomize.config.k8s.io/v1beta1",
+                        "kind": "Kustomization",
+                        "resources": resources,
+                    }
+                ],
+            )
+
+    write(
+        k8s / "kustomization.yaml",
+        [
+            {
+                "apiVersion": "kustomize.config.k8s.io/v1beta1",
+                "kind": "Kustomization",
+                "resources": [f"{name}/flux-kustomization.yaml" for name in names],
+            }
+        ],
+    )
+    (root / "dependency-policy.yaml").write_text(
+        yaml.safe_dump(POLICY, sort_keys=False)
+    )
+    stats["kustomizations"] = len(names)
+    stats["layers"] = len(layers)
+    return stats
+
+
+def add_shape_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = RepoShape()
+    parser.add_argument(
+        "--depth", type=int, default=defaults.depth, help="dependsOn layers"
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=defaults.fanout,
+        help="dependsOn edges per kustomization",
+    )
+    parser.add_argument(
+        "--docs-per-file",
+        type=int,
+        default=defaults.docs_per_file,
+        help="Documents in each workloads file",
+    )
+    parser.add_argument(
+        "--external-secrets",
+        type=float,
+        default=defaults.external_secrets,
+        help="Fraction of kustomizations with ExternalSecrets",
+    )
+    parser.add_argument(
+        "--values-keys",
+        type=int,
+        default=defaults.values_keys,
+        help="Leaf keys in each HelmRelease's values",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def shape_from_args(args: argparse.Namespace, kustomizations: int) -> RepoShape:
+    return RepoShape(
+        kustomizations=kustomizations,
+        depth=args.depth,
+        fanout=args.fanout,
+        docs_per_file=args.docs_per_file,
+        external_secrets=args.external_secrets,
+        values_keys=args.values_keys,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic GitOps repository"
+    )
+    parser.add_argument("output", type=Path, help="Directory to write k8s/ into")
+    parser.add_argument(
+        "--kustomizations",
+        type=int,
+        default=RepoShape.kustomizations,
+        help="Number of Flux Kustomizations",
+    )
+    add_shape_arguments(parser)
+    args = parser.parse_args()
+
+    if (args.output / "k8s").exists():
+        print(f"❌ {args.output / 'k8s'} already exists", file=sys.stderr)
+        return 1
+    shape = shape_from_args(args, args.kustomizations)
+    stats = generate(args.output, shape)
+    print(
+        f"✅ {stats['kustomizations']} kustomizations in {stats['layers']} layers: "
+        f"{stats['files']} files, {stats['documents']} documents, "
+        f"{stats['bytes'] / 1024:.0f} KiB ({asdict(shape)})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Validator benchmark suite
+Generates synthetic repositories (see synthetic_repo.py) at several sizes and
+measures, at each size, the in-process hot paths (manifest index, Flux
+Kustomization loading, cycle detection, the dependency closure and the policy
+check) and every validator script end to end, cold (--no-cache) and warm.
+kustomize and flux are replaced by the offline stubs in stubs/, so no network
+or cluster tools are needed.
+
+Results are written as JSON (--save) and can be compared with an earlier run
+(--compare): a metric more than --tolerance slower or larger than the baseline
+is reported as a regression and makes the run fail.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gitops_validation.dependency_graph import DependencyClosure  # noqa: E402
+from gitops_validation.dependency_rules import DependencyPolicy  # noqa: E402
+from gitops_validation.flux_kustomizations import (  # noqa: E402
+    build_dependency_graph,
+    check_dependencies,
+    find_cycles,
+    load_kustomizations,
+)
+from gitops_validation.kustomize_build import find_kustomizations  # noqa: E402
+from gitops_validation.kustomize_graph import (  # noqa: E402
+    KUSTOMIZATION_FILE,
+    KustomizeGraph,
+)
+from gitops_validation.manifest_index import ManifestIndex  # noqa: E402
+from synthetic_repo import (  # noqa: E402
+    add_shape_arguments,
+    generate,
+    shape_from_args,
+)
+
+# Bump when metrics are renamed or measured differently
+BASELINE_FORMAT = 2
+
+BENCHMARKS = Path(__file__).resolve().parent
+SCRIPTS = BENCHMARKS.parent
+STUBS = BENCHMARKS / "stubs"
+DEFAULT_BASELINE = BENCHMARKS / "baseline.json"
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.02
+MIN_MB_DELTA = 2.0
+
+# (metric name, script and arguments); run with the synthetic repo as cwd
+VALIDATORS = [
+    ("validate-kustomizations", ["validate-kustomizations.py"]),
+    ("validate-flux-build", ["validate-flux-build.py"]),
+    (
+        "validate-dependencies",
+        ["validate-dependencies.py", "--policy", "dependency-policy.yaml"],
+    ),
+    ("validate-gitops", ["validate-gitops.py", "--policy", "dependency-policy.yaml"]),
+]
+
+
+def _rss_mb(maxrss: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def measure_function(fn: Callable[[], object], repeat: int) -> Dict:
+    """Best wall and CPU time over repeat calls, and traced peak allocation"""
+    best = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn()
+        sample = (time.perf_counter() - wall, time.process_time() - cpu)
+        best = sample if best is None or sample[0] < best[0] else best
+    # tracemalloc slows allocation down, so memory gets a run of its own
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": round(best[0], 6),
+        "cpu_seconds": round(best[1], 6),
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+
+# Runs a validator and writes its wall time, CPU and peak RSS to argv[1]. A
+# child forked from this benchmark would report the benchmark's own memory
+# high-water mark as its ru_maxrss; a child of this small interpreter doesn't.
+MEASURE_WRAPPER = """
+import json, resource, subprocess, sys, time
+started = time.perf_counter()
+returncode = subprocess.call(sys.argv[2:])
+elapsed = time.perf_counter() - started
+usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+with open(sys.argv[1], "w") as f:
+    json.dump([elapsed, usage.ru_utime + usage.ru_stime, usage.ru_maxrss], f)
+sys.exit(returncode)
+"""
+
+
+def run_process(command: List[str], cwd: Path, env: Dict[str, str]) -> Dict:
+    """Wall time, CPU (including reaped subprocesses) and peak RSS of one run
+
+    Peak RSS is the largest of the validator and its subprocesses.
+    """
+    with tempfile.TemporaryFile() as output, tempfile.NamedTemporaryFile() as usage:
+        returncode = subprocess.call(
+            [sys.executable, "-c", MEASURE_WRAPPER, usage.name, *command],
+            cwd=cwd,
+            env=env,
+            stdout=output,
+            stderr=output,
+        )
+        elapsed, cpu, maxrss = json.load(usage)
+        output.seek(0)
+        tail = output.read().decode(errors="replace").strip().splitlines()[-3:]
+    return {
+        "seconds": round(elapsed, 6),
+        "cpu_seconds": round(cpu, 6),
+        "peak_mb": round(_rss_mb(maxrss), 3),
+        "exit_code": returncode,
+        "output": tail,
+    }
+
+
+def measure_process(
+    command: List[str], cwd: Path, env: Dict[str, str], repeat: int, cold: bool
+) -> Dict:
+    """Best of repeat runs; cold runs start without .cache/, warm runs after one"""
+    runs = []
+    if not cold:
+        run_process(command, cwd, env)
+    for _ in range(repeat):
+        if cold:
+            shutil.rmtree(cwd / ".cache", ignore_errors=True)
+        runs.append(run_process(command + (["--no-cache"] if cold else []), cwd, env))
+    best = min(runs, key=lambda run: run["seconds"])
+    best["peak_mb"] = max(run["peak_mb"] for run in runs)
+    return best
+
+
+def bench_functions(root: Path, repeat: int) -> Dict[str, Dict]:
+    """In-process hot paths, with root as the working directory"""
+    k8s = Path("k8s")
+    index = ManifestIndex.build(k8s)
+    kustomizations = load_kustomizations(index=index)
+    depends_on = {
+        name: [dep.name for dep in spec.depends_on]
+        for name, spec in kustomizations.items()
+    }
+    graph = build_dependency_graph(kustomizations)
+    all_nodes = set(kustomizations) | set().union(*graph.values())
+    names = sorted(kustomizations)
+    closure = DependencyClosure(depends_on)
+    kustomization_files = find_kustomizations(k8s.rglob(KUSTOMIZATION_FILE))
+    kustomize_graph = KustomizeGraph.build(kustomization_files)
+    policy = DependencyPolicy.load(root / "dependency-policy.yaml")
+
+    def closure_queries():
+        # Every ordered pair, as the policy rules may ask any of them
+        return sum(closure.depends_on(a, b) for a in names for b in names)
+
+    return {
+        "manifest_index": measure_function(lambda: ManifestIndex.build(k8s), repeat),
+        "load_kustomizations": measure_function(
+            lambda: load_kustomizations(index=index), repeat
+        ),
+        "find_cycles": measure_function(lambda: find_cycles(graph, all_nodes), repeat),
+        "dependency_closure_build": measure_function(
+            lambda: DependencyClosure(depends_on), repeat
+        ),
+        "dependency_closure_all_pairs": measure_function(closure_queries, repeat),
+        "kustomize_graph": measure_function(
+            lambda: KustomizeGraph.build(kustomization_files), repeat
+        ),
+        "check_dependencies": measure_function(
+            lambda: check_dependencies(index, kustomizations, policy, kustomize_graph),
+            repeat,
+        ),
+    }
+
+
+def bench_size(args: argparse.Namespace, size: int, workdir: Path) -> Dict:
+    root = workdir / f"repo-{size}"
+    shape = shape_from_args(args, size)
+    stats = generate(root, shape)
+    print(
+        f"📋 {stats['kustomizations']} kustomizations, {stats['documents']} documents "
+        f"in {stats['files']} files ({stats['bytes'] / 1024:.0f} KiB)",
+        file=sys.stderr,
+    )
+
+    metrics: Dict[str, Dict] = {}
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        for name, result in bench_functions(root, args.repeat).items():
+            metrics[f"function:{name}"] = result
+    finally:
+        os.chdir(cwd)
+
+    env = dict(os.environ, PATH=f"{STUBS}{os.pathsep}{os.environ.get('PATH', '')}")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    for name, script in VALIDATORS:
+        command = [sys.executable, str(SCRIPTS / script[0]), *script[1:]]
+        if args.jobs and name != "validate-dependencies":
+            command += ["--jobs", str(args.jobs)]
+        for mode in ("cold", "warm"):
+            result = measure_process(command, root, env, args.repeat, mode == "cold")
+            if result["exit_code"] != 0:
+                print(
+                    f"⚠️  {name} ({mode}) exited {result['exit_code']}: "
+                    + " / ".join(result["output"]),
+                    file=sys.stderr,
+                )
+            metrics[f"script:{name}:{mode}"] = result
+
+    for metric, result in metrics.items():
+        result.pop("output", None)
+        print(
+            f"  {result['seconds']:8.3f}s  {result['cpu_seconds']:8.3f}s CPU  "
+            f"{result['peak_mb']:8.1f} MB  {metric}",
+            file=sys.stderr,
+        )
+    return {"repo": stats, "metrics": metrics}
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> List[str]:
+    """Regressions of current against baseline, one line each"""
+    regressions = []
+    for size, entry in current["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if before is None:
+            continue
+        for metric, result in entry["metrics"].items():
+            old = before["metrics"].get(metric)
+            if old is None:
+                continue
+            for field, min_delta, unit in (
+                ("seconds", MIN_SECONDS_DELTA, "s"),
+                ("peak_mb", MIN_MB_DELTA, " MB"),
+            ):
+                new_value, old_value = result[field], old[field]
+                if (
+                    new_value > old_value * (1 + tolerance)
+                    and new_value - old_value > min_delta
+                ):
+                    growth = (
+                        f" (+{(new_value / old_value - 1) * 100:.0f}%)"
+                        if old_value
+                        else ""
+                    )
+                    regressions.append(
+                        f"{size} kustomizations, {metric}: {field} "
+                        f"{old_value:.3f}{unit} → {new_value:.3f}{unit}{growth}"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GitOps validators")
+    parser.add_argument(
+        "--sizes",
+        default="45,150",
+        help="Comma-separated numbers of Flux Kustomizations to generate",
+    )
+    add_shape_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=2, help="Runs per measurement")
+    parser.add_argument(
+        "--jobs", type=int, help="--jobs passed to the validators (default: theirs)"
+    )
+    parser.add_argument(
+        "--save",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_BASELINE,
+        metavar="PATH",
+        help=f"Write results as JSON (default: {DEFAULT_BASELINE.relative_to(SCRIPTS.parent)})",
+    )
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        type=Path,
+        const=DEFAULT_BASELINE,
+        metavar="PATH",
+        help="Fail if results regressed against a saved baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown or growth before a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--keep", type=Path, help="Generate repositories here and keep them"
+    )
+    args = parser.parse_args()
+
+    baseline: Optional[Dict] = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("format") != BASELINE_FORMAT:
+            print(f"❌ {args.compare} has an incompatible format", file=sys.stderr)
+            return 1
+
+    shape = shape_from_args(args, 0)
+    results = {
+        "format": BASELINE_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "shape": {k: v for k, v in asdict(shape).items() if k != "kustomizations"},
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+
+    workdir = args.keep or Path(tempfile.mkdtemp(prefix="gitops-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"🔧 {size} kustomizations", file=sys.stderr)
+            results["sizes"][str(size)] = bench_size(args, size, workdir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    results["benchmark_peak_mb"] = round(_rss_mb(self_usage.ru_maxrss), 1)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"✅ Results written to {args.save}", file=sys.stderr)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if baseline is not None:
+        if baseline.get("shape") != results["shape"]:
+            print(
+                "⚠️  Baseline was recorded with a different repository shape",
+                file=sys.stderr,
+            )
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(
+                f"❌ {len(regressions)} regressions against {args.compare}:",
+                file=sys.stderr,
+            )
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+        print(f"✅ No regressions against {args.compare}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the GitOps validation scripts in scripts/
+"""
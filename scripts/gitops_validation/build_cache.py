@@ -0,0 +1,197 @@
+"""
+Content-addressed kustomize build cache
+A build is keyed by a Merkle hash over every local file the kustomization
+transitively reads plus the kustomize version, so an unchanged kustomization
+reuses its rendered output and success/failure result without forking
+kustomize. Entries are evicted least recently used first once the cache grows
+past its size limit.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, IO, Iterable, Optional, Tuple
+
+from gitops_validation.kustomize_graph import KustomizeGraph
+
+DEFAULT_CACHE_DIR = Path(".cache/gitops-validation/builds")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def tool_version(command: Iterable[str]) -> Optional[str]:
+    """Version string of a CLI tool, or None if it can't be run"""
+    try:
+        result = subprocess.run(
+            list(command), capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+class InputHasher:
+    """Hashes build inputs, memoizing per-file digests shared between kustomizations"""
+
+    def __init__(self, graph: KustomizeGraph):
+        self.graph = graph
+        self._file_digests: Dict[Path, str] = {}
+
+    def _digest(self, path: Path) -> str:
+        if path not in self._file_digests:
+            if path.is_dir():
+                # A plain directory reference reads everything below it
+                h = hashlib.blake2b(digest_size=20)
+                for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                    h.update(f"{child.relative_to(path)}\0".encode())
+                    h.update(self._digest(child).encode())
+                digest = h.hexdigest()
+            else:
+                try:
+                    digest = hashlib.blake2b(
+                        path.read_bytes(), digest_size=20
+                    ).hexdigest()
+                except OSError:
+                    digest = "missing"
+            self._file_digests[path] = digest
+        return self._file_digests[path]
+
+    def key(self, kustomization_file: Path, salt: str) -> Optional[str]:
+        """Merkle root over (relative path, content digest) of every input file
+
+        None when the build also reads inputs the graph can't hash (remote
+        resources or charts, inline plugin configs); those are never cached.
+        """
+        if self.graph.opaque_reason(kustomization_file) is not None:
+            return None
+        base = kustomization_file.resolve().parent
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{salt}\0".encode())
+        for member in sorted(self.graph.members(kustomization_file)):
+            h.update(f"{os.path.relpath(member, base)}\0".encode())
+            h.update(self._digest(member).encode())
+        return h.hexdigest()
+
+
+class BuildCache:
+    """Rendered build output and result stored under .cache/, keyed by input hash"""
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        enabled: bool = True,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.cache_dir / f"{key}.yaml", self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[bool, str, Path]]:
+        """Return (success, error, output path) for a cached build, or None"""
+        if not self.enabled:
+            return None
+        output_path, result_path = self._paths(key)
+        try:
+            with open(result_path, "r") as f:
+                result = json.load(f)
+            success, error = bool(result["success"]), str(result["error"])
+            if not output_path.exists():
+                raise OSError("output missing")
+            # Mark as recently used for LRU eviction
+            os.utime(output_path)
+            os.utime(result_path)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return success, error, output_path
+
+    def writer(self, key: str) -> "BuildCacheWriter":
+        return BuildCacheWriter(self, key)
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        if not self.enabled or not self.cache_dir.is_dir():
+            return 0
+
+        entries: Dict[str, Tuple[float, int]] = {}
+        for entry in os.scandir(self.cache_dir):
+            key, _, suffix = entry.name.partition(".")
+            if suffix not in ("yaml", "json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            mtime, size = entries.get(key, (0.0, 0))
+            entries[key] = (max(mtime, stat.st_mtime), size + stat.st_size)
+
+        total = sum(size for _, size in entries.values())
+        removed = 0
+        for key, (_, size) in sorted(entries.items(), key=lambda e: e[1][0]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
+
+
+class BuildCacheWriter:
+    """Streams build output into a cache entry; committed only once the build ends"""
+
+    def __init__(self, cache: BuildCache, key: str):
+        self.cache = cache
+        self.key = key
+        self._file: Optional[IO[str]] = None
+        self._tmp: Optional[str] = None
+        if cache.enabled:
+            try:
+                cache.cache_dir.mkdir(parents=True, exist_ok=True)
+                fd, self._tmp = tempfile.mkstemp(dir=cache.cache_dir, suffix=".tmp")
+                self._file = os.fdopen(fd, "w")
+            except OSError:
+                self._file = None
+
+    def write_document(self, text: str) -> None:
+        if self._file is not None:
+            self._file.write("---\n")
+            self._file.write(text)
+
+    def commit(self, success: bool, error: str) -> None:
+        if self._file is None:
+            return
+        output_path, result_path = self.cache._paths(self.key)
+        try:
+            self._file.close()
+            os.replace(self._tmp, output_path)
+            fd, tmp = tempfile.mkstemp(dir=self.cache.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"success": success, "error": error}, f)
+            os.replace(tmp, result_path)
+        except OSError:
+            pass
+        self._file = None
+
+    def discard(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+        self._file = None
@@ -0,0 +1,520 @@
+"""
+Validation checks and report formatting
+The kustomize build, CRD schema, local helm chart, sharded flux build and
+dependency checks run by validate-gitops.py, each returning a CheckResult over
+a shared ManifestIndex.
+Successful builds can be kept in caller-owned maps between runs (the watch
+daemon does this) so that only invalidated builds run again.
+"""
+
+import asyncio
+import json
+import shutil
+import sys
+import textwrap
+import time
+from pathlib import Path
+from typing import Awaitable, Dict, Iterable, List, Optional, Tuple, Union
+from dataclasses import asdict, dataclass, field
+
+from gitops_validation.crd_schemas import CompiledSchemaCache, SchemaSet
+from gitops_validation.dependency_rules import DEFAULT_POLICY_PATH, DependencyPolicy
+from gitops_validation.flux_build import (
+    FLUX_BUILD_TIMEOUT,
+    FluxBuildResult,
+    FluxOutputAnalysis,
+    FluxRun,
+    FluxTarget,
+    flux_build_targets,
+    run_flux_builds,
+)
+from gitops_validation.flux_kustomizations import (
+    KustomizationSpec,
+    check_dependencies,
+    load_kustomizations,
+)
+from gitops_validation.helm_render import (
+    HELM_TIMEOUT,
+    find_releases,
+    run_helm_renders,
+)
+from gitops_validation.helm_render import select_affected as select_affected_releases
+from gitops_validation.kustomize_build import (
+    BuildResult,
+    KustomizeRun,
+    find_kustomizations,
+    run_kustomize_builds,
+    select_affected,
+)
+from gitops_validation.kustomize_graph import KustomizeGraph
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import span
+from gitops_validation.scheduler import default_jobs
+from gitops_validation.summary_cache import SummaryCache
+
+CHECKS = ("kustomize", "schema", "helm", "flux", "dependencies")
+
+
+@dataclass
+class CheckOptions:
+    jobs: int = field(default_factory=default_jobs)
+    timeout: float = 120
+    flux_timeout: float = FLUX_BUILD_TIMEOUT
+    helm_timeout: float = HELM_TIMEOUT
+    policy: Path = DEFAULT_POLICY_PATH
+    use_build_cache: bool = True
+
+
+@dataclass
+class CheckResult:
+    name: str
+    summary: str = ""
+    # (source, message); source is "" when the finding isn't tied to one path
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    details: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def passed(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CheckResult":
+        data = dict(data)
+        data["errors"] = [tuple(error) for error in data.get("errors", [])]
+        return cls(**data)
+
+
+@dataclass
+class FluxShard:
+    """Summarized output of one flux build, replayed into each analysis"""
+
+    target: FluxTarget
+    result: Optional[FluxBuildResult] = None
+    documents: List[Dict] = field(default_factory=list)
+    parse_error: Optional[str] = None
+
+
+async def kustomize_check(
+    index: ManifestIndex,
+    cache: SummaryCache,
+    options: CheckOptions,
+    changed_files: Optional[List[Path]] = None,
+    warm: Optional[Dict[Path, BuildResult]] = None,
+    schemas: Optional[SchemaSet] = None,
+) -> List[CheckResult]:
+    """Build kustomizations; successful builds in `warm` are reused and added to it
+
+    Returns the kustomize result, followed by the schema result when schemas
+    are given (the schema check validates the same rendered output).
+    """
+    result = CheckResult("kustomize")
+    schema_result = CheckResult("schema") if schemas is not None else None
+    results = [r for r in (result, schema_result) if r is not None]
+    kustomizations = find_kustomizations(index.files)
+    if not kustomizations:
+        for r in results:
+            r.summary = f"No kustomizations found in {index.root}"
+        return results
+
+    graph = KustomizeGraph.build(kustomizations)
+    if changed_files is not None:
+        kustomizations = select_affected(kustomizations, changed_files, index, graph)
+        if not kustomizations:
+            for r in results:
+                r.summary = "No kustomizations affected by the changed files"
+            return results
+
+    warm = warm if warm is not None else {}
+    # Warm builds made without schemas still need their output validated
+    pending = [
+        k
+        for k in kustomizations
+        if k not in warm or (schemas is not None and warm[k].schema_errors is None)
+    ]
+    schema_time = schemas.elapsed if schemas is not None else 0.0
+    run = KustomizeRun(results=[], wall_time=0.0)
+    if pending:
+        run = await run_kustomize_builds(
+            pending,
+            graph,
+            cache,
+            options.jobs,
+            options.timeout,
+            use_build_cache=options.use_build_cache,
+            schemas=schemas,
+        )
+    for build in run.results:
+        if build.success:
+            warm[build.kustomization] = build
+    built = {build.kustomization: build for build in run.results}
+    run = KustomizeRun(
+        results=[
+            built[k] if k in built else warm[k]._replace(cached=True)
+            for k in kustomizations
+        ],
+        wall_time=run.wall_time,
+        cache_hits=run.cache_hits + len(kustomizations) - len(built),
+        cache_misses=run.cache_misses,
+    )
+
+    for kustomization, error in run.failed:
+        result.errors.append((str(kustomization.parent), error.strip()))
+
+    # The one external-secrets check, over every rendered kustomization
+    duplicate_errors = run.external_secrets().errors()
+    if duplicate_errors:
+        result.errors.append(
+            ("external-secrets-validation", "\n".join(duplicate_errors))
+        )
+
+    timings = run.timings
+    slowest = max(timings, key=timings.get)
+    result.summary = (
+        f"{len(run.successful)}/{len(run.results)} kustomizations valid "
+        f"(slowest: {slowest.parent} {timings[slowest]:.2f}s, "
+        f"build cache: {run.cache_hits} hits, {run.cache_misses} misses)"
+    )
+    cached = {r.kustomization for r in run.results if r.cached}
+    for k, elapsed in sorted(timings.items(), key=lambda x: -x[1]):
+        marker = " (cached)" if k in cached else ""
+        result.details.append(f"{elapsed:7.2f}s  {k.parent}{marker}")
+
+    if schema_result is not None:
+        summarize_schema_errors(schema_result, run, schemas)
+        # Loading and validating only; the builds are the kustomize check's time
+        schema_result.elapsed = schemas.elapsed - schema_time
+    return results
+
+
+def summarize_schema_errors(
+    result: CheckResult, run: KustomizeRun, schemas: SchemaSet
+) -> None:
+    for error in schemas.errors:
+        result.errors.append(("", f"❌ Failed to compile CRD schema: {error}"))
+
+    errors_by_source: Dict[Path, List[str]] = {}
+    for kustomization, error in run.schema_errors:
+        errors_by_source.setdefault(kustomization.parent, []).append(error)
+    for source, errors in errors_by_source.items():
+        result.errors.append((str(source), "\n".join(errors)))
+
+    documents = [doc for r in run.results for doc in r.documents]
+    checked = sum(1 for doc in documents if schemas.covers(doc))
+    result.summary = (
+        f"{checked} rendered custom resources checked against "
+        f"{len(schemas.schemas)} CRD schemas from {len(schemas.sources)} files"
+    )
+    # Custom resources whose CRD isn't in the repo (built-in groups excluded)
+    unchecked = set()
+    for doc in documents:
+        api_version = doc.get("apiVersion") or ""
+        group = api_version.rpartition("/")[0]
+        if "." in group and not group.endswith(".k8s.io") and not schemas.covers(doc):
+            unchecked.add(f"{doc.get('kind')} ({api_version})")
+    if unchecked:
+        result.details.append(f"No CRD in the repo for: {', '.join(sorted(unchecked))}")
+
+
+async def helm_check(
+    index: ManifestIndex,
+    cache: SummaryCache,
+    options: CheckOptions,
+    changed_files: Optional[List[Path]] = None,
+    schemas: Optional[SchemaSet] = None,
+) -> CheckResult:
+    """Render the local charts with the values their HelmReleases pass"""
+    result = CheckResult("helm")
+    releases = find_releases(index)
+    if not releases:
+        result.summary = "No local charts found"
+        return result
+    if changed_files is not None:
+        releases = select_affected_releases(releases, changed_files)
+        if not releases:
+            result.summary = "No charts affected by the changed files"
+            return result
+    if shutil.which("helm") is None:
+        # One finding instead of the same spawn error for every release
+        result.summary = f"{len(releases)} chart releases not rendered"
+        result.errors.append(
+            ("", "helm CLI not found - ensure helm is installed and available")
+        )
+        return result
+
+    run = await run_helm_renders(
+        releases,
+        cache,
+        options.jobs,
+        options.helm_timeout,
+        use_render_cache=options.use_build_cache,
+        schemas=schemas,
+    )
+    for release, error in run.failed:
+        result.errors.append((release.label, error.strip()))
+    errors_by_release: Dict[str, List[str]] = {}
+    for release, error in run.schema_errors:
+        errors_by_release.setdefault(release.label, []).append(error)
+    for label, errors in errors_by_release.items():
+        result.errors.append((label, "\n".join(errors)))
+    result.warnings.extend(run.identities().warnings())
+    for release in releases:
+        if release.unresolved:
+            result.warnings.append(
+                f"⚠️  {release.label}: rendered without values from "
+                f"{', '.join(release.unresolved)} (only known in the cluster)"
+            )
+
+    timings = run.timings
+    slowest = max(timings, key=timings.get)
+    documents = sum(len(r.documents) for r in run.results)
+    result.summary = (
+        f"{len(run.results) - len(run.failed)}/{len(run.results)} chart releases "
+        f"render, {documents} documents (slowest: {slowest} "
+        f"{timings[slowest]:.2f}s, render cache: {run.cache_hits} hits, "
+        f"{run.cache_misses} misses)"
+    )
+    cached = {r.release.label for r in run.results if r.cached}
+    for label, elapsed in sorted(timings.items(), key=lambda x: -x[1]):
+        marker = " (cached)" if label in cached else ""
+        result.details.append(f"{elapsed:7.2f}s  {label}{marker}")
+    return result
+
+
+async def flux_check(
+    index: ManifestIndex,
+    cache: SummaryCache,
+    options: CheckOptions,
+    warm: Optional[Dict[str, FluxShard]] = None,
+) -> CheckResult:
+    """Build every Flux Kustomization; successful shards in `warm` are reused"""
+    result = CheckResult("flux")
+    targets = flux_build_targets(index)
+    if not targets:
+        result.summary = "No Flux Kustomizations found - skipping validation"
+        return result
+
+    warm = warm if warm is not None else {}
+    pending = {
+        t.name: FluxShard(t)
+        for t in targets
+        if t.name not in warm or warm[t.name].target != t
+    }
+
+    def collect(text: str, name: str) -> None:
+        shard = pending[name]
+        if shard.parse_error is not None:
+            return
+        summaries, error = cache.summarize(text)
+        if error is not None:
+            shard.parse_error = f"{name}: {error}"
+        else:
+            shard.documents.extend(doc for doc in summaries if doc)
+
+    run = FluxRun(results=[], wall_time=0.0)
+    if pending:
+        run = await run_flux_builds(
+            [shard.target for shard in pending.values()],
+            collect,
+            options.jobs,
+            options.flux_timeout,
+        )
+    for build in run.results:
+        if build.name in pending:
+            pending[build.name].result = build
+            if build.success:
+                warm[build.name] = pending[build.name]
+
+    for failure in run.failed:
+        source = f"{failure.name} ({failure.path})" if failure.path else failure.name
+        result.errors.append((source, failure.error.strip()))
+    if run.failed:
+        return result
+
+    # external-secrets is already checked over the kustomize output
+    analysis = FluxOutputAnalysis(cache, check_external_secrets=False)
+    shards = [pending.get(t.name) or warm[t.name] for t in targets]
+    for shard in shards:
+        if shard.parse_error is not None and analysis.parse_error is None:
+            analysis.parse_error = shard.parse_error
+        for doc in shard.documents:
+            analysis.observe(doc, shard.target.label)
+
+    for warning in analysis.warnings():
+        if warning.startswith("❌"):
+            result.errors.append(("", warning))
+        else:
+            result.warnings.append(warning)
+
+    timings = {shard.target.name: shard.result.elapsed for shard in shards}
+    slowest = max(timings, key=timings.get)
+    total = sum(analysis.resource_counts.values())
+    result.summary = (
+        f"{len(shards)} Kustomizations, {total} resources across "
+        f"{len(analysis.namespaces)} namespaces "
+        f"(slowest: {slowest} {timings[slowest]:.2f}s)"
+    )
+    for name, elapsed in sorted(timings.items(), key=lambda x: -x[1]):
+        marker = "" if name in pending else " (cached)"
+        result.details.append(f"{elapsed:7.2f}s  {name}{marker}")
+    result.details.extend(line.strip() for line in analysis.summary()[1:])
+    return result
+
+
+def dependencies_check(
+    index: ManifestIndex,
+    options: CheckOptions,
+    kustomizations: Optional[Dict[str, KustomizationSpec]] = None,
+    graph: Optional[KustomizeGraph] = None,
+) -> CheckResult:
+    result = CheckResult("dependencies")
+    if kustomizations is None:
+        kustomizations = load_kustomizations(index=index)
+    if not kustomizations:
+        result.errors.append(("", "❌ No Flux kustomizations found!"))
+        return result
+
+    policy = DependencyPolicy.load(options.policy)
+    for error in check_dependencies(index, kustomizations, policy, graph):
+        result.errors.append(("", error))
+    result.summary = f"{len(kustomizations)} Flux kustomizations"
+    return result
+
+
+async def timed(
+    names: Tuple[str, ...],
+    check: Awaitable[Union[CheckResult, List[CheckResult]]],
+) -> List[CheckResult]:
+    """Await a check, recording its duration and turning crashes into errors
+
+    A check may report several results (one per name); ones that timed
+    themselves keep their own elapsed time.
+    """
+    started = time.monotonic()
+    try:
+        with span(" + ".join(names), "check", lane=True):
+            results = await check
+    except Exception as e:
+        error = f"❌ Validation failed with error: {e}"
+        results = [CheckResult(name, errors=[("", error)]) for name in names]
+    if isinstance(results, CheckResult):
+        results = [results]
+    elapsed = time.monotonic() - started
+    for result in results:
+        if not result.elapsed:
+            result.elapsed = elapsed
+    return results
+
+
+async def run_checks(
+    index: ManifestIndex,
+    cache: SummaryCache,
+    options: CheckOptions,
+    skip: Iterable[str] = (),
+    changed_files: Optional[List[Path]] = None,
+    kustomize_warm: Optional[Dict[Path, BuildResult]] = None,
+    flux_warm: Optional[Dict[str, FluxShard]] = None,
+    kustomizations: Optional[Dict[str, KustomizationSpec]] = None,
+    graph: Optional[KustomizeGraph] = None,
+    schemas: Optional[SchemaSet] = None,
+) -> List[CheckResult]:
+    """Run every check not in skip concurrently over the shared index
+
+    The schema check validates the kustomize check's rendered output, so the
+    builds run whenever either of them is selected. Rendered charts are
+    validated against the same schemas unless the schema check is skipped.
+    """
+    checks = []
+    rendered = tuple(name for name in ("kustomize", "schema") if name not in skip)
+    if "schema" not in skip and schemas is None:
+        schemas = SchemaSet.load(index, CompiledSchemaCache(enabled=cache.enabled))
+    if rendered:
+        checks.append(
+            timed(
+                rendered,
+                kustomize_check(
+                    index,
+                    cache,
+                    options,
+                    changed_files,
+                    kustomize_warm,
+                    schemas if "schema" in rendered else None,
+                ),
+            )
+        )
+    if "helm" not in skip:
+        checks.append(
+            timed(
+                ("helm",),
+                helm_check(
+                    index,
+                    cache,
+                    options,
+                    changed_files,
+                    schemas if "schema" not in skip else None,
+                ),
+            )
+        )
+    if "flux" not in skip:
+        checks.append(timed(("flux",), flux_check(index, cache, options, flux_warm)))
+    if "dependencies" not in skip:
+        checks.append(
+            timed(
+                ("dependencies",),
+                asyncio.to_thread(
+                    dependencies_check, index, options, kustomizations, graph
+                ),
+            )
+        )
+    results = [r for group in await asyncio.gather(*checks) for r in group]
+    return [r for r in results if r.name not in skip]
+
+
+def print_human(results: List[CheckResult], wall_time: float, verbose: bool) -> None:
+    for result in results:
+        icon = "✅" if result.passed else "❌"
+        summary = f": {result.summary}" if result.summary else ""
+        print(f"{icon} {result.name}{summary} [{result.elapsed:.2f}s]")
+        if verbose:
+            for line in result.details:
+                print(f"    {line}")
+        for warning in result.warnings:
+            print(f"  {warning}")
+        for source, message in result.errors:
+            if source:
+                print(f"  {source}:")
+                print(textwrap.indent(message, "    "))
+            else:
+                print(textwrap.indent(message, "  "))
+
+    failed = [r.name for r in results if not r.passed]
+    if failed:
+        print(f"❌ {len(failed)} of {len(results)} checks failed: {', '.join(failed)}")
+    else:
+        print(f"✅ All {len(results)} checks passed in {wall_time:.2f}s")
+
+
+def print_json(results: List[CheckResult], wall_time: float) -> None:
+    failed = [r for r in results if not r.passed]
+    if failed:
+        details = [
+            {"check": r.name, "path": source, "error": message}
+            for r in failed
+            for source, message in r.errors
+        ]
+        result = {
+            "error": f"Failed checks: {', '.join(r.name for r in failed)}",
+            "details": details,
+        }
+        print(json.dumps(result), file=sys.stderr)
+        return
+
+    # Terraform external data sources only accept string values
+    result = {"status": "passed", "wall_time_seconds": f"{wall_time:.2f}"}
+    for r in results:
+        result[f"{r.name}_seconds"] = f"{r.elapsed:.2f}"
+    print(json.dumps(result))
@@ -0,0 +1,438 @@
+"""
+Offline CRD schema validation
+Extracts openAPIV3Schema from the CustomResourceDefinitions shipped in the repo
+(manifests such as k8s/flux-system/gotk-components.yaml and chart crds/
+directories) and validates rendered documents against them in process, without
+downloading schemas. Each CRD is compiled once: its schema is reduced to the
+keywords that are checked and cached under .cache/ by a hash of the CRD text,
+then turned into validator closures the first time a document needs it.
+
+Like kubeconform without -strict, fields a schema doesn't declare are not
+reported; CEL rules (x-kubernetes-validations) and formats are not evaluated.
+"""
+
+import datetime
+import re
+import tarfile
+import time
+import yaml
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from gitops_validation.header_scan import Loader
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import span
+from gitops_validation.summary_cache import DEFAULT_MAX_ENTRIES, SummaryCache
+from gitops_validation.yaml_stream import iter_documents
+
+# Bump when the compiled schema format changes so old entries are ignored
+SCHEMA_FORMAT = 1
+
+DEFAULT_CACHE_DIR = Path(".cache/gitops-validation/schemas")
+CHART_ROOT = Path("charts")
+CRD_KIND = "CustomResourceDefinition"
+
+# Schema keywords that are checked; everything else (descriptions, defaults,
+# list-type markers, CEL rules) is dropped when a CRD is compiled
+KEPT_KEYWORDS = frozenset(
+    {
+        "type",
+        "nullable",
+        "enum",
+        "required",
+        "minimum",
+        "maximum",
+        "exclusiveMinimum",
+        "exclusiveMaximum",
+        "minLength",
+        "maxLength",
+        "pattern",
+        "minItems",
+        "maxItems",
+        "minProperties",
+        "maxProperties",
+        "x-kubernetes-int-or-string",
+        "x-kubernetes-preserve-unknown-fields",
+    }
+)
+SUBSCHEMA_KEYWORDS = ("items", "additionalProperties", "not")
+SUBSCHEMA_LIST_KEYWORDS = ("allOf", "anyOf", "oneOf")
+
+_CRD_HEADER = re.compile(rf"^kind:\s*[\"']?{CRD_KIND}[\"']?\s*$", re.MULTILINE)
+
+# check(value, path, errors) appends one message per violation
+Check = Callable[[Any, str, List[str]], None]
+
+
+def prune_schema(schema: Any) -> Any:
+    """Keep only the keywords that are checked, recursively"""
+    if not isinstance(schema, dict):
+        return schema
+    pruned = {key: schema[key] for key in KEPT_KEYWORDS if key in schema}
+    if isinstance(schema.get("properties"), dict):
+        pruned["properties"] = {
+            name: prune_schema(sub) for name, sub in schema["properties"].items()
+        }
+    for key in SUBSCHEMA_KEYWORDS:
+        if key in schema:
+            pruned[key] = prune_schema(schema[key])
+    for key in SUBSCHEMA_LIST_KEYWORDS:
+        if isinstance(schema.get(key), list):
+            pruned[key] = [prune_schema(sub) for sub in schema[key]]
+    return pruned
+
+
+def compile_crd(doc: Any) -> List[Dict]:
+    """[{apiVersion, kind, schema}] for every version of a CRD that has a schema"""
+    if not isinstance(doc, dict) or doc.get("kind") != CRD_KIND:
+        return []
+    spec = doc.get("spec") or {}
+    group = spec.get("group")
+    kind = (spec.get("names") or {}).get("kind")
+    if not group or not kind:
+        return []
+
+    compiled = []
+    for version in spec.get("versions") or []:
+        schema = (version.get("schema") or {}).get("openAPIV3Schema")
+        # apiextensions/v1beta1 CRDs carry one schema for every version
+        schema = schema or (spec.get("validation") or {}).get("openAPIV3Schema")
+        if version.get("served", True) and isinstance(schema, dict):
+            compiled.append(
+                {
+                    "apiVersion": f"{group}/{version['name']}",
+                    "kind": kind,
+                    "schema": prune_schema(schema),
+                }
+            )
+    return compiled
+
+
+class CompiledSchemaCache(SummaryCache):
+    """SummaryCache whose entries are the compiled schemas of one CRD's text"""
+
+    FORMAT = f"crd-schema-{SCHEMA_FORMAT}"
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        enabled: bool = True,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        super().__init__(cache_dir, enabled, max_entries)
+
+    @staticmethod
+    def _parse(text: str) -> Tuple[List[Dict], Optional[str]]:
+        try:
+            return compile_crd(yaml.load(text, Loader=Loader)), None
+        except yaml.YAMLError as e:
+            return [], str(e)
+
+
+def _json_type(value: Any) -> str:
+    """The JSON type a value has once the API server decodes the YAML"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, (str, datetime.date)):
+        # Unquoted timestamps still reach the API server as strings
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def _has_type(value: Any, expected: str) -> bool:
+    actual = _json_type(value)
+    if expected == "number":
+        return actual in ("integer", "number")
+    if expected == "integer" and actual == "number":
+        return float(value).is_integer()
+    return actual == expected
+
+
+def _join(path: str, name: Any) -> str:
+    return f"{path}.{name}" if path else str(name)
+
+
+def compile_schema(schema: Dict) -> Check:
+    """Turn a pruned structural schema into a closure tree"""
+    checks: List[Check] = []
+    expected = schema.get("type")
+    nullable = schema.get("nullable", False)
+
+    if schema.get("x-kubernetes-int-or-string"):
+        expected = None
+
+        def check_int_or_string(value, path, errors):
+            if _json_type(value) not in ("integer", "string"):
+                errors.append(f"{path}: expected integer or string")
+
+        checks.append(check_int_or_string)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                choices = ", ".join(repr(choice) for choice in allowed)
+                errors.append(f"{path}: {value!r} is not one of [{choices}]")
+
+        checks.append(check_enum)
+
+    if "minimum" in schema or "maximum" in schema:
+        minimum, maximum = schema.get("minimum"), schema.get("maximum")
+        exclusive_min = schema.get("exclusiveMinimum", False)
+        exclusive_max = schema.get("exclusiveMaximum", False)
+
+        def check_range(value, path, errors):
+            if _json_type(value) not in ("integer", "number"):
+                return
+            if minimum is not None and (
+                value < minimum or (exclusive_min and value == minimum)
+            ):
+                errors.append(f"{path}: {value} is below the minimum of {minimum}")
+            if maximum is not None and (
+                value > maximum or (exclusive_max and value == maximum)
+            ):
+                errors.append(f"{path}: {value} is above the maximum of {maximum}")
+
+        checks.append(check_range)
+
+    if any(k in schema for k in ("minLength", "maxLength", "pattern")):
+        min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+        try:
+            pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+        except re.error:
+            pattern = None  # an RE2 construct Python doesn't support
+
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(f"{path}: shorter than {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                errors.append(f"{path}: longer than {max_length} characters")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{path}: {value!r} does not match {pattern.pattern}")
+
+        checks.append(check_string)
+
+    for keyword, minimum, kind in (
+        ("minItems", True, list),
+        ("maxItems", False, list),
+        ("minProperties", True, dict),
+        ("maxProperties", False, dict),
+    ):
+        if keyword in schema:
+            checks.append(_size_check(kind, schema[keyword], minimum))
+
+    properties = {
+        name: compile_schema(sub)
+        for name, sub in (schema.get("properties") or {}).items()
+    }
+    required = schema.get("required") or []
+    additional = schema.get("additionalProperties")
+    additional = compile_schema(additional) if isinstance(additional, dict) else None
+    if properties or required or additional:
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{_join(path, name)}: required field is missing")
+            for name, item in value.items():
+                validator = properties.get(name, additional)
+                if validator is not None:
+                    validator(item, _join(path, name), errors)
+
+        checks.append(check_object)
+
+    if isinstance(schema.get("items"), dict):
+        items = compile_schema(schema["items"])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    items(item, f"{path}[{i}]", errors)
+
+        checks.append(check_items)
+
+    checks.extend(_combinator_checks(schema))
+
+    def check(value, path, errors):
+        if value is None and nullable:
+            return
+        if expected and not _has_type(value, expected):
+            errors.append(f"{path}: expected {expected}, got {_json_type(value)}")
+            return
+        for constraint in checks:
+            constraint(value, path, errors)
+
+    return check
+
+
+def _size_check(kind: type, limit: int, minimum: bool) -> Check:
+    unit = "items" if kind is list else "fields"
+
+    def check_size(value, path, errors):
+        if not isinstance(value, kind):
+            return
+        if minimum and len(value) < limit:
+            errors.append(f"{path}: fewer than {limit} {unit}")
+        elif not minimum and len(value) > limit:
+            errors.append(f"{path}: more than {limit} {unit}")
+
+    return check_size
+
+
+def _combinator_checks(schema: Dict) -> Iterator[Check]:
+    """allOf/anyOf/oneOf/not; in structural schemas these only add constraints"""
+    for sub in schema.get("allOf") or []:
+        yield compile_schema(sub)
+
+    for keyword in ("anyOf", "oneOf"):
+        options = [compile_schema(sub) for sub in schema.get(keyword) or []]
+        if not options:
+            continue
+
+        def check_options(value, path, errors, options=options, keyword=keyword):
+            matches = 0
+            for option in options:
+                option_errors: List[str] = []
+                option(value, path, option_errors)
+                matches += not option_errors
+            if matches == 0 or (keyword == "oneOf" and matches > 1):
+                errors.append(f"{path}: must match {keyword[:3]} of its schemas")
+
+        yield check_options
+
+    if isinstance(schema.get("not"), dict):
+        negated = compile_schema(schema["not"])
+
+        def check_not(value, path, errors):
+            not_errors: List[str] = []
+            negated(value, path, not_errors)
+            if not not_errors:
+                errors.append(f"{path}: must not match its schema")
+
+        yield check_not
+
+
+def iter_crd_texts(
+    index: ManifestIndex, chart_root: Path = CHART_ROOT
+) -> Iterator[Tuple[Path, str]]:
+    """(source, text) of every CRD document in the index and in chart crds/"""
+    for path in sorted({doc.path for doc in index.find(CRD_KIND)}):
+        with open(path, "r") as f:
+            for text in iter_documents(f):
+                if _CRD_HEADER.search(text):
+                    yield path, text
+
+    # Helm installs crds/ of a chart and of its packaged dependencies
+    for path in sorted(chart_root.glob("*/crds/**/*.y*ml")):
+        with open(path, "r") as f:
+            for text in iter_documents(f):
+                yield path, text
+    for archive in sorted(chart_root.glob("*/charts/*.tgz")):
+        try:
+            with tarfile.open(archive) as tar:
+                for member in tar.getmembers():
+                    parts = Path(member.name).parts
+                    if not member.isfile() or "crds" not in parts[:-1]:
+                        continue
+                    if not member.name.endswith((".yaml", ".yml")):
+                        continue
+                    content = tar.extractfile(member).read().decode()
+                    for text in iter_documents(content.splitlines(keepends=True)):
+                        yield archive, text
+        except (OSError, tarfile.TarError):
+            continue
+
+
+class SchemaSet:
+    """Compiled CRD schemas keyed by (apiVersion, kind)"""
+
+    def __init__(self):
+        self.schemas: Dict[Tuple[str, str], Dict] = {}
+        self.sources: Set[Path] = set()
+        self.errors: List[str] = []
+        self.validated = 0
+        # Seconds spent loading schemas and validating documents
+        self.elapsed = 0.0
+        self._checks: Dict[Tuple[str, str], Check] = {}
+
+    @classmethod
+    def load(
+        cls,
+        index: ManifestIndex,
+        cache: Optional[CompiledSchemaCache] = None,
+        chart_root: Path = CHART_ROOT,
+    ) -> "SchemaSet":
+        started = time.monotonic()
+        if cache is None:
+            cache = CompiledSchemaCache(enabled=False)
+        schema_set = cls()
+        with span("load CRD schemas"):
+            for source, text in iter_crd_texts(index, chart_root):
+                schema_set.sources.add(source)
+                compiled, error = cache.summarize(text)
+                if error is not None:
+                    schema_set.errors.append(f"{source}: {error}")
+                for entry in compiled:
+                    key = (entry["apiVersion"], entry["kind"])
+                    schema_set.schemas[key] = entry["schema"]
+            cache.evict()
+        schema_set.elapsed = time.monotonic() - started
+        return schema_set
+
+    @property
+    def kinds(self) -> Set[str]:
+        return {kind for _, kind in self.schemas}
+
+    def covers(self, summary: Dict) -> bool:
+        return (summary.get("apiVersion"), summary.get("kind")) in self.schemas
+
+    def _check(self, key: Tuple[str, str]) -> Check:
+        if key not in self._checks:
+            self._checks[key] = compile_schema(self.schemas[key])
+        return self._checks[key]
+
+    def validate(self, doc: Dict) -> List[str]:
+        """Schema violations of one document, each prefixed with its identity"""
+        key = (doc.get("apiVersion"), doc.get("kind"))
+        if key not in self.schemas:
+            return []
+        errors: List[str] = []
+        self._check(key)(doc, "", errors)
+        self.validated += 1
+        metadata = doc.get("metadata") or {}
+        name = "/".join(
+            part for part in (metadata.get("namespace"), metadata.get("name")) if part
+        )
+        return [f"{doc['kind']} {name}: {error}" for error in errors]
+
+    def validate_text(self, text: str) -> List[str]:
+        """Fully parse a rendered document (only called when it is covered)"""
+        started = time.monotonic()
+        with span("schema validate", "parse", bytes=len(text)):
+            try:
+                docs = list(yaml.load_all(text, Loader=Loader))
+            except yaml.YAMLError:
+                docs = []  # already reported by the build that produced it
+            errors = [
+                error
+                for doc in docs
+                if isinstance(doc, dict)
+                for error in self.validate(doc)
+            ]
+        self.elapsed += time.monotonic() - started
+        return errors
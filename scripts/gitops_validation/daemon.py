@@ -0,0 +1,311 @@
+"""
+Validation daemon
+Keeps the manifest index, the Flux dependsOn graph and successful kustomize and
+flux build outputs in memory, updates them incrementally from filesystem
+events, and answers validation requests from a thin client over a local Unix
+socket. A request only rebuilds what changed files invalidated, so dependency
+cycle and rule feedback comes back in milliseconds.
+
+Protocol: one JSON object per line in each direction, one request per
+connection. Commands are "validate", "status" and "shutdown".
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from gitops_validation.checks import (
+    CheckOptions,
+    CheckResult,
+    FluxShard,
+    run_checks,
+)
+from gitops_validation.crd_schemas import (
+    CRD_KIND,
+    CompiledSchemaCache,
+    SchemaSet,
+)
+from gitops_validation.flux_kustomizations import (
+    FLUX_KUSTOMIZATION_FILE,
+    build_dependency_graph,
+    load_kustomizations,
+)
+from gitops_validation.kustomize_build import BuildResult
+from gitops_validation.kustomize_graph import (
+    KUSTOMIZATION_FILE,
+    KustomizeGraph,
+    resolve_path,
+)
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.summary_cache import SummaryCache
+from gitops_validation.watcher import open_watcher
+
+DEFAULT_SOCKET_PATH = Path(".cache/gitops-validation/daemon.sock")
+
+# Seconds between scans when inotify is unavailable
+POLL_INTERVAL = 1.0
+
+# Seconds a client waits for the daemon before validating in-process
+CONNECT_TIMEOUT = 1.0
+
+
+class ValidationDaemon:
+    """In-memory validation state, kept current from watcher events"""
+
+    def __init__(self, root: Path, cache: SummaryCache, options: CheckOptions):
+        self.root = root
+        self.cache = cache
+        self.options = options
+        self.watcher = open_watcher(root)
+        self.index = ManifestIndex.build(root, cache)
+        self.kustomizations = load_kustomizations(index=self.index)
+        self.dependency_graph = build_dependency_graph(self.kustomizations)
+        self.graph = KustomizeGraph.build(
+            path for path in self.index.files if path.name == KUSTOMIZATION_FILE
+        )
+        self.schemas = self._load_schemas()
+        self.kustomize_builds: Dict[Path, BuildResult] = {}
+        self.flux_shards: Dict[str, FluxShard] = {}
+        self.updates = 0
+        self._lock = asyncio.Lock()
+        self._refresh_scheduled = False
+
+    def _load_schemas(self) -> SchemaSet:
+        return SchemaSet.load(
+            self.index, CompiledSchemaCache(enabled=self.cache.enabled)
+        )
+
+    def apply_changes(self, changed: Set[Path]) -> None:
+        """Update the index and drop every build output the changes can affect"""
+        if not changed:
+            return
+        self.updates += 1
+        resolve_path.cache_clear()
+
+        for path in changed:
+            self.index.update_file(path, self.cache)
+        crd_files = {doc.path for doc in self.index.find(CRD_KIND)}
+        if (changed & self.schemas.sources) or (changed & crd_files):
+            # Every warm build was validated against the old schemas
+            self.schemas = self._load_schemas()
+            self.kustomize_builds.clear()
+        if any(p.name.endswith(FLUX_KUSTOMIZATION_FILE) for p in changed):
+            self.kustomizations = load_kustomizations(index=self.index)
+            self.dependency_graph = build_dependency_graph(self.kustomizations)
+
+        # Re-read only changed kustomization.yaml files, dropping removed ones
+        resolved = {path.resolve() for path in changed}
+        graph = self.graph
+        for kustomization_file in [
+            k
+            for k in graph.references
+            if k in resolved or any(r in k.parents for r in resolved)
+        ]:
+            graph.remove(kustomization_file)
+        for path in changed:
+            if path.name == KUSTOMIZATION_FILE and path.is_file():
+                graph.add(path)
+
+        affected = graph.affected(changed)
+        for kustomization in list(self.kustomize_builds):
+            if kustomization.resolve() in affected or not kustomization.exists():
+                del self.kustomize_builds[kustomization]
+
+        for name, shard in list(self.flux_shards.items()):
+            directory = Path(shard.target.path).resolve()
+            kustomization_file = directory / KUSTOMIZATION_FILE
+            if kustomization_file in graph.references:
+                inputs = graph.members(kustomization_file)
+                stale = bool(resolved & inputs)
+            else:
+                # Without a kustomization.yaml flux applies everything under path
+                stale = any(directory in p.parents for p in resolved)
+            if stale or shard.target.kustomization_file.resolve() in resolved:
+                del self.flux_shards[name]
+
+    async def refresh(self) -> None:
+        self._refresh_scheduled = False
+        async with self._lock:
+            self.apply_changes(self.watcher.changes())
+
+    def schedule_refresh(self) -> None:
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            asyncio.get_running_loop().create_task(self.refresh())
+
+    async def validate(self, request: Dict) -> Dict:
+        async with self._lock:
+            # Saves that haven't been delivered as events yet still count
+            self.apply_changes(self.watcher.changes())
+            started = time.monotonic()
+            files = request.get("files")
+            results = await run_checks(
+                self.index,
+                self.cache,
+                self.options,
+                skip=request.get("skip", ()),
+                changed_files=[Path(f) for f in files] if files is not None else None,
+                kustomize_warm=self.kustomize_builds,
+                flux_warm=self.flux_shards,
+                kustomizations=self.kustomizations,
+                graph=self.graph,
+                schemas=self.schemas,
+            )
+            wall_time = time.monotonic() - started
+        return {
+            "results": [result.to_dict() for result in results],
+            "wall_time": wall_time,
+        }
+
+    def status(self) -> Dict:
+        return {
+            "root": str(self.root.resolve()),
+            "pid": os.getpid(),
+            "files": len(self.index.files),
+            "kustomizations": len(self.kustomizations),
+            "dependency_edges": sum(len(v) for v in self.dependency_graph.values()),
+            "crd_schemas": len(self.schemas.schemas),
+            "warm_kustomize_builds": len(self.kustomize_builds),
+            "warm_flux_builds": len(self.flux_shards),
+            "updates": self.updates,
+            "watcher": type(self.watcher).__name__,
+        }
+
+
+async def serve(
+    root: Path,
+    cache: SummaryCache,
+    options: CheckOptions,
+    socket_path: Path = DEFAULT_SOCKET_PATH,
+) -> int:
+    """Run the daemon until SIGINT/SIGTERM or a shutdown request"""
+    if daemon_status(socket_path) is not None:
+        print(f"❌ A daemon is already listening on {socket_path}", file=sys.stderr)
+        return 1
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        socket_path.unlink()  # left behind by a daemon that didn't exit cleanly
+
+    daemon = ValidationDaemon(root, cache, options)
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(await reader.readline())
+            command = request.get("command", "validate")
+            if command == "validate":
+                response = await daemon.validate(request)
+            elif command == "status":
+                response = daemon.status()
+            elif command == "shutdown":
+                response = {"stopping": True}
+                stopped.set()
+            else:
+                response = {"error": f"Unknown command: {command}"}
+        except Exception as e:
+            response = {"error": str(e)}
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_unix_server(handle, path=str(socket_path))
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    fileno = daemon.watcher.fileno()
+    if fileno is not None:
+        loop.add_reader(fileno, daemon.schedule_refresh)
+    else:
+
+        async def poll() -> None:
+            while True:
+                await asyncio.sleep(POLL_INTERVAL)
+                await daemon.refresh()
+
+        poller = loop.create_task(poll())
+
+    status = daemon.status()
+    print(
+        f"👀 Watching {root} ({status['files']} files, "
+        f"{status['kustomizations']} Flux kustomizations, {status['watcher']}); "
+        f"listening on {socket_path}"
+    )
+    try:
+        await stopped.wait()
+    finally:
+        if fileno is not None:
+            loop.remove_reader(fileno)
+        else:
+            poller.cancel()
+        server.close()
+        await server.wait_closed()
+        daemon.watcher.close()
+        cache.evict()
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
+    return 0
+
+
+def request_daemon(
+    request: Dict,
+    socket_path: Path = DEFAULT_SOCKET_PATH,
+    timeout: Optional[float] = None,
+) -> Optional[Dict]:
+    """Send one request; None if no daemon is listening"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(str(socket_path))
+        except OSError:
+            return None
+        client.settimeout(timeout)
+        client.sendall(json.dumps(request).encode() + b"\n")
+        response = b""
+        while not response.endswith(b"\n"):
+            chunk = client.recv(1 << 16)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response) if response else None
+
+
+def daemon_status(socket_path: Path = DEFAULT_SOCKET_PATH) -> Optional[Dict]:
+    try:
+        return request_daemon({"command": "status"}, socket_path, CONNECT_TIMEOUT)
+    except (OSError, ValueError):
+        return None
+
+
+def validate_via_daemon(
+    root: Path,
+    skip: List[str],
+    files: Optional[List[Path]],
+    socket_path: Path = DEFAULT_SOCKET_PATH,
+) -> Optional[Tuple[List[CheckResult], float]]:
+    """(results, wall time) from a daemon watching root, or None to run in-process"""
+    status = daemon_status(socket_path)
+    if status is None or status.get("root") != str(root.resolve()):
+        return None
+    request = {
+        "command": "validate",
+        "skip": skip,
+        # The daemon may run from another directory
+        "files": [str(f.resolve()) for f in files] if files is not None else None,
+    }
+    try:
+        response = request_daemon(request, socket_path)
+    except (OSError, ValueError):
+        return None
+    if not response or "results" not in response:
+        return None
+    results = [CheckResult.from_dict(r) for r in response["results"]]
+    return results, response["wall_time"]
@@ -0,0 +1,77 @@
+"""
+Dependency reachability closure
+Precomputes, for every Flux kustomization, the set of kustomizations it
+transitively depends on, so "does A (indirectly) depend on B" is a single bit
+test instead of a fresh graph search per question.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List
+
+
+class DependencyClosure:
+    """Transitive dependsOn sets, stored as one integer bitset per kustomization"""
+
+    def __init__(self, depends_on_map: Dict[str, Iterable[str]]):
+        self._bit: Dict[str, int] = {}
+        deps: Dict[str, List[str]] = {}
+        for name, direct in depends_on_map.items():
+            deps[name] = list(direct)
+            self._bit_for(name)
+            for dep in deps[name]:
+                self._bit_for(dep)
+                deps.setdefault(dep, [])
+        self._ancestors: Dict[str, int] = self._close(deps)
+
+    def _bit_for(self, name: str) -> int:
+        if name not in self._bit:
+            self._bit[name] = 1 << len(self._bit)
+        return self._bit[name]
+
+    def _close(self, deps: Dict[str, List[str]]) -> Dict[str, int]:
+        # Kahn's algorithm: a node is ready once all of its dependencies are done
+        remaining = {name: len(set(direct)) for name, direct in deps.items()}
+        dependents: Dict[str, List[str]] = {name: [] for name in deps}
+        for name, direct in deps.items():
+            for dep in set(direct):
+                dependents[dep].append(name)
+
+        closure = {name: 0 for name in deps}
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        while ready:
+            name = ready.popleft()
+            mask = 0
+            for dep in deps[name]:
+                mask |= self._bit[dep] | closure[dep]
+            closure[name] = mask
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        # Nodes on or behind a cycle never become ready; iterate to a fixpoint
+        cyclic = [name for name, count in remaining.items() if count > 0]
+        changed = bool(cyclic)
+        while changed:
+            changed = False
+            for name in cyclic:
+                mask = closure[name]
+                for dep in deps[name]:
+                    mask |= self._bit[dep] | closure[dep]
+                if mask != closure[name]:
+                    closure[name] = mask
+                    changed = True
+
+        return closure
+
+    def depends_on(self, dependent: str, prerequisite: str) -> bool:
+        """True if dependent directly or transitively depends on prerequisite"""
+        bit = self._bit.get(prerequisite)
+        if bit is None:
+            return False
+        return bool(self._ancestors.get(dependent, 0) & bit)
+
+    def dependencies(self, dependent: str) -> List[str]:
+        """Every kustomization dependent transitively depends on"""
+        mask = self._ancestors.get(dependent, 0)
+        return [name for name, bit in self._bit.items() if mask & bit]
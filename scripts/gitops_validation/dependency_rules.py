@@ -0,0 +1,162 @@
+"""
+Declarative dependency rule engine
+Loads ordering and resource rules from a YAML policy file and evaluates all of
+them in one pass over a shared per-kustomization resource index:
+
+ordering:   prerequisite must (transitively) come before each listed kustomization
+resources:  any kustomization containing a resource kind must (transitively)
+            depend on the kustomization that provides its controller/CRDs
+"""
+
+import yaml
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from gitops_validation.dependency_graph import DependencyClosure
+from gitops_validation.kustomize_graph import (
+    KUSTOMIZATION_FILE,
+    KustomizeGraph,
+    resolve_path,
+)
+from gitops_validation.manifest_index import ManifestIndex
+
+DEFAULT_POLICY_PATH = Path(__file__).resolve().parent.parent / "dependency-policy.yaml"
+
+# (API group, kind) of a resource; the group is "" for core resources
+ResourceType = Tuple[str, str]
+
+
+@dataclass
+class OrderingRule:
+    prerequisite: str
+    before: List[str]
+    reason: str = ""
+
+
+@dataclass
+class ResourceRule:
+    kind: str
+    requires: str
+    api_group: Optional[str] = None
+    reason: str = ""
+
+    def matches(self, resource_type: ResourceType) -> bool:
+        group, kind = resource_type
+        return kind == self.kind and self.api_group in (None, group)
+
+
+def _require(entry: Dict, key: str, source: str):
+    value = entry.get(key)
+    if not value:
+        raise ValueError(f"{source}: rule {entry!r} is missing '{key}'")
+    return value
+
+
+@dataclass
+class DependencyPolicy:
+    ordering: List[OrderingRule] = field(default_factory=list)
+    resources: List[ResourceRule] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_POLICY_PATH) -> "DependencyPolicy":
+        with open(path, "r") as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: policy must be a mapping")
+
+        policy = cls()
+        for entry in data.get("ordering") or []:
+            before = _require(entry, "before", str(path))
+            policy.ordering.append(
+                OrderingRule(
+                    prerequisite=_require(entry, "prerequisite", str(path)),
+                    before=[before] if isinstance(before, str) else list(before),
+                    reason=entry.get("reason", ""),
+                )
+            )
+        for entry in data.get("resources") or []:
+            policy.resources.append(
+                ResourceRule(
+                    kind=_require(entry, "kind", str(path)),
+                    requires=_require(entry, "requires", str(path)),
+                    api_group=entry.get("apiGroup"),
+                    reason=entry.get("reason", ""),
+                )
+            )
+        return policy
+
+    def evaluate(
+        self,
+        kustomizations: Dict,
+        closure: DependencyClosure,
+        resources: Dict[str, Set[ResourceType]],
+    ) -> List[str]:
+        """Check every rule; kustomizations maps name -> KustomizationSpec"""
+        errors = []
+
+        for rule in self.ordering:
+            if rule.prerequisite not in kustomizations:
+                continue
+            for dependent in rule.before:
+                if dependent not in kustomizations:
+                    continue
+                if not closure.depends_on(dependent, rule.prerequisite):
+                    errors.append(
+                        f"❌ {dependent} should depend on {rule.prerequisite} ({rule.reason})"
+                    )
+
+        # Resource rules grouped by kind so each kustomization's types are scanned once
+        rules_by_kind = defaultdict(list)
+        for rule in self.resources:
+            rules_by_kind[rule.kind].append(rule)
+
+        for name in sorted(resources):
+            types = resources[name]
+            for kind in sorted({kind for _, kind in types}):
+                for rule in rules_by_kind.get(kind, ()):
+                    if not any(rule.matches(t) for t in types):
+                        continue
+                    if name == rule.requires or rule.requires not in kustomizations:
+                        continue
+                    if not closure.depends_on(name, rule.requires):
+                        reason = f" ({rule.reason})" if rule.reason else ""
+                        errors.append(
+                            f"❌ {name} uses {rule.kind} resources but doesn't depend "
+                            f"on {rule.requires} kustomization{reason}"
+                        )
+
+        return errors
+
+
+def resources_by_kustomization(
+    index: ManifestIndex,
+    kustomizations: Dict,
+    graph: Optional[KustomizeGraph] = None,
+) -> Dict[str, Set[ResourceType]]:
+    """Resource types each Flux kustomization applies, from its source manifests"""
+    if graph is None:
+        graph = KustomizeGraph.build(
+            path for path in index.paths if path.name == KUSTOMIZATION_FILE
+        )
+    by_resolved = {resolve_path(path): path for path in index.paths}
+
+    resources = {}
+    for name, spec in kustomizations.items():
+        directory = resolve_path(Path(spec.path))
+        kustomization_file = directory / KUSTOMIZATION_FILE
+        if kustomization_file in graph.references:
+            members = graph.members(kustomization_file)
+        else:
+            # Without a kustomization.yaml Flux applies every manifest under path
+            members = {p for p in by_resolved if directory in p.parents}
+
+        resources[name] = {
+            (doc.api_group, doc.kind)
+            for member in members
+            if member in by_resolved
+            for doc in index.in_file(by_resolved[member])
+            if doc.kind
+        }
+    return resources
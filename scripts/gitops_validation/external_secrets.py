@@ -0,0 +1,59 @@
+"""
+External-secrets installation check
+Looks up every external-secrets HelmRelease in the rendered output's identity
+index and requires exactly one installation. Shared by the kustomize and flux
+build validators so the rule is implemented once.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from gitops_validation.identity_index import IdentityIndex
+
+EXTERNAL_SECRETS_RELEASE = "external-secrets"
+
+
+class ExternalSecretsCheck:
+    """Reports duplicate or missing installs from an identity index"""
+
+    def __init__(self, identities: Optional[IdentityIndex] = None):
+        self.identities = identities if identities is not None else IdentityIndex()
+
+    def observe(self, doc: Dict, source: str) -> None:
+        self.identities.observe(doc, source)
+
+    @property
+    def deployments(self) -> Dict[str, List[str]]:
+        """ "namespace/chart version" -> sources that rendered that installation"""
+        deployments: Dict[str, List[str]] = defaultdict(list)
+        for key in self.identities.find("HelmRelease", EXTERNAL_SECRETS_RELEASE):
+            for source, doc in self.identities.rendered_by(key).items():
+                chart_version = (
+                    doc.get("spec", {})
+                    .get("chart", {})
+                    .get("spec", {})
+                    .get("version", "unknown")
+                )
+                namespace = key.namespace or "default"
+                deployments[f"{namespace}/{chart_version}"].append(source)
+        return deployments
+
+    @property
+    def count(self) -> int:
+        """Number of external-secrets HelmRelease documents seen"""
+        return sum(len(sources) for sources in self.deployments.values())
+
+    def errors(self) -> List[str]:
+        """Exactly one installation (namespace and chart version) must exist"""
+        deployments = self.deployments
+        errors = []
+        if len(deployments) > 1:
+            errors.append("Multiple external-secrets HelmRelease found:")
+            for deployment, paths in deployments.items():
+                errors.append(f"  {deployment}: {', '.join(paths)}")
+            errors.append("There should be exactly ONE external-secrets installation.")
+        elif len(deployments) == 0:
+            errors.append(
+                "No external-secrets HelmRelease found. At least one is required."
+            )
+        return errors
@@ -0,0 +1,298 @@
+"""
+Sharded flux build runner and output analysis
+Runs `flux build kustomization --dry-run` once per Flux Kustomization through
+the bounded scheduler, each with its own timeout, streaming every rendered
+document into a single-pass analysis (resource counts, namespaces, resource
+identity collisions between Kustomizations and the shared external-secrets
+check).
+"""
+
+import asyncio
+import os
+import shutil
+import signal
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+from dataclasses import dataclass
+
+from gitops_validation.external_secrets import ExternalSecretsCheck
+from gitops_validation.flux_kustomizations import load_kustomizations
+from gitops_validation.identity_index import IdentityIndex
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import span
+from gitops_validation.scheduler import DurationHistory, run_bounded
+from gitops_validation.summary_cache import SummaryCache
+from gitops_validation.yaml_stream import (
+    STREAM_LINE_LIMIT,
+    aiter_documents,
+    iter_documents,
+)
+
+# Seconds before a single Kustomization's flux build is killed
+FLUX_BUILD_TIMEOUT = 60
+
+FLUX_SYSTEM = "flux-system"
+
+# Separate from the kustomize build history; both checks save concurrently
+DEFAULT_HISTORY_PATH = Path(".cache/gitops-validation/flux-durations.json")
+
+
+class FluxOutputAnalysis:
+    """Single-pass checks over flux build output, fed one document at a time"""
+
+    def __init__(
+        self,
+        cache: Optional[SummaryCache] = None,
+        check_external_secrets: bool = True,
+    ):
+        self.cache = cache if cache is not None else SummaryCache(enabled=False)
+        self.resource_counts = defaultdict(int)
+        self.namespaces = set()
+        # Every rendered resource by identity, with the Kustomizations rendering it
+        self.identities = IdentityIndex()
+        # None when another check already covers external-secrets
+        self.external_secrets = (
+            ExternalSecretsCheck(self.identities) if check_external_secrets else None
+        )
+        self.parse_error: Optional[str] = None
+
+    def observe_text(self, text: str, source: str = FLUX_SYSTEM) -> None:
+        """Summarize one YAML document and fold it into every check"""
+        if self.parse_error is not None:
+            return
+        summaries, error = self.cache.summarize(text)
+        if error is not None:
+            self.parse_error = f"{source}: {error}"
+            return
+        for doc in summaries:
+            if doc:
+                self.observe(doc, source)
+
+    def observe(self, doc: Dict, source: str = FLUX_SYSTEM) -> None:
+        kind = doc.get("kind")
+        if kind:
+            self.resource_counts[kind] += 1
+
+        namespace = doc.get("metadata", {}).get("namespace")
+        if namespace:
+            self.namespaces.add(namespace)
+
+        self.identities.observe(doc, source)
+
+    def warnings(self) -> List[str]:
+        """Report findings"""
+        warnings = []
+
+        if self.parse_error is not None:
+            warnings.append(
+                f"⚠️  Failed to parse flux build output as YAML: {self.parse_error}"
+            )
+            return warnings
+
+        # Check for suspicious patterns
+        if self.resource_counts.get("HelmRelease", 0) == 0:
+            warnings.append(
+                "⚠️  No HelmRelease resources found - expected for GitOps deployment"
+            )
+
+        if self.resource_counts.get("Kustomization", 0) == 0:
+            warnings.append("⚠️  No Flux Kustomization resources found")
+
+        # Each shard applies its objects independently, so a resource rendered
+        # by two Kustomizations is overwritten (and pruned) by both
+        warnings.extend(self.identities.warnings())
+
+        if self.external_secrets is not None:
+            count = self.external_secrets.count
+            if count > 1:
+                warnings.append(
+                    f"❌ Found {count} external-secrets HelmReleases (should be exactly 1)"
+                )
+            elif count == 0:
+                warnings.append("⚠️  No external-secrets HelmRelease found")
+
+        return warnings
+
+    def summary(self) -> List[str]:
+        """Resource totals and the most common resource types"""
+        total_resources = sum(self.resource_counts.values())
+        if total_resources == 0:
+            return []
+
+        lines = [
+            f"📊 Flux build generated {total_resources} resources across {len(self.namespaces)} namespaces"
+        ]
+        top_resources = sorted(
+            self.resource_counts.items(), key=lambda x: x[1], reverse=True
+        )[:5]
+        for resource_type, count in top_resources:
+            lines.append(f"   {resource_type}: {count}")
+        return lines
+
+
+class FluxTarget(NamedTuple):
+    """One `flux build kustomization` invocation"""
+
+    name: str
+    path: str
+    kustomization_file: Path
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.path})" if self.path else self.name
+
+
+class FluxBuildResult(NamedTuple):
+    name: str
+    path: str
+    success: bool
+    error: str
+    elapsed: float
+
+
+@dataclass
+class FluxRun:
+    results: List[FluxBuildResult]
+    wall_time: float
+
+    @property
+    def successful(self) -> List[str]:
+        return [r.name for r in self.results if r.success]
+
+    @property
+    def failed(self) -> List[FluxBuildResult]:
+        return [r for r in self.results if not r.success]
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return {r.name: r.elapsed for r in self.results}
+
+
+def flux_build_targets(index: ManifestIndex) -> List[FluxTarget]:
+    """flux-system itself plus every Flux Kustomization found in the index"""
+    targets = []
+
+    # flux-system renders the Kustomization objects; it only exists after bootstrap
+    sync_file = index.root / FLUX_SYSTEM / "gotk-sync.yaml"
+    if sync_file.exists():
+        targets.append(FluxTarget(FLUX_SYSTEM, str(index.root), sync_file))
+
+    for name, spec in sorted(load_kustomizations(index=index).items()):
+        targets.append(FluxTarget(name, spec.path, spec.source))
+    return targets
+
+
+async def build_flux_kustomization(
+    target: FluxTarget, timeout: float, on_document: Callable[[str, str], None]
+) -> FluxBuildResult:
+    """Run flux build for one Kustomization, streaming documents to on_document"""
+    started = time.monotonic()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "flux",
+            "build",
+            "kustomization",
+            target.name,
+            "--path",
+            target.path,
+            "--kustomization-file",
+            str(target.kustomization_file),
+            "--dry-run",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=STREAM_LINE_LIMIT,
+        )
+
+        async def read_documents() -> None:
+            async for text in aiter_documents(proc.stdout):
+                on_document(text, target.name)
+
+        try:
+            _, stderr, _ = await asyncio.wait_for(
+                asyncio.gather(read_documents(), proc.stderr.read(), proc.wait()),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            # Kill the whole process group so helpers holding the pipes die too
+            os.killpg(proc.pid, signal.SIGKILL)
+            await proc.wait()
+            return FluxBuildResult(
+                target.name,
+                target.path,
+                False,
+                f"flux build timed out after {timeout:g} seconds",
+                time.monotonic() - started,
+            )
+
+        success = proc.returncode == 0
+        return FluxBuildResult(
+            target.name,
+            target.path,
+            success,
+            "" if success else stderr.decode(),
+            time.monotonic() - started,
+        )
+    except Exception as e:
+        return FluxBuildResult(
+            target.name, target.path, False, str(e), time.monotonic() - started
+        )
+
+
+async def run_flux_builds(
+    targets: List[FluxTarget],
+    on_document: Callable[[str, str], None],
+    jobs: int,
+    timeout: float = FLUX_BUILD_TIMEOUT,
+) -> FluxRun:
+    """Build every target through a bounded pool, slowest builds first
+
+    Fails with a single result if flux is not available.
+    """
+    if shutil.which("flux") is None:
+        return FluxRun(
+            [
+                FluxBuildResult(
+                    FLUX_SYSTEM,
+                    "",
+                    False,
+                    "flux CLI not found - ensure flux is installed and available",
+                    0.0,
+                )
+            ],
+            0.0,
+        )
+
+    history = DurationHistory(DEFAULT_HISTORY_PATH)
+    by_key = {t.name: t for t in targets}
+    started = time.monotonic()
+
+    async def build(target: FluxTarget) -> FluxBuildResult:
+        with span("flux build", "subprocess", lane=True, kustomization=target.name):
+            return await build_flux_kustomization(target, timeout, on_document)
+
+    results = await run_bounded(
+        [by_key[key] for key in history.longest_first(by_key)], build, jobs
+    )
+    wall_time = time.monotonic() - started
+
+    for result in results:
+        history.record(result.name, result.elapsed)
+    history.save()
+
+    return FluxRun(results=results, wall_time=wall_time)
+
+
+def analyze_flux_output(output: str, cache: Optional[SummaryCache] = None) -> List[str]:
+    """Analyze already-captured flux build output for potential issues"""
+    analysis = FluxOutputAnalysis(cache)
+    try:
+        for document in iter_documents(output.splitlines(keepends=True)):
+            analysis.observe_text(document)
+        for line in analysis.summary():
+            print(line)
+        return analysis.warnings()
+    except Exception as e:
+        return [f"⚠️  Error analyzing flux build output: {e}"]
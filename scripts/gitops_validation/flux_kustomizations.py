@@ -0,0 +1,147 @@
+"""
+Flux Kustomization dependency checks
+Loads Flux Kustomizations (flux-kustomization.yaml) from the manifest index and
+checks their dependsOn graph for cycles and against the dependency policy.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Set, Optional
+from collections import defaultdict
+from dataclasses import dataclass
+
+from gitops_validation.dependency_graph import DependencyClosure
+from gitops_validation.dependency_rules import (
+    DependencyPolicy,
+    resources_by_kustomization,
+)
+from gitops_validation.kustomize_graph import KustomizeGraph
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import span
+
+FLUX_KUSTOMIZATION_FILE = "flux-kustomization.yaml"
+
+
+@dataclass
+class DependsOn:
+    name: str
+    namespace: Optional[str] = None
+
+
+@dataclass
+class KustomizationSpec:
+    path: str
+    depends_on: List[DependsOn]
+    # File the Flux Kustomization is defined in
+    source: Optional[Path] = None
+
+    @classmethod
+    def from_dict(
+        cls, spec_dict: Dict, source: Optional[Path] = None
+    ) -> "KustomizationSpec":
+        depends_on = []
+        for dep in spec_dict.get("dependsOn", []):
+            if isinstance(dep, dict) and dep.get("name"):
+                depends_on.append(
+                    DependsOn(name=dep["name"], namespace=dep.get("namespace"))
+                )
+
+        return cls(path=spec_dict.get("path", ""), depends_on=depends_on, source=source)
+
+
+def load_kustomizations(
+    root: Path = Path("k8s"), index: Optional[ManifestIndex] = None
+) -> Dict[str, KustomizationSpec]:
+    """Load all Flux kustomizations from the repository"""
+    if index is None:
+        index = ManifestIndex.build(root)
+        index.report_errors(FLUX_KUSTOMIZATION_FILE)
+
+    kustomizations = {}
+
+    for doc in index.find("Kustomization", "kustomize.toolkit.fluxcd.io"):
+        # Also matches prefixed files such as metallb/config-flux-kustomization.yaml
+        if doc.path.name.endswith(FLUX_KUSTOMIZATION_FILE) and doc.name:
+            kustomizations[doc.name] = KustomizationSpec.from_dict(doc.spec, doc.path)
+
+    return kustomizations
+
+
+def build_dependency_graph(
+    kustomizations: Dict[str, KustomizationSpec],
+) -> Dict[str, List[str]]:
+    """Build dependency graph from kustomizations"""
+    graph = defaultdict(list)
+
+    for name, spec in kustomizations.items():
+        depends_on = spec.depends_on
+        for dep in depends_on:
+            graph[dep.name].append(name)
+
+    return dict(graph)
+
+
+def find_cycles(graph: Dict[str, List[str]], all_nodes: Set[str]) -> List[List[str]]:
+    """Find cycles in dependency graph using DFS"""
+    WHITE, GRAY, BLACK = 0, 1, 2
+    color = {node: WHITE for node in all_nodes}
+    cycles = []
+
+    # Iterative DFS with an explicit stack so deep chains can't hit the recursion limit
+    for start in all_nodes:
+        if color[start] != WHITE:
+            continue
+
+        color[start] = GRAY
+        path = [start]
+        stack = [iter(graph.get(start, []))]
+        while stack:
+            neighbor = next(stack[-1], None)
+            if neighbor is None:
+                stack.pop()
+                color[path.pop()] = BLACK
+            elif color[neighbor] == GRAY:
+                # Found cycle
+                cycle_start = path.index(neighbor)
+                cycles.append(path[cycle_start:] + [neighbor])
+            elif color[neighbor] == WHITE:
+                color[neighbor] = GRAY
+                path.append(neighbor)
+                stack.append(iter(graph.get(neighbor, [])))
+
+    return cycles
+
+
+def check_dependencies(
+    index: ManifestIndex,
+    kustomizations: Dict[str, KustomizationSpec],
+    policy: DependencyPolicy,
+    kustomize_graph: Optional[KustomizeGraph] = None,
+) -> List[str]:
+    """Cycle detection plus every policy rule, evaluated over the shared index"""
+    errors = []
+
+    # Build dependency graph
+    graph = build_dependency_graph(kustomizations)
+    all_nodes = set(kustomizations.keys()) | set().union(*graph.values())
+
+    # Check for circular dependencies
+    with span("find cycles", nodes=len(all_nodes)):
+        cycles = find_cycles(graph, all_nodes)
+    if cycles:
+        errors.append("❌ Circular dependencies detected:")
+        for cycle in cycles:
+            errors.append(f"   {' → '.join(cycle)}")
+
+    # Evaluate every policy rule in one pass over the shared index
+    closure = DependencyClosure(
+        {
+            name: [dep.name for dep in spec.depends_on]
+            for name, spec in kustomizations.items()
+        }
+    )
+    with span("resources by kustomization"):
+        resources = resources_by_kustomization(index, kustomizations, kustomize_graph)
+    with span("policy rules", rules=len(policy.ordering) + len(policy.resources)):
+        errors.extend(policy.evaluate(kustomizations, closure, resources))
+
+    return errors
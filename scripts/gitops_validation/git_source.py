@@ -0,0 +1,183 @@
+"""
+Git object-store manifest source
+Reads manifest trees straight from git through one persistent
+`git cat-file --batch` process instead of the working tree, so validators can
+check exactly what is staged, or any commit, without a checkout. Objects are
+memoized by id: a subtree or blob that is unchanged between commits is read
+and parsed once, however many commits of a range contain it.
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from gitops_validation.profiling import span
+from gitops_validation.summary_cache import SummaryCache
+
+# Tree entry modes that are regular files; symlinks and submodules are skipped
+BLOB_MODES = (b"100644", b"100755")
+TREE_MODE = b"40000"
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(*args: str) -> str:
+    result = subprocess.run(["git", *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise GitError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def rev_list(revision_range: str) -> List[Tuple[str, str]]:
+    """(commit, "short hash and subject") in a range such as main..HEAD, oldest first"""
+    output = _git("log", "--reverse", "--format=%H %h %s", revision_range, "--")
+    return [tuple(line.split(" ", 1)) for line in output.splitlines()]
+
+
+class GitObjectStore:
+    """A persistent `git cat-file --batch` pipe with per-object memoization"""
+
+    def __init__(self):
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._objects: Dict[str, Tuple[str, bytes]] = {}
+        self._trees: Dict[str, List[Tuple[Path, str]]] = {}
+        # blob id -> (summaries, parse error)
+        self.summaries: Dict[str, Tuple[List, Optional[str]]] = {}
+        self.reads = 0
+
+    def __enter__(self) -> "GitObjectStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+
+    def _request(self, name: str) -> Optional[Tuple[str, str, bytes]]:
+        """(object id, type, content) of an object name, or None if missing"""
+        self._process.stdin.write(name.encode() + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            return None  # "<name> missing" or "<name> ambiguous"
+        oid, kind, size = header[0].decode(), header[1].decode(), int(header[2])
+        content = self._process.stdout.read(size + 1)[:-1]
+        self.reads += 1
+        return oid, kind, content
+
+    def read(self, oid: str) -> Tuple[str, bytes]:
+        """(type, content) of an object id, read from git at most once"""
+        if oid not in self._objects:
+            found = self._request(oid)
+            if found is None:
+                raise GitError(f"object {oid} is missing")
+            self._objects[oid] = found[1:]
+        return self._objects[oid]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Object id of a name such as HEAD:./k8s, or None if it doesn't exist"""
+        found = self._request(name)
+        if found is None:
+            return None
+        oid, kind, content = found
+        self._objects.setdefault(oid, (kind, content))
+        return oid
+
+    def _tree_entries(self, oid: str) -> List[Tuple[Path, str]]:
+        """(relative path, blob id) of every file below a tree, memoized per tree"""
+        if oid in self._trees:
+            return self._trees[oid]
+        _, content = self.read(oid)
+        hash_size = len(oid) // 2
+        entries = []
+        offset = 0
+        while offset < len(content):
+            space = content.index(b" ", offset)
+            nul = content.index(b"\0", space)
+            mode, name = content[offset:space], content[space + 1 : nul].decode()
+            child = content[nul + 1 : nul + 1 + hash_size].hex()
+            offset = nul + 1 + hash_size
+            if mode == TREE_MODE:
+                entries.extend(
+                    (Path(name) / path, blob)
+                    for path, blob in self._tree_entries(child)
+                )
+            elif mode in BLOB_MODES:
+                entries.append((Path(name), child))
+        self._trees[oid] = entries
+        return entries
+
+    def tree(self, revision: str, root: Path) -> "GitTree":
+        """Files below root in a commit (paths relative to the working directory)"""
+        with span("git tree", revision=revision):
+            if self.resolve(f"{revision}^{{commit}}") is None:
+                raise GitError(f"unknown revision {revision}")
+            oid = self.resolve(f"{revision}:./{root.as_posix()}")
+            if oid is None:
+                return GitTree(self, root, {}, tree_id=None)
+            files = {root / path: blob for path, blob in self._tree_entries(oid)}
+            return GitTree(self, root, files, tree_id=oid)
+
+    def staged(self, root: Path) -> "GitTree":
+        """Files below root as staged in the index"""
+        files = {}
+        with span("git ls-files", "subprocess"):
+            listing = _git("ls-files", "--stage", "-z", "--", str(root))
+        for entry in listing.split("\0"):
+            if not entry:
+                continue
+            info, path = entry.split("\t", 1)
+            mode, blob, stage = info.split()
+            # Unmerged paths have no single staged version
+            if stage == "0" and mode.encode() in BLOB_MODES:
+                files[Path(path)] = blob
+        return GitTree(self, root, files, tree_id=None)
+
+
+class GitTree:
+    """A snapshot of the files below root, read through a GitObjectStore"""
+
+    def __init__(
+        self,
+        store: GitObjectStore,
+        root: Path,
+        files: Dict[Path, str],
+        tree_id: Optional[str],
+    ):
+        self.store = store
+        self.root = root
+        # path -> blob id
+        self.files = files
+        # Object id of root's tree, so identical snapshots can share results
+        self.tree_id = tree_id
+
+    def paths(self, suffix: str = "") -> Iterator[Path]:
+        return (path for path in sorted(self.files) if path.name.endswith(suffix))
+
+    def read_text(self, path: Path) -> str:
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return self.store.read(self.files[path])[1].decode()
+
+    def summarize(
+        self, path: Path, cache: SummaryCache
+    ) -> Tuple[List[Optional[Dict]], Optional[str]]:
+        """Summaries of one file, computed once per blob across every tree"""
+        blob = self.files[path]
+        if blob not in self.store.summaries:
+            try:
+                text = self.read_text(path)
+            except UnicodeDecodeError as e:
+                self.store.summaries[blob] = ([], str(e))
+            else:
+                self.store.summaries[blob] = cache.summarize(text)
+        return self.store.summaries[blob]
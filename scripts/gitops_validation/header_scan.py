@@ -0,0 +1,110 @@
+"""
+Header-only YAML scanning
+Composes each document into a node tree (in C when libyaml is available) and
+constructs Python objects only for the fields validators read: kind,
+apiVersion, metadata.name/namespace and the summarized spec fields. Large
+blocks such as ConfigMap data or HelmRelease values are never constructed.
+"""
+
+import yaml
+from typing import Dict, List, Optional
+
+try:
+    from yaml import CSafeLoader as Loader
+
+    HAVE_LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as Loader
+
+    HAVE_LIBYAML = False
+
+MERGE_TAG = "tag:yaml.org,2002:merge"
+
+METADATA_FIELDS = ("name", "namespace")
+
+# spec fields that validators read; everything else is dropped
+SUMMARY_SPEC_FIELDS = ("path", "dependsOn", "chart")
+
+
+def _pick(values, fields) -> Dict:
+    if not isinstance(values, dict):
+        return {}
+    return {key: values[key] for key in fields if key in values}
+
+
+def summarize_document(doc: Dict) -> Dict:
+    """Reduce a fully parsed document to the fields validators look at"""
+    summary = {
+        "kind": doc.get("kind"),
+        "apiVersion": doc.get("apiVersion"),
+        "metadata": _pick(doc.get("metadata"), METADATA_FIELDS),
+    }
+    spec = _pick(doc.get("spec"), SUMMARY_SPEC_FIELDS)
+    if spec:
+        summary["spec"] = spec
+    return summary
+
+
+def _mapping_items(node: yaml.Node) -> Optional[Dict[str, yaml.Node]]:
+    """Index a mapping node's plain keys, or None if it needs full construction"""
+    if not isinstance(node, yaml.MappingNode):
+        return None
+    items = {}
+    for key, value in node.value:
+        if not isinstance(key, yaml.ScalarNode) or key.tag == MERGE_TAG:
+            # Merge keys and complex keys change what the mapping contains
+            return None
+        items[key.value] = value
+    return items
+
+
+def _pick_nodes(loader, node: yaml.Node, fields) -> Dict:
+    """Construct only the requested keys of a mapping node"""
+    items = _mapping_items(node)
+    if items is None:
+        return _pick(loader.construct_object(node, deep=True), fields)
+    return {
+        key: loader.construct_object(items[key], deep=True)
+        for key in fields
+        if key in items
+    }
+
+
+def _summarize_node(loader, node: yaml.Node) -> Optional[Dict]:
+    items = _mapping_items(node)
+    if items is None:
+        doc = loader.construct_document(node)
+        return summarize_document(doc) if isinstance(doc, dict) else None
+
+    header = _pick_nodes(loader, node, ("kind", "apiVersion"))
+    summary = {
+        "kind": header.get("kind"),
+        "apiVersion": header.get("apiVersion"),
+        "metadata": {},
+    }
+    if "metadata" in items:
+        summary["metadata"] = _pick_nodes(loader, items["metadata"], METADATA_FIELDS)
+    if "spec" in items:
+        spec = _pick_nodes(loader, items["spec"], SUMMARY_SPEC_FIELDS)
+        if spec:
+            summary["spec"] = spec
+    return summary
+
+
+def scan_summaries(text: str) -> List[Optional[Dict]]:
+    """Summarize every document in a YAML stream without constructing bodies
+
+    Produces the same result as summarize_document() over yaml.safe_load_all(),
+    with None for documents that are not mappings.
+    """
+    loader = Loader(text)
+    try:
+        summaries = []
+        while loader.check_node():
+            summaries.append(_summarize_node(loader, loader.get_node()))
+            # Anchors never cross document boundaries
+            loader.constructed_objects = {}
+            loader.recursive_objects = {}
+        return summaries
+    finally:
+        loader.dispose()
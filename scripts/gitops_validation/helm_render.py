@@ -0,0 +1,358 @@
+"""
+Parallel, cached helm rendering of the local charts
+Renders every chart in charts/ with `helm template`: once per HelmRelease that
+installs it, with that release's name, namespace and values, and once with its
+defaults if no release does. Renders run through the bounded scheduler and are
+cached by a hash of the chart directory (vendored subchart archives included),
+the release and its values and the helm version, so unchanged charts are
+neither rendered nor extracted again. Output is summarized document by document
+like kustomize output, so the same CRD schema and identity checks apply.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import signal
+import time
+import yaml
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from gitops_validation.build_cache import BuildCache, tool_version
+from gitops_validation.crd_schemas import CHART_ROOT, SchemaSet
+from gitops_validation.header_scan import Loader
+from gitops_validation.identity_index import IdentityIndex
+from gitops_validation.kustomize_build import summarize_into
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import span
+from gitops_validation.scheduler import DurationHistory, run_bounded
+from gitops_validation.summary_cache import SummaryCache
+from gitops_validation.yaml_stream import (
+    STREAM_LINE_LIMIT,
+    aiter_documents,
+    iter_documents,
+)
+
+# Bump when cached render entries must not be reused
+HELM_RENDER_FORMAT = 1
+
+DEFAULT_CACHE_DIR = Path(".cache/gitops-validation/helm")
+# Separate from the kustomize build history; both checks save concurrently
+DEFAULT_HISTORY_PATH = Path(".cache/gitops-validation/helm-durations.json")
+HELM_TIMEOUT = 120
+
+
+class ChartRelease(NamedTuple):
+    chart: Path
+    release: str
+    namespace: str
+    values: Dict
+    # HelmRelease manifest, or the chart's values.yaml when rendering defaults
+    source: Path
+    # valuesFrom entries without a targetPath, which can't be stood in for
+    unresolved: Tuple[str, ...] = ()
+
+    @property
+    def label(self) -> str:
+        return f"{self.chart} ({self.namespace}/{self.release})"
+
+
+def _set_path(values: Dict, dotted: str, value: str) -> None:
+    *parents, leaf = dotted.split(".")
+    for part in parents:
+        child = values.get(part)
+        if not isinstance(child, dict):
+            child = values[part] = {}
+        values = child
+    values[leaf] = value
+
+
+def local_chart(chart: str, chart_root: Path = CHART_ROOT) -> Optional[Path]:
+    """The charts/ directory a HelmRelease's chart refers to, if it is local"""
+    path = Path(chart.removeprefix("./"))
+    if path.parent != chart_root or not (path / "Chart.yaml").exists():
+        return None
+    return path
+
+
+def find_releases(
+    index: ManifestIndex, chart_root: Path = CHART_ROOT
+) -> List[ChartRelease]:
+    """Every HelmRelease of a local chart, plus the charts no release installs"""
+    releases = []
+    installed = set()
+    for doc in index.find("HelmRelease"):
+        chart_spec = (doc.spec.get("chart") or {}).get("spec") or {}
+        chart = local_chart(str(chart_spec.get("chart") or ""), chart_root)
+        if chart is None:
+            continue
+        # Summaries drop values; read the whole HelmRelease again
+        documents = list(yaml.load_all(doc.path.read_text(), Loader=Loader))
+        spec = documents[doc.position].get("spec") or {}
+        values = copy.deepcopy(spec.get("values") or {})
+        unresolved = []
+        for reference in spec.get("valuesFrom") or []:
+            source = f"{reference.get('kind')}/{reference.get('name')}"
+            if reference.get("targetPath"):
+                # The value lives in the cluster; any string lets templates render
+                _set_path(values, reference["targetPath"], f"valuesFrom:{source}")
+            else:
+                unresolved.append(source)
+
+        namespace = spec.get("targetNamespace") or doc.namespace or "default"
+        release = spec.get("releaseName") or (
+            f"{spec['targetNamespace']}-{doc.name}"
+            if spec.get("targetNamespace")
+            else doc.name
+        )
+        installed.add(chart)
+        releases.append(
+            ChartRelease(chart, release, namespace, values, doc.path, tuple(unresolved))
+        )
+
+    for chart_file in sorted(chart_root.glob("*/Chart.yaml")):
+        chart = chart_file.parent
+        if chart not in installed:
+            releases.append(
+                ChartRelease(chart, chart.name, "default", {}, chart / "values.yaml")
+            )
+    return releases
+
+
+def select_affected(
+    releases: List[ChartRelease], changed_files: List[Path]
+) -> List[ChartRelease]:
+    """Releases whose chart or HelmRelease is among changed_files"""
+    changed = {path.resolve() for path in changed_files}
+    return [
+        release
+        for release in releases
+        if release.source.resolve() in changed
+        or any(release.chart.resolve() in path.parents for path in changed)
+    ]
+
+
+class ChartHasher:
+    """Content digests of chart directories, computed once per chart"""
+
+    def __init__(self):
+        self._digests: Dict[Path, str] = {}
+
+    def _chart_digest(self, chart: Path) -> str:
+        if chart not in self._digests:
+            h = hashlib.blake2b(digest_size=20)
+            for path in sorted(p for p in chart.rglob("*") if p.is_file()):
+                h.update(f"{path.relative_to(chart)}\0".encode())
+                h.update(hashlib.blake2b(path.read_bytes(), digest_size=20).digest())
+            self._digests[chart] = h.hexdigest()
+        return self._digests[chart]
+
+    def key(self, release: ChartRelease, salt: str) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{salt}\0{release.release}\0{release.namespace}\0".encode())
+        h.update(self._chart_digest(release.chart).encode())
+        h.update(json.dumps(release.values, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+
+class RenderResult(NamedTuple):
+    release: ChartRelease
+    success: bool
+    error: str
+    documents: List[Dict]
+    elapsed: float
+    cached: bool = False
+    # CRD schema violations in the output; None when it wasn't schema-validated
+    schema_errors: Optional[List[str]] = None
+
+
+@dataclass
+class HelmRun:
+    results: List[RenderResult]
+    wall_time: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def failed(self) -> List[Tuple[ChartRelease, str]]:
+        return [(r.release, r.error) for r in self.results if not r.success]
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return {r.release.label: r.elapsed for r in self.results}
+
+    @property
+    def schema_errors(self) -> List[Tuple[ChartRelease, str]]:
+        return [
+            (r.release, error) for r in self.results for error in r.schema_errors or ()
+        ]
+
+    def identities(self) -> IdentityIndex:
+        """Every successful render's output by resource identity
+
+        Unlike nested kustomizations, releases never render each other's
+        resources, so collisions here are real conflicts.
+        """
+        index = IdentityIndex()
+        for result in self.results:
+            for doc in result.documents:
+                index.observe(doc, result.release.label)
+        return index
+
+
+async def render_release(
+    release: ChartRelease,
+    timeout: float,
+    cache: SummaryCache,
+    build_cache: BuildCache,
+    key: Optional[str],
+    schemas: Optional[SchemaSet] = None,
+) -> RenderResult:
+    """`helm template` one release, summarizing the output as it streams in
+
+    With a cache key, an unchanged chart and values reuse the cached output
+    and result instead of running helm.
+    """
+    started = time.monotonic()
+    schema_errors = [] if schemas is not None else None
+
+    cached = build_cache.get(key) if key else None
+    if cached is not None:
+        success, error, output_path = cached
+        documents = []
+        if success:
+            with open(output_path, "r") as f:
+                for text in iter_documents(f):
+                    summarize_into(documents, text, cache, schemas, schema_errors)
+        return RenderResult(
+            release,
+            success,
+            error,
+            documents,
+            time.monotonic() - started,
+            cached=True,
+            schema_errors=schema_errors if success else None,
+        )
+
+    writer = build_cache.writer(key) if key else None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "helm",
+            "template",
+            release.release,
+            str(release.chart),
+            "--namespace",
+            release.namespace,
+            "--include-crds",
+            # Values as JSON (which is YAML) on stdin; no temporary files
+            "--values",
+            "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=STREAM_LINE_LIMIT,
+        )
+
+        async def write_values() -> None:
+            proc.stdin.write(json.dumps(release.values, default=str).encode())
+            await proc.stdin.drain()
+            proc.stdin.close()
+
+        async def read_documents() -> List[Dict]:
+            documents = []
+            async for text in aiter_documents(proc.stdout):
+                if writer:
+                    writer.write_document(text)
+                summarize_into(documents, text, cache, schemas, schema_errors)
+            return documents
+
+        try:
+            _, documents, stderr, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    write_values(), read_documents(), proc.stderr.read(), proc.wait()
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            os.killpg(proc.pid, signal.SIGKILL)
+            await proc.wait()
+            if writer:
+                writer.discard()
+            return RenderResult(
+                release,
+                False,
+                f"helm template timed out after {timeout:g} seconds",
+                [],
+                time.monotonic() - started,
+            )
+
+        elapsed = time.monotonic() - started
+        success = proc.returncode == 0
+        error = "" if success else stderr.decode()
+        if writer:
+            writer.commit(success, error)
+        return RenderResult(
+            release,
+            success,
+            error,
+            documents if success else [],
+            elapsed,
+            schema_errors=schema_errors if success else None,
+        )
+    except Exception as e:
+        if writer:
+            writer.discard()
+        return RenderResult(release, False, str(e), [], time.monotonic() - started)
+
+
+async def run_helm_renders(
+    releases: List[ChartRelease],
+    cache: SummaryCache,
+    jobs: int,
+    timeout: float = HELM_TIMEOUT,
+    use_render_cache: bool = True,
+    schemas: Optional[SchemaSet] = None,
+) -> HelmRun:
+    """Render releases through a bounded pool, slowest renders first"""
+    helm_version = tool_version(["helm", "version", "--short"])
+    render_cache = BuildCache(
+        DEFAULT_CACHE_DIR, enabled=use_render_cache and helm_version is not None
+    )
+    hasher = ChartHasher()
+    keys = {
+        release.label: hasher.key(release, f"{HELM_RENDER_FORMAT}\0{helm_version}")
+        if render_cache.enabled
+        else None
+        for release in releases
+    }
+
+    async def render(release: ChartRelease) -> RenderResult:
+        with span("helm template", "subprocess", lane=True, chart=release.label):
+            return await render_release(
+                release, timeout, cache, render_cache, keys[release.label], schemas
+            )
+
+    history = DurationHistory(DEFAULT_HISTORY_PATH)
+    by_label = {release.label: release for release in releases}
+    started = time.monotonic()
+    results = await run_bounded(
+        [by_label[label] for label in history.longest_first(by_label)], render, jobs
+    )
+    wall_time = time.monotonic() - started
+    render_cache.evict()
+
+    for result in results:
+        if not result.cached:
+            history.record(result.release.label, result.elapsed)
+    history.save()
+
+    return HelmRun(
+        results=results,
+        wall_time=wall_time,
+        cache_hits=render_cache.hits,
+        cache_misses=render_cache.misses,
+    )
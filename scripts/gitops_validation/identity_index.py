@@ -0,0 +1,84 @@
+"""
+Rendered resource identity index
+Indexes rendered documents by (API group, kind, namespace, name) in one pass,
+with O(1) lookups for other checks, and records every resource that more than
+one source renders. Two Flux Kustomizations applying the same object take
+turns overwriting it (and pruning it when either stops rendering it).
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+
+class ResourceKey(NamedTuple):
+    group: str
+    kind: str
+    # "" when the document doesn't set one (cluster-scoped or defaulted)
+    namespace: str
+    name: str
+
+    @classmethod
+    def of(cls, doc: Dict) -> Optional["ResourceKey"]:
+        """Identity of a rendered document, or None if it has no kind or name"""
+        metadata = doc.get("metadata") or {}
+        kind, name = doc.get("kind"), metadata.get("name")
+        if not kind or not name:
+            return None
+        group = (doc.get("apiVersion") or "").rpartition("/")[0]
+        return cls(group, kind, metadata.get("namespace") or "", name)
+
+    def __str__(self) -> str:
+        kind = f"{self.kind}.{self.group}" if self.group else self.kind
+        name = f"{self.namespace}/{self.name}" if self.namespace else self.name
+        return f"{kind} {name}"
+
+
+class IdentityIndex:
+    """Rendered documents by identity, each with the sources that rendered it"""
+
+    def __init__(self):
+        # identity -> source -> document as that source rendered it
+        self._entries: Dict[ResourceKey, Dict[str, Dict]] = {}
+        # (kind, name) -> identities, for lookups across groups and namespaces
+        self._by_kind_name: Dict[Tuple[str, str], List[ResourceKey]] = defaultdict(list)
+        self._collisions: Set[ResourceKey] = set()
+
+    def observe(self, doc: Dict, source: str) -> Optional[ResourceKey]:
+        key = ResourceKey.of(doc)
+        if key is None:
+            return None
+        sources = self._entries.get(key)
+        if sources is None:
+            sources = self._entries[key] = {}
+            self._by_kind_name[key.kind, key.name].append(key)
+        sources.setdefault(source, doc)
+        if len(sources) > 1:
+            self._collisions.add(key)
+        return key
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: ResourceKey) -> bool:
+        return key in self._entries
+
+    def rendered_by(self, key: ResourceKey) -> Dict[str, Dict]:
+        """source -> document for one identity ({} if nothing renders it)"""
+        return self._entries.get(key, {})
+
+    def find(self, kind: str, name: str) -> Iterator[ResourceKey]:
+        """Identities of a kind and name, in any API group or namespace"""
+        yield from self._by_kind_name.get((kind, name), ())
+
+    def collisions(self) -> Dict[ResourceKey, List[str]]:
+        """Identities rendered by more than one source -> those sources"""
+        return {
+            key: sorted(self._entries[key]) for key in sorted(self._collisions, key=str)
+        }
+
+    def warnings(self) -> List[str]:
+        """One line per collision, naming every source"""
+        return [
+            f"⚠️  {key} is rendered by {len(sources)} sources: {', '.join(sources)}"
+            for key, sources in self.collisions().items()
+        ]
@@ -0,0 +1,424 @@
+"""
+Container image inventory
+Finds every container image reference in rendered kustomize output (image
+fields of any resource, and of HelmRelease values) and in the default values of
+the local charts/, and dedupes them into an inventory indexed by reference and
+by registry, with the workloads using each image. HelmReleases of local charts
+are scanned with the chart's defaults (including packaged subcharts) merged
+under their values, the way helm would; untagged chart images default to the
+chart's appVersion. Charts from remote repositories are not rendered, so only
+the images their values set are known.
+
+Scan results are cached under .cache/ by a hash of each rendered document.
+"""
+
+import copy
+import re
+import tarfile
+import yaml
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from gitops_validation.crd_schemas import CHART_ROOT, CRD_KIND
+from gitops_validation.header_scan import Loader, scan_summaries
+from gitops_validation.identity_index import ResourceKey
+from gitops_validation.summary_cache import DEFAULT_MAX_ENTRIES, SummaryCache
+
+# Bump when the image scan format changes so old entries are ignored
+IMAGE_SCAN_FORMAT = 1
+
+DEFAULT_CACHE_DIR = Path(".cache/gitops-validation/images")
+
+DOCKER_HUB = "docker.io"
+DOCKER_HUB_ALIASES = ("index.docker.io", "registry-1.docker.io")
+
+# Harbor proxy cache project per upstream registry, as created by
+# terraform/03-configuration/harbor-proxy-cache and mirrored by the Talos nodes
+HARBOR_REGISTRY = "registry.test-cluster.agentydragon.com"
+HARBOR_PROXY_PROJECTS = {
+    "docker.io": "docker-hub-proxy",
+    "ghcr.io": "ghcr-proxy",
+    "quay.io": "quay-proxy",
+    "registry.k8s.io": "registry-k8s-io-proxy",
+}
+
+# Kinds whose bodies are data, never pod specs
+DATA_KINDS = frozenset({"ConfigMap", "Secret", CRD_KIND})
+HELM_RELEASE = "HelmRelease"
+
+# Helm templates ({{ }}) and Flux post-build substitutions (${VAR})
+_TEMPLATED = re.compile(r"\{\{|\$\{")
+_REPOSITORY = re.compile(
+    r"^[a-z0-9]+(?:[._-]+[a-z0-9]+)*(?:/[a-z0-9]+(?:[._-]+[a-z0-9]+)*)*$"
+)
+
+
+class ImageRef(NamedTuple):
+    registry: str
+    repository: str
+    # "" when the reference doesn't set one (the runtime pulls "latest")
+    tag: str
+    digest: str
+
+    @classmethod
+    def parse(cls, reference: str) -> Optional["ImageRef"]:
+        """Normalize a reference the way container runtimes do, or None if invalid"""
+        if _TEMPLATED.search(reference) or any(c.isspace() for c in reference):
+            return None
+        name, _, digest = reference.partition("@")
+        tag = ""
+        colon = name.rfind(":")
+        if colon > name.rfind("/"):
+            name, tag = name[:colon], name[colon + 1 :]
+        first, _, rest = name.partition("/")
+        if rest and ("." in first or ":" in first or first == "localhost"):
+            registry, repository = first, rest
+        else:
+            registry, repository = DOCKER_HUB, name
+        if registry in DOCKER_HUB_ALIASES:
+            registry = DOCKER_HUB
+        if registry == DOCKER_HUB and "/" not in repository:
+            repository = f"library/{repository}"
+        if not _REPOSITORY.match(repository):
+            return None
+        return cls(registry, repository, tag, digest)
+
+    def __str__(self) -> str:
+        reference = f"{self.registry}/{self.repository}"
+        if self.tag:
+            reference += f":{self.tag}"
+        if self.digest:
+            reference += f"@{self.digest}"
+        return reference
+
+    def through(self, harbor: str) -> Optional[str]:
+        """The same image pulled through Harbor's proxy cache, if it has one"""
+        project = HARBOR_PROXY_PROJECTS.get(self.registry)
+        if project is None:
+            return None
+        reference = f"{harbor}/{project}/{self.repository}"
+        if self.digest:
+            return f"{reference}@{self.digest}"
+        return f"{reference}:{self.tag or 'latest'}"
+
+
+def image_reference(value: Any) -> Optional[str]:
+    """The reference an `image:` field stands for
+
+    Either a plain reference, or a helm-style mapping of registry, repository,
+    tag and digest. Returns None if the field isn't one of those.
+    """
+    if isinstance(value, str):
+        return value.strip() or None
+    if not isinstance(value, dict) or not isinstance(value.get("repository"), str):
+        return None
+    reference = value["repository"]
+    if value.get("registry"):
+        reference = f"{value['registry']}/{reference}"
+    if value.get("tag") not in (None, ""):
+        reference += f":{value['tag']}"
+    if value.get("digest"):
+        reference += f"@{value['digest']}"
+    return reference
+
+
+def _untagged(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get("repository"), str)
+        and value.get("tag") in (None, "")
+        and not value.get("digest")
+    )
+
+
+def find_images(
+    value: Any, location: str, skip_disabled: bool = False
+) -> Iterator[Tuple[str, Any]]:
+    """(location, `image:` value) of every image field below value
+
+    With skip_disabled, subtrees with `enabled: false` are skipped, as helm
+    charts conventionally don't render disabled components.
+    """
+    if isinstance(value, dict):
+        if skip_disabled and value.get("enabled") is False:
+            return
+        for key, child in value.items():
+            path = f"{location}.{key}" if location else str(key)
+            if key == "image" and image_reference(child) is not None:
+                yield path, child
+            else:
+                yield from find_images(child, path, skip_disabled)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from find_images(item, f"{location}[{i}]", skip_disabled)
+
+
+def default_tags(values: Any, app_version: str) -> None:
+    """Tag untagged chart images with the chart's appVersion, as charts do"""
+    if not app_version:
+        return
+    for _, image in find_images(values, ""):
+        if _untagged(image):
+            image["tag"] = app_version
+
+
+def merge_values(base: Dict, override: Dict) -> Dict:
+    """Helm's values coalescing: nested maps merge, null deletes a key"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_values(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _lookup(values: Dict, dotted: str) -> Any:
+    for part in dotted.split("."):
+        if not isinstance(values, dict):
+            return None
+        values = values.get(part)
+    return values
+
+
+@dataclass
+class LocalChart:
+    """Default values of a chart in charts/, with its subcharts' nested in"""
+
+    path: Path
+    values: Dict
+    # subchart values key -> condition
+    conditions: Dict[str, str]
+
+    @classmethod
+    def load(cls, chart_dir: Path) -> "LocalChart":
+        meta = yaml.load((chart_dir / "Chart.yaml").read_text(), Loader=Loader) or {}
+        values_file = chart_dir / "values.yaml"
+        values = {}
+        if values_file.exists():
+            values = yaml.load(values_file.read_text(), Loader=Loader) or {}
+        default_tags(values, str(meta.get("appVersion") or ""))
+
+        subcharts = dict(_packaged_subcharts(chart_dir))
+        conditions = {}
+        for dependency in meta.get("dependencies") or []:
+            name = dependency.get("name")
+            if name not in subcharts:
+                continue
+            key = dependency.get("alias") or name
+            values[key] = merge_values(subcharts[name], values.get(key) or {})
+            if dependency.get("condition"):
+                conditions[key] = dependency["condition"]
+        return cls(chart_dir, values, conditions)
+
+    def render_values(self, overrides: Optional[Dict] = None) -> Dict:
+        """Values a release of this chart gets, without disabled subcharts"""
+        values = merge_values(self.values, overrides or {})
+        for key, condition in self.conditions.items():
+            # Helm uses the first path of a comma-separated condition that is set
+            for path in condition.split(","):
+                enabled = _lookup(values, path.strip())
+                if enabled is not None:
+                    if not enabled:
+                        values.pop(key, None)
+                    break
+        return values
+
+
+def _packaged_subcharts(chart_dir: Path) -> Iterator[Tuple[str, Dict]]:
+    """(name, default values) of each .tgz dependency under chart_dir/charts"""
+    for archive in sorted(chart_dir.glob("charts/*.tgz")):
+        try:
+            with tarfile.open(archive) as tar:
+                files = {}
+                for member in tar.getmembers():
+                    parts = Path(member.name).parts
+                    if member.isfile() and len(parts) == 2:
+                        files[parts[1]] = tar.extractfile(member).read().decode()
+        except (OSError, tarfile.TarError, UnicodeDecodeError):
+            continue
+        if "Chart.yaml" not in files:
+            continue
+        meta = yaml.load(files["Chart.yaml"], Loader=Loader) or {}
+        values = yaml.load(files.get("values.yaml", ""), Loader=Loader) or {}
+        default_tags(values, str(meta.get("appVersion") or ""))
+        yield meta.get("name"), values
+
+
+def _scan_document(doc: Dict) -> Dict:
+    key = ResourceKey.of(doc)
+    entry = {"identity": str(key) if key else doc.get("kind") or "", "images": []}
+    if doc.get("kind") == HELM_RELEASE:
+        spec = doc.get("spec") or {}
+        values = spec.get("values") or {}
+        entry["chart"] = ((spec.get("chart") or {}).get("spec") or {}).get("chart")
+        # Images of local charts are found once their defaults are merged in
+        entry["values"] = values
+        entry["images"] = [
+            [location, image]
+            for location, image in find_images(values, "values", skip_disabled=True)
+        ]
+    else:
+        entry["images"] = [
+            [location, image] for location, image in find_images(doc, "")
+        ]
+    return entry
+
+
+class ImageScanCache(SummaryCache):
+    """SummaryCache whose entries are the image fields of one rendered document"""
+
+    FORMAT = f"images-{IMAGE_SCAN_FORMAT}"
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        enabled: bool = True,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        super().__init__(cache_dir, enabled, max_entries)
+
+    @staticmethod
+    def _parse(text: str) -> Tuple[List[Dict], Optional[str]]:
+        try:
+            # Data kinds are skipped without constructing their bodies
+            summaries = scan_summaries(text)
+            if all(not s or s.get("kind") in DATA_KINDS for s in summaries):
+                return [], None
+            return [
+                _scan_document(doc)
+                for doc in yaml.load_all(text, Loader=Loader)
+                if isinstance(doc, dict) and doc.get("kind") not in DATA_KINDS
+            ], None
+        except yaml.YAMLError as e:
+            return [], str(e)
+
+
+@dataclass
+class ImageEntry:
+    ref: ImageRef
+    users: Set[str] = field(default_factory=set)
+    sources: Set[str] = field(default_factory=set)
+
+
+class ImageInventory:
+    """Deduplicated image references with the workloads that use them"""
+
+    def __init__(self, chart_root: Path = CHART_ROOT):
+        self.chart_root = chart_root
+        self.images: Dict[ImageRef, ImageEntry] = {}
+        self.by_registry: Dict[str, Set[ImageRef]] = defaultdict(set)
+        # Templated or malformed references -> users
+        self.unresolved: Dict[str, Set[str]] = defaultdict(set)
+        # HelmReleases of remote charts, whose default images aren't known
+        self.remote_charts: Set[str] = set()
+        self._charts: Dict[Path, Optional[LocalChart]] = {}
+        # HelmRelease identity -> (chart path, values, source), merged after the scan
+        self._releases: Dict[str, Tuple[Path, Dict, str]] = {}
+
+    def add(self, image: Any, user: str, source: str) -> None:
+        reference = image_reference(image)
+        if reference is None:
+            return
+        if _untagged(image):
+            # A chart default tag (usually its appVersion) that isn't known here
+            self.unresolved[f"{reference} (tag from chart default)"].add(user)
+            return
+        ref = ImageRef.parse(reference)
+        if ref is None:
+            self.unresolved[reference].add(user)
+            return
+        entry = self.images.get(ref)
+        if entry is None:
+            entry = self.images[ref] = ImageEntry(ref)
+            self.by_registry[ref.registry].add(ref)
+        entry.users.add(user)
+        entry.sources.add(source)
+
+    def chart(self, chart: str) -> Optional[LocalChart]:
+        """A HelmRelease's chart if it is one of the local charts"""
+        path = Path(chart.removeprefix("./"))
+        if path.parent != self.chart_root:
+            return None
+        if path not in self._charts:
+            self._charts[path] = (
+                LocalChart.load(path) if (path / "Chart.yaml").exists() else None
+            )
+        return self._charts[path]
+
+    def add_scan(self, entries: List[Dict], source: str) -> None:
+        """Fold the cached scan of one rendered document into the inventory"""
+        for entry in entries:
+            identity = entry["identity"]
+            if "values" not in entry:
+                for location, image in entry["images"]:
+                    self.add(image, identity, source)
+                continue
+            chart = self.chart(entry["chart"] or "")
+            if chart is not None:
+                self._releases[identity] = (chart.path, entry["values"], source)
+                continue
+            self.remote_charts.add(identity)
+            for location, image in entry["images"]:
+                self.add(image, f"{identity} ({location})", source)
+
+    def finish(self) -> None:
+        """Add local chart releases, and charts no release installs"""
+        installed = set()
+        for identity, (path, values, source) in sorted(self._releases.items()):
+            installed.add(path)
+            rendered = self._charts[path].render_values(values)
+            for location, image in find_images(rendered, "values", skip_disabled=True):
+                self.add(image, f"{identity} ({location})", source)
+        for chart_file in sorted(self.chart_root.glob("*/Chart.yaml")):
+            path = chart_file.parent
+            if path in installed:
+                continue
+            rendered = LocalChart.load(path).render_values()
+            for location, image in find_images(rendered, "values", skip_disabled=True):
+                self.add(image, f"{path} ({location})", str(path / "values.yaml"))
+
+    def prewarm(self, harbor: str = HARBOR_REGISTRY) -> List[str]:
+        """Harbor proxy references of every image with a proxy cache project"""
+        return sorted(
+            {
+                reference
+                for ref in self.images
+                if (reference := ref.through(harbor)) is not None
+            }
+        )
+
+    @property
+    def uncached(self) -> List[ImageRef]:
+        """Images from registries Harbor doesn't proxy"""
+        return sorted(ref for ref in self.images if ref.through("") is None)
+
+    def to_dict(self, harbor: str = HARBOR_REGISTRY) -> Dict:
+        return {
+            "images": [
+                {
+                    "reference": str(ref),
+                    "registry": ref.registry,
+                    "repository": ref.repository,
+                    "tag": ref.tag,
+                    "digest": ref.digest,
+                    "harbor": ref.through(harbor),
+                    "users": sorted(entry.users),
+                    "sources": sorted(entry.sources),
+                }
+                for ref, entry in sorted(self.images.items(), key=lambda x: str(x[0]))
+            ],
+            "registries": {
+                registry: sorted(str(ref) for ref in refs)
+                for registry, refs in sorted(self.by_registry.items())
+            },
+            "unresolved": {
+                reference: sorted(users)
+                for reference, users in sorted(self.unresolved.items())
+            },
+            "remote_charts": sorted(self.remote_charts),
+        }
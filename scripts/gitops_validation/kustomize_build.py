@@ -0,0 +1,305 @@
+"""
+Parallel kustomize builds
+Runs `kustomize build` for every selected kustomization through the bounded
+scheduler, summarizing output as it streams in and reusing cached builds whose
+inputs are unchanged. Used by validate-kustomizations.py and the unified
+validate-gitops.py driver.
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass
+
+from gitops_validation.build_cache import BuildCache, InputHasher, tool_version
+from gitops_validation.crd_schemas import SchemaSet
+from gitops_validation.external_secrets import (
+    EXTERNAL_SECRETS_RELEASE,
+    ExternalSecretsCheck,
+)
+from gitops_validation.identity_index import IdentityIndex
+from gitops_validation.kustomize_graph import KUSTOMIZATION_FILE, KustomizeGraph
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import span
+from gitops_validation.scheduler import DurationHistory, run_bounded
+from gitops_validation.summary_cache import SummaryCache
+from gitops_validation.yaml_stream import (
+    STREAM_LINE_LIMIT,
+    aiter_documents,
+    iter_documents,
+)
+
+# Bump when cached build entries must not be reused
+BUILD_CACHE_FORMAT = 1
+
+
+class BuildResult(NamedTuple):
+    kustomization: Path
+    success: bool
+    error: str
+    documents: List[Dict]
+    elapsed: float
+    cached: bool = False
+    # CRD schema violations in the output; None when it wasn't schema-validated
+    schema_errors: Optional[List[str]] = None
+
+
+@dataclass
+class KustomizeRun:
+    results: List[BuildResult]
+    wall_time: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    @property
+    def successful(self) -> List[Path]:
+        return [r.kustomization for r in self.results if r.success]
+
+    @property
+    def failed(self) -> List[Tuple[Path, str]]:
+        return [(r.kustomization, r.error) for r in self.results if not r.success]
+
+    @property
+    def timings(self) -> Dict[Path, float]:
+        return {r.kustomization: r.elapsed for r in self.results}
+
+    @property
+    def schema_errors(self) -> List[Tuple[Path, str]]:
+        return [
+            (r.kustomization, error)
+            for r in self.results
+            for error in r.schema_errors or ()
+        ]
+
+    def identities(self) -> IdentityIndex:
+        """Every successful build's output by resource identity
+
+        Collisions here are not errors: a parent kustomization re-renders the
+        resources of the kustomizations it includes.
+        """
+        index = IdentityIndex()
+        for result in self.results:
+            for doc in result.documents:
+                index.observe(doc, str(result.kustomization.parent))
+        return index
+
+    def external_secrets(self) -> ExternalSecretsCheck:
+        """Run the external-secrets check over every successful build's output"""
+        return ExternalSecretsCheck(self.identities())
+
+
+def find_kustomizations(paths: Iterable[Path]) -> List[Path]:
+    """kustomization.yaml files among paths, excluding flux-system"""
+    return sorted(
+        path
+        for path in paths
+        if path.name == KUSTOMIZATION_FILE and "flux-system" not in path.parts
+    )
+
+
+def summarize_into(
+    documents: List[Dict],
+    text: str,
+    cache: SummaryCache,
+    schemas: Optional[SchemaSet] = None,
+    schema_errors: Optional[List[str]] = None,
+) -> None:
+    summaries, error = cache.summarize(text)
+    # Unparseable documents are left to kustomize/kubeconform to report
+    if error is None:
+        documents.extend(doc for doc in summaries if doc)
+        # Only documents with a CRD schema are parsed in full
+        if schemas is not None and any(
+            doc and schemas.covers(doc) for doc in summaries
+        ):
+            schema_errors.extend(schemas.validate_text(text))
+
+
+async def validate_kustomization(
+    kustomization_path: Path,
+    timeout: float,
+    cache: SummaryCache,
+    build_cache: BuildCache,
+    key: Optional[str],
+    schemas: Optional[SchemaSet] = None,
+    on_document: Optional[Callable[[str, Path], None]] = None,
+) -> BuildResult:
+    """Validate a single kustomization directory
+
+    Build output is split and summarized document by document as it streams in;
+    only the compact summaries are kept in memory. With a cache key, unchanged
+    inputs reuse the cached output and result instead of running kustomize.
+    With schemas, documents of CRD kinds are also validated against them.
+    on_document, if given, also receives the text of every rendered document.
+    """
+    started = time.monotonic()
+    schema_errors = [] if schemas is not None else None
+
+    cached = build_cache.get(key) if key else None
+    if cached is not None:
+        success, error, output_path = cached
+        documents = []
+        if success:
+            with open(output_path, "r") as f:
+                for text in iter_documents(f):
+                    summarize_into(documents, text, cache, schemas, schema_errors)
+                    if on_document:
+                        on_document(text, kustomization_path)
+        return BuildResult(
+            kustomization_path,
+            success,
+            error,
+            documents,
+            time.monotonic() - started,
+            cached=True,
+            schema_errors=schema_errors if success else None,
+        )
+
+    writer = build_cache.writer(key) if key else None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "kustomize",
+            "build",
+            str(kustomization_path.parent),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=STREAM_LINE_LIMIT,
+        )
+
+        async def read_documents() -> List[Dict]:
+            documents = []
+            async for text in aiter_documents(proc.stdout):
+                if writer:
+                    writer.write_document(text)
+                summarize_into(documents, text, cache, schemas, schema_errors)
+                if on_document:
+                    on_document(text, kustomization_path)
+            return documents
+
+        try:
+            documents, stderr, _ = await asyncio.wait_for(
+                asyncio.gather(read_documents(), proc.stderr.read(), proc.wait()),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            # Kill the whole process group so helpers holding the pipes die too
+            os.killpg(proc.pid, signal.SIGKILL)
+            await proc.wait()
+            if writer:
+                writer.discard()
+            return BuildResult(
+                kustomization_path,
+                False,
+                f"kustomize build timed out after {timeout:g} seconds",
+                [],
+                time.monotonic() - started,
+            )
+
+        elapsed = time.monotonic() - started
+        success = proc.returncode == 0
+        error = "" if success else stderr.decode()
+        if writer:
+            writer.commit(success, error)
+        return BuildResult(
+            kustomization_path,
+            success,
+            error,
+            documents if success else [],
+            elapsed,
+            schema_errors=schema_errors if success else None,
+        )
+    except Exception as e:
+        if writer:
+            writer.discard()
+        return BuildResult(
+            kustomization_path, False, str(e), [], time.monotonic() - started
+        )
+
+
+def git_changed_files(since: str) -> List[Path]:
+    """Files changed relative to a git revision, including uncommitted edits"""
+    result = subprocess.run(
+        ["git", "diff", "--name-only", since, "--"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [Path(line) for line in result.stdout.splitlines() if line]
+
+
+def select_affected(
+    kustomizations: List[Path],
+    changed_files: List[Path],
+    index: ManifestIndex,
+    graph: KustomizeGraph,
+) -> List[Path]:
+    """Pick the kustomizations whose build output can change with changed_files"""
+
+    # The duplicate check needs to see every external-secrets installation, so
+    # kustomizations that define one are always rebuilt alongside the changes
+    external_secrets_sources = [
+        doc.path
+        for doc in index.find("HelmRelease")
+        if doc.name == EXTERNAL_SECRETS_RELEASE
+    ]
+
+    affected = graph.affected(changed_files)
+    if affected:
+        affected |= graph.affected(external_secrets_sources)
+
+    return [k for k in kustomizations if k.resolve() in affected]
+
+
+async def run_kustomize_builds(
+    kustomizations: List[Path],
+    graph: KustomizeGraph,
+    cache: SummaryCache,
+    jobs: int,
+    timeout: float,
+    use_build_cache: bool = True,
+    schemas: Optional[SchemaSet] = None,
+    on_document: Optional[Callable[[str, Path], None]] = None,
+) -> KustomizeRun:
+    """Build kustomizations through a bounded pool, slowest builds first"""
+    # Unchanged inputs (same Merkle hash and kustomize version) reuse cached builds
+    kustomize_version = tool_version(["kustomize", "version"])
+    build_cache = BuildCache(enabled=use_build_cache and kustomize_version is not None)
+    hasher = InputHasher(graph)
+    build_keys = {
+        k: hasher.key(k, f"{BUILD_CACHE_FORMAT}\0{kustomize_version}")
+        if build_cache.enabled
+        else None
+        for k in kustomizations
+    }
+
+    async def build(k: Path) -> BuildResult:
+        with span("kustomize build", "subprocess", lane=True, path=str(k.parent)):
+            return await validate_kustomization(
+                k, timeout, cache, build_cache, build_keys[k], schemas, on_document
+            )
+
+    history = DurationHistory()
+    by_key = {str(k.parent): k for k in kustomizations}
+    started = time.monotonic()
+    results = await run_bounded(
+        [by_key[key] for key in history.longest_first(by_key)], build, jobs
+    )
+    wall_time = time.monotonic() - started
+    build_cache.evict()
+
+    for result in results:
+        if not result.cached:
+            history.record(str(result.kustomization.parent), result.elapsed)
+    history.save()
+
+    return KustomizeRun(
+        results=results,
+        wall_time=wall_time,
+        cache_hits=build_cache.hits,
+        cache_misses=build_cache.misses,
+    )
@@ -0,0 +1,223 @@
+"""
+Kustomize reference graph
+Maps every kustomization.yaml to the local files and directories it pulls in
+(resources, components, patches, generators, plugin configs, helm charts) so a
+list of changed files can be traced back up to every kustomization whose build
+output it can affect.
+"""
+
+import functools
+import sys
+import yaml
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from gitops_validation.header_scan import Loader
+from gitops_validation.profiling import span
+
+KUSTOMIZATION_FILE = "kustomization.yaml"
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_path(path: Path) -> Path:
+    """Path.resolve(), memoized; call resolve_path.cache_clear() after the tree
+    changes (a new symlink can change what an existing path resolves to)"""
+    return path.resolve()
+
+
+def _is_remote(reference: str) -> bool:
+    return "://" in reference or reference.startswith(("github.com/", "git@"))
+
+
+def _is_inline(entry) -> bool:
+    """Inline plugin config (a mapping or a YAML document), not a file path"""
+    return not isinstance(entry, str) or "\n" in entry
+
+
+def _references(kustomization: Dict) -> Iterable[str]:
+    """Yield every local path a kustomization.yaml refers to"""
+    for key in ("resources", "bases", "components", "crds", "patchesStrategicMerge"):
+        for entry in kustomization.get(key) or []:
+            if isinstance(entry, str):
+                yield entry
+
+    for key in ("patches", "patchesJson6902", "replacements"):
+        for patch in kustomization.get(key) or []:
+            if isinstance(patch, dict) and isinstance(patch.get("path"), str):
+                yield patch["path"]
+
+    for key in ("configMapGenerator", "secretGenerator"):
+        for generator in kustomization.get(key) or []:
+            if not isinstance(generator, dict):
+                continue
+            for source in generator.get("files") or []:
+                if isinstance(source, str):
+                    # "key=path" form names the data key explicitly
+                    yield source.split("=", 1)[-1]
+            for env in generator.get("envs") or []:
+                if isinstance(env, str):
+                    yield env
+            if isinstance(generator.get("env"), str):
+                yield generator["env"]
+
+    # Plugin configs and transformer configurations given by path
+    for key in ("generators", "transformers", "validators", "configurations"):
+        for entry in kustomization.get(key) or []:
+            if not _is_inline(entry):
+                yield entry
+
+    openapi = kustomization.get("openapi")
+    if isinstance(openapi, dict) and isinstance(openapi.get("path"), str):
+        yield openapi["path"]
+
+    charts = [c for c in kustomization.get("helmCharts") or [] if isinstance(c, dict)]
+    if charts:
+        chart_home = (kustomization.get("helmGlobals") or {}).get("chartHome")
+        yield chart_home if isinstance(chart_home, str) else "charts"
+    for chart in charts:
+        if isinstance(chart.get("valuesFile"), str):
+            yield chart["valuesFile"]
+        for values_file in chart.get("additionalValuesFiles") or []:
+            if isinstance(values_file, str):
+                yield values_file
+
+
+def _opaque_inputs(kustomization: Dict) -> Optional[str]:
+    """Why a build may read inputs the graph can't see, or None if it can't
+
+    Remote resources and charts come from the network, and inline plugin
+    configs can point a plugin at any file.
+    """
+    for reference in _references(kustomization):
+        if _is_remote(reference):
+            return f"remote reference {reference}"
+    for chart in kustomization.get("helmCharts") or []:
+        if isinstance(chart, dict) and chart.get("repo"):
+            return f"helm chart {chart.get('name')} from {chart['repo']}"
+    for key in ("generators", "transformers", "validators"):
+        if any(_is_inline(entry) for entry in kustomization.get(key) or []):
+            return f"inline {key} plugin config"
+    return None
+
+
+@dataclass
+class KustomizeGraph:
+    # kustomization.yaml path -> resolved local files/directories it references
+    references: Dict[Path, Set[Path]] = field(default_factory=dict)
+    # resolved file or directory -> kustomization.yaml files referencing it
+    referenced_by: Dict[Path, Set[Path]] = field(
+        default_factory=lambda: defaultdict(set)
+    )
+    # kustomization.yaml path -> why its build reads inputs not in `references`
+    opaque: Dict[Path, str] = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls,
+        kustomization_files: Iterable[Path],
+        read: Optional[Callable[[Path], str]] = None,
+    ) -> "KustomizeGraph":
+        """read(path) supplies file contents, e.g. from a git snapshot"""
+        graph = cls()
+        with span("kustomize graph"):
+            for kustomization_file in kustomization_files:
+                graph.add(kustomization_file, read)
+        return graph
+
+    def add(
+        self,
+        kustomization_file: Path,
+        read: Optional[Callable[[Path], str]] = None,
+    ) -> None:
+        try:
+            if read is not None:
+                kustomization = yaml.load(read(kustomization_file), Loader=Loader)
+            else:
+                with open(kustomization_file, "r") as f:
+                    kustomization = yaml.load(f, Loader=Loader)
+            kustomization = kustomization or {}
+        except Exception as e:
+            print(
+                f"Warning: Failed to parse {kustomization_file}: {e}", file=sys.stderr
+            )
+            kustomization = {}
+
+        kustomization_file = resolve_path(kustomization_file)
+        base = kustomization_file.parent
+        refs = set()
+        self.opaque.pop(kustomization_file, None)
+        if isinstance(kustomization, dict):
+            for reference in _references(kustomization):
+                if not _is_remote(reference):
+                    refs.add(resolve_path(base / reference))
+            reason = _opaque_inputs(kustomization)
+            if reason is not None:
+                self.opaque[kustomization_file] = reason
+
+        self.references[kustomization_file] = refs
+        for ref in refs:
+            self.referenced_by[ref].add(kustomization_file)
+
+    def remove(self, kustomization_file: Path) -> None:
+        kustomization_file = resolve_path(kustomization_file)
+        self.opaque.pop(kustomization_file, None)
+        for ref in self.references.pop(kustomization_file, ()):
+            self.referenced_by[ref].discard(kustomization_file)
+
+    def affected(self, changed_files: Iterable[Path]) -> Set[Path]:
+        """Return every kustomization.yaml whose build can change with changed_files"""
+        pending: List[Path] = []
+        for changed in changed_files:
+            changed = resolve_path(changed)
+            if changed in self.references:
+                pending.append(changed)
+            pending.extend(self.referenced_by.get(changed, ()))
+            if changed.name == KUSTOMIZATION_FILE:
+                # Covers deleted/renamed kustomizations referenced by directory
+                pending.extend(self.referenced_by.get(changed.parent, ()))
+            for directory in changed.parents:
+                # Plain directory references (chartHome, a directory of files)
+                # read everything below them, as members() and the build
+                # cache key assume; a kustomization directory is covered above
+                if (directory / KUSTOMIZATION_FILE) not in self.references:
+                    pending.extend(self.referenced_by.get(directory, ()))
+
+        affected: Set[Path] = set()
+        while pending:
+            kustomization_file = pending.pop()
+            if kustomization_file in affected:
+                continue
+            affected.add(kustomization_file)
+            # Parents reference a kustomization by its directory
+            pending.extend(self.referenced_by.get(kustomization_file.parent, ()))
+            pending.extend(self.referenced_by.get(kustomization_file, ()))
+
+        return affected
+
+    def members(self, kustomization_file: Path) -> Set[Path]:
+        """Every local file a kustomization's build reads, following sub-kustomizations"""
+        files: Set[Path] = set()
+        seen: Set[Path] = set()
+        pending = [resolve_path(kustomization_file)]
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            files.add(current)
+            for ref in self.references.get(current, ()):
+                nested = ref / KUSTOMIZATION_FILE
+                if nested in self.references:
+                    pending.append(nested)
+                else:
+                    files.add(ref)
+        return files
+
+    def opaque_reason(self, kustomization_file: Path) -> Optional[str]:
+        """Why the build reads inputs members() can't list, or None if it doesn't"""
+        for member in sorted(self.members(kustomization_file)):
+            if member in self.opaque:
+                return self.opaque[member]
+        return None
@@ -0,0 +1,172 @@
+"""
+In-memory manifest index
+Walks the manifest tree once, parses each YAML file once and serves
+kind/apiVersion/path lookups to every validation check. Documents are held as
+compact summaries (see summary_cache), optionally served from the on-disk cache.
+The tree is read from the working directory, or from git (see git_source).
+"""
+
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from gitops_validation.profiling import span
+from gitops_validation.summary_cache import SummaryCache
+
+if TYPE_CHECKING:
+    from gitops_validation.git_source import GitTree
+
+
+@dataclass
+class ManifestDocument:
+    path: Path
+    position: int
+    doc: Dict
+
+    @property
+    def kind(self) -> Optional[str]:
+        return self.doc.get("kind")
+
+    @property
+    def api_version(self) -> str:
+        return self.doc.get("apiVersion") or ""
+
+    @property
+    def api_group(self) -> str:
+        """API group without the version ("" for the core group)"""
+        return self.api_version.rpartition("/")[0]
+
+    @property
+    def metadata(self) -> Dict:
+        return self.doc.get("metadata") or {}
+
+    @property
+    def name(self) -> Optional[str]:
+        return self.metadata.get("name")
+
+    @property
+    def namespace(self) -> Optional[str]:
+        return self.metadata.get("namespace")
+
+    @property
+    def spec(self) -> Dict:
+        return self.doc.get("spec") or {}
+
+
+@dataclass
+class ManifestIndex:
+    root: Path
+    documents: List[ManifestDocument] = field(default_factory=list)
+    errors: Dict[Path, str] = field(default_factory=dict)
+    _by_kind: Dict[str, List[ManifestDocument]] = field(
+        default_factory=lambda: defaultdict(list), repr=False
+    )
+    _by_path: Dict[Path, List[ManifestDocument]] = field(
+        default_factory=lambda: defaultdict(list), repr=False
+    )
+
+    @classmethod
+    def build(
+        cls,
+        root: Path = Path("k8s"),
+        cache: Optional[SummaryCache] = None,
+        source: Optional["GitTree"] = None,
+    ) -> "ManifestIndex":
+        """Walk root once and parse every YAML file into the index
+
+        With a git source, files come from that snapshot of root instead.
+        """
+        if cache is None:
+            cache = SummaryCache(enabled=False)
+
+        index = cls(root=root)
+        if source is not None:
+            with span("index git tree", root=str(root)):
+                for manifest_file in source.paths(".yaml"):
+                    with span("summarize", "file", file=str(manifest_file)):
+                        docs, error = source.summarize(manifest_file, cache)
+                    index.add_summaries(manifest_file, docs, error)
+            return index
+
+        with span("index tree", root=str(root)):
+            with span("rglob", root=str(root)):
+                manifest_files = sorted(root.rglob("*.yaml"))
+            for manifest_file in manifest_files:
+                index.add_file(manifest_file, cache)
+        return index
+
+    def add_file(self, manifest_file: Path, cache: SummaryCache) -> None:
+        with span("summarize", "file", file=str(manifest_file)):
+            docs, error = cache.summarize_file(manifest_file)
+        self.add_summaries(manifest_file, docs, error)
+
+    def add_summaries(
+        self, manifest_file: Path, docs: List[Optional[Dict]], error: Optional[str]
+    ) -> None:
+        if error is not None:
+            self.errors[manifest_file] = error
+            return
+
+        # Files that parse but are empty still count as seen
+        self._by_path.setdefault(manifest_file, [])
+        for position, doc in enumerate(docs):
+            if isinstance(doc, dict):
+                self.add(ManifestDocument(manifest_file, position, doc))
+
+    def remove_file(self, manifest_file: Path) -> None:
+        """Forget a file's documents (or parse error) so it can be re-added"""
+        self.errors.pop(manifest_file, None)
+        removed = self._by_path.pop(manifest_file, None)
+        if not removed:
+            return
+        self.documents = [d for d in self.documents if d.path != manifest_file]
+        for kind in {d.kind for d in removed if d.kind}:
+            remaining = [d for d in self._by_kind[kind] if d.path != manifest_file]
+            if remaining:
+                self._by_kind[kind] = remaining
+            else:
+                del self._by_kind[kind]
+
+    def update_file(self, manifest_file: Path, cache: SummaryCache) -> None:
+        """Re-read a changed file, or drop everything at or below a removed path"""
+        for known in [
+            p for p in self.files if p == manifest_file or manifest_file in p.parents
+        ]:
+            self.remove_file(known)
+        if manifest_file.suffix == ".yaml" and manifest_file.is_file():
+            self.add_file(manifest_file, cache)
+
+    def add(self, document: ManifestDocument) -> None:
+        self.documents.append(document)
+        self._by_path[document.path].append(document)
+        if document.kind:
+            self._by_kind[document.kind].append(document)
+
+    @property
+    def paths(self) -> List[Path]:
+        return list(self._by_path)
+
+    @property
+    def files(self) -> List[Path]:
+        """Every walked file, including ones that failed to parse"""
+        return sorted([*self._by_path, *self.errors])
+
+    def in_file(self, path: Path) -> List[ManifestDocument]:
+        return self._by_path.get(path, [])
+
+    def find(
+        self, kind: str, api_group: Optional[str] = None
+    ) -> Iterator[ManifestDocument]:
+        """Yield documents of a kind, optionally restricted to one API group"""
+        for document in self._by_kind.get(kind, []):
+            if api_group is None or document.api_group == api_group:
+                yield document
+
+    def report_errors(self, file_name: Optional[str] = None) -> None:
+        """Print parse failures, optionally only for files whose name ends with
+        file_name (so prefixed files like config-flux-kustomization.yaml count)"""
+        for path, error in self.errors.items():
+            if file_name is None or path.name.endswith(file_name):
+                print(f"Warning: Failed to parse {path}: {error}", file=sys.stderr)
@@ -0,0 +1,249 @@
+"""
+Opt-in profiling for the validation scripts
+`--profile` (or `--profile-output TRACE`) records a span for every
+instrumented phase, file and subprocess with its wall and process CPU time,
+samples peak RSS as spans end, and on exit writes a Chrome trace (open it in
+ui.perfetto.dev or chrome://tracing) and prints the top spans to stderr. Concurrent spans (builds
+running in parallel, checks running side by side) get their own trace lanes.
+
+With profiling off, span() returns one shared no-op context manager, so
+instrumented code pays a function call and nothing else.
+
+CPU time is the whole process's while a span was open, so spans that overlap
+share it; subprocess CPU is only known in total, once children are reaped.
+"""
+
+import argparse
+import atexit
+import contextlib
+import heapq
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_DIR = Path(".cache/gitops-validation/profiles")
+TOP_SPANS = 15
+
+_NULL_SPAN = contextlib.nullcontext()
+# Trace lane (thread id in the trace) of the innermost open span
+_lane: ContextVar[int] = ContextVar("profile_lane", default=0)
+
+
+def _rss_bytes(who: int) -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class Profiler:
+    """Collects spans as Chrome trace events"""
+
+    def __init__(self, trace_path: Path, name: str):
+        self.trace_path = trace_path
+        self.name = name
+        self.pid = os.getpid()
+        self.events: List[Dict] = []
+        self._origin = time.perf_counter()
+        self._cpu_origin = time.process_time()
+        self._free_lanes: List[int] = []
+        self._lanes = 0
+
+    def _timestamp(self, wall: float) -> float:
+        return (wall - self._origin) * 1e6
+
+    def _acquire_lane(self) -> int:
+        if self._free_lanes:
+            return heapq.heappop(self._free_lanes)
+        self._lanes += 1
+        return self._lanes
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, lane: bool, args: Dict) -> Iterator:
+        tid = self._acquire_lane() if lane else _lane.get()
+        token = _lane.set(tid)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            end, end_cpu = time.perf_counter(), time.process_time()
+            _lane.reset(token)
+            if lane:
+                heapq.heappush(self._free_lanes, tid)
+            args["cpu_ms"] = round((end_cpu - cpu) * 1e3, 3)
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": self._timestamp(wall),
+                    "dur": (end - wall) * 1e6,
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+            self.events.append(
+                {
+                    "name": "peak RSS (MB)",
+                    "ph": "C",
+                    "ts": self._timestamp(end),
+                    "pid": self.pid,
+                    "args": {"self": _rss_bytes(resource.RUSAGE_SELF) / 2**20},
+                }
+            )
+
+    def finish(self) -> None:
+        """Write the trace and print the summary"""
+        wall = time.perf_counter() - self._origin
+        cpu = time.process_time() - self._cpu_origin
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        totals = {
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "children_cpu_s": round(children.ru_utime + children.ru_stime, 3),
+            "peak_rss_mb": round(_rss_bytes(resource.RUSAGE_SELF) / 2**20, 1),
+            "children_peak_rss_mb": round(
+                _rss_bytes(resource.RUSAGE_CHILDREN) / 2**20, 1
+            ),
+        }
+        spans = [event for event in self.events if event["ph"] == "X"]
+        lanes = {event["tid"] for event in spans} | {0}
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"name": self.name if tid == 0 else f"lane {tid}"},
+            }
+            for tid in sorted(lanes)
+        ]
+        root = {
+            "name": self.name,
+            "cat": "script",
+            "ph": "X",
+            "ts": 0,
+            "dur": wall * 1e6,
+            "pid": self.pid,
+            "tid": 0,
+            "args": {**totals, "argv": sys.argv[1:]},
+        }
+        try:
+            self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.trace_path, "w") as f:
+                json.dump(
+                    {
+                        "traceEvents": [*metadata, root, *self.events],
+                        "displayTimeUnit": "ms",
+                    },
+                    f,
+                    default=str,
+                )
+            written = f"trace written to {self.trace_path}"
+        except OSError as e:
+            written = f"trace not written: {e}"
+
+        out = sys.stderr
+        print(
+            f"\n⏱️  Profile: {wall:.2f}s wall, {cpu:.2f}s CPU "
+            f"(+{totals['children_cpu_s']:.2f}s in subprocesses), "
+            f"peak RSS {totals['peak_rss_mb']:.1f} MB "
+            f"(subprocesses {totals['children_peak_rss_mb']:.1f} MB); {written}",
+            file=out,
+        )
+        by_name = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        for event in spans:
+            stats = by_name[event["cat"], event["name"]]
+            stats[0] += 1
+            stats[1] += event["dur"] / 1e6
+            stats[2] += event["args"]["cpu_ms"] / 1e3
+            stats[3] = max(stats[3], event["dur"] / 1e6)
+        if by_name:
+            print("   total s     cpu s  count     max s  span", file=out)
+        for (category, name), (count, total, span_cpu, longest) in sorted(
+            by_name.items(), key=lambda x: -x[1][1]
+        )[:TOP_SPANS]:
+            print(
+                f"  {total:8.3f}  {span_cpu:8.3f}  {count:5d}  {longest:8.3f}  "
+                f"{category}: {name}",
+                file=out,
+            )
+        slowest = sorted(spans, key=lambda event: -event["dur"])[:TOP_SPANS]
+        if slowest:
+            print("   slowest spans:", file=out)
+        for event in slowest:
+            detail = ", ".join(
+                f"{key}={value}"
+                for key, value in event["args"].items()
+                if key != "cpu_ms"
+            )
+            print(
+                f"  {event['dur'] / 1e6:8.3f}  {event['name']}"
+                + (f" ({detail})" if detail else ""),
+                file=out,
+            )
+
+
+_profiler: Optional[Profiler] = None
+
+
+def span(name: str, category: str = "phase", lane: bool = False, **args):
+    """Context manager timing a block; lane=True for blocks that run concurrently"""
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span(name, category, lane, args)
+
+
+def enabled() -> bool:
+    return _profiler is not None
+
+
+def enable(trace_path: Optional[Path] = None) -> None:
+    """Start profiling this process; the trace is written when it exits"""
+    global _profiler
+    if _profiler is not None:
+        return
+    name = Path(sys.argv[0]).stem
+    if trace_path is None:
+        trace_path = DEFAULT_TRACE_DIR / f"{name}.json"
+    _profiler = Profiler(trace_path, name)
+    atexit.register(_profiler.finish)
+
+
+def add_profile_argument(parser, subcommand: bool = False) -> None:
+    """Add --profile and --profile-output to parser
+
+    Subcommand parsers repeat the options so they can follow the subcommand;
+    there they default to unset, so they don't overwrite the main parser's.
+    """
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=argparse.SUPPRESS if subcommand else False,
+        help=(
+            "Record per-phase, per-file and per-subprocess timings; writes a "
+            f"Chrome trace (default: {DEFAULT_TRACE_DIR}/<script>.json) and "
+            "prints the slowest spans"
+        ),
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        default=argparse.SUPPRESS if subcommand else None,
+        metavar="TRACE",
+        help="Write the --profile Chrome trace here (implies --profile)",
+    )
+
+
+def enable_from_args(args) -> None:
+    if args.profile or args.profile_output:
+        enable(args.profile_output)
@@ -0,0 +1,323 @@
+"""
+Flux reconcile timeline
+Reconstructs when each Flux Kustomization and HelmRelease became Ready from a
+`kubectl get -o json` dump of their status (Ready condition transition times
+and reconcile history), splits every object's time into waiting on its
+dependsOn and its own reconcile, and traces the critical path that actually
+bounded bring-up. Kustomization dependsOn edges come from the repository, so
+the timeline is read against the graph `plan` schedules.
+"""
+
+import json
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from gitops_validation.flux_kustomizations import KustomizationSpec
+from gitops_validation.rollout_plan import parse_duration
+
+FLUX_RESOURCES = (
+    "kustomizations.kustomize.toolkit.fluxcd.io,helmreleases.helm.toolkit.fluxcd.io"
+)
+FLUX_KINDS = ("Kustomization", "HelmRelease")
+# Labels kustomize-controller sets on every object it applies
+APPLIED_BY_NAME = "kustomize.toolkit.fluxcd.io/name"
+APPLIED_BY_NAMESPACE = "kustomize.toolkit.fluxcd.io/namespace"
+# HelmRelease history snapshots that were installed successfully at some point
+DEPLOYED_STATUSES = ("deployed", "superseded")
+
+
+def _timestamp(value) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _key(kind: str, namespace: str, name: str) -> str:
+    return f"{kind}/{namespace}/{name}"
+
+
+@dataclass
+class TimelineEntry:
+    kind: str
+    namespace: str
+    name: str
+    # Epoch seconds; ready is None while the object has never been Ready
+    created: float
+    ready: Optional[float]
+    depends_on: List[str] = field(default_factory=list)
+    # Kustomization that applied this object, if any
+    applied_by: Optional[str] = None
+    revision: Optional[str] = None
+    reconciliations: int = 0
+    last_reconcile_seconds: Optional[float] = None
+    # Ready condition as "status (reason): message"
+    detail: str = ""
+    # Set by build_timeline
+    start: float = 0.0
+    gate: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return _key(self.kind, self.namespace, self.name)
+
+    @property
+    def label(self) -> str:
+        if self.kind == "Kustomization":
+            return self.name
+        return f"{self.namespace}/{self.name} (HelmRelease)"
+
+    @property
+    def waiting(self) -> float:
+        """Seconds between creation and the last dependency becoming Ready"""
+        return self.start - self.created
+
+    @property
+    def self_time(self) -> Optional[float]:
+        """Seconds from being free to reconcile until Ready"""
+        return None if self.ready is None else self.ready - self.start
+
+
+def _ready_condition(status: Dict) -> Optional[Dict]:
+    for condition in status.get("conditions") or []:
+        if condition.get("type") == "Ready":
+            return condition
+    return None
+
+
+def _first_ready(kind: str, status: Dict) -> Optional[float]:
+    """Earliest time the object is known to have been Ready
+
+    The Ready condition's lastTransitionTime moves every time it flaps, so
+    the reconcile history, which remembers the first success per revision,
+    is preferred when it reaches further back.
+    """
+    times = []
+    condition = _ready_condition(status)
+    if condition and condition.get("status") == "True":
+        times.append(_timestamp(condition.get("lastTransitionTime")))
+    for snapshot in status.get("history") or []:
+        if kind == "HelmRelease":
+            if snapshot.get("status") in DEPLOYED_STATUSES:
+                times.append(_timestamp(snapshot.get("firstDeployed")))
+        elif snapshot.get("lastReconciledStatus", "").endswith("Succeeded"):
+            times.append(_timestamp(snapshot.get("firstReconciled")))
+    times = [t for t in times if t is not None]
+    return min(times, default=None)
+
+
+def timeline_entry(obj: Dict) -> Optional[TimelineEntry]:
+    """Entry for one Kustomization/HelmRelease object, or None for other kinds"""
+    kind = obj.get("kind")
+    metadata = obj.get("metadata") or {}
+    created = _timestamp(metadata.get("creationTimestamp"))
+    if kind not in FLUX_KINDS or not metadata.get("name") or created is None:
+        return None
+    namespace = metadata.get("namespace") or "default"
+    spec = obj.get("spec") or {}
+    status = obj.get("status") or {}
+    labels = metadata.get("labels") or {}
+
+    history = status.get("history") or []
+    if kind == "HelmRelease":
+        reconciliations = len(history)
+        last_reconcile = None
+        latest = max(history, key=lambda s: s.get("lastDeployed", ""), default={})
+        revision = latest.get("chartVersion") or status.get("lastAttemptedRevision")
+    else:
+        reconciliations = sum(s.get("totalReconciliations", 1) for s in history)
+        latest = max(history, key=lambda s: s.get("lastReconciled", ""), default={})
+        try:
+            last_reconcile = parse_duration(latest["lastReconciledDuration"])
+        except (KeyError, ValueError):
+            last_reconcile = None
+        revision = status.get("lastAppliedRevision")
+
+    condition = _ready_condition(status) or {}
+    detail = str(condition.get("status", "Unknown"))
+    if condition.get("reason"):
+        detail += f" ({condition['reason']})"
+    if condition.get("message"):
+        detail += f": {condition['message']}"
+
+    applied_by = None
+    if labels.get(APPLIED_BY_NAME):
+        applied_by = _key(
+            "Kustomization",
+            labels.get(APPLIED_BY_NAMESPACE, namespace),
+            labels[APPLIED_BY_NAME],
+        )
+
+    return TimelineEntry(
+        kind=kind,
+        namespace=namespace,
+        name=metadata["name"],
+        created=created,
+        ready=_first_ready(kind, status),
+        depends_on=[
+            _key(kind, dep.get("namespace") or namespace, dep["name"])
+            for dep in spec.get("dependsOn") or []
+            if isinstance(dep, dict) and dep.get("name")
+        ],
+        applied_by=applied_by,
+        revision=revision,
+        reconciliations=reconciliations,
+        last_reconcile_seconds=last_reconcile,
+        detail=detail,
+    )
+
+
+@dataclass
+class ReconcileTimeline:
+    entries: Dict[str, TimelineEntry]
+    # Epoch seconds everything else is relative to (first object created)
+    origin: float
+    critical_path: List[str]
+    # Repository Kustomizations the dump doesn't contain
+    missing: List[str]
+
+    @property
+    def pending(self) -> List[TimelineEntry]:
+        return [entry for entry in self.entries.values() if entry.ready is None]
+
+    @property
+    def ready_seconds(self) -> float:
+        """Seconds from the first creation until the last object became Ready"""
+        return max(
+            (
+                entry.ready - self.origin
+                for entry in self.entries.values()
+                if entry.ready
+            ),
+            default=0.0,
+        )
+
+    def ordered(self) -> List[TimelineEntry]:
+        return sorted(
+            self.entries.values(),
+            key=lambda e: (e.ready is None, e.ready or 0.0, e.start, e.key),
+        )
+
+    def timings(self) -> Dict[str, float]:
+        """Measured self time per Kustomization, as `plan --timings` hints"""
+        return {
+            entry.name: round(entry.self_time, 1)
+            for entry in self.entries.values()
+            if entry.kind == "Kustomization" and entry.self_time is not None
+        }
+
+    def to_dict(self) -> Dict:
+        def relative(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value - self.origin, 3)
+
+        return {
+            "ready_seconds": round(self.ready_seconds, 3),
+            "critical_path": self.critical_path,
+            "missing": self.missing,
+            "objects": {
+                entry.key: {
+                    "created": relative(entry.created),
+                    "start": relative(entry.start),
+                    "ready": relative(entry.ready),
+                    "waiting": round(entry.waiting, 3),
+                    "self": (
+                        None if entry.self_time is None else round(entry.self_time, 3)
+                    ),
+                    "gate": entry.gate,
+                    "depends_on": entry.depends_on,
+                    "applied_by": entry.applied_by,
+                    "revision": entry.revision,
+                    "reconciliations": entry.reconciliations,
+                    "last_reconcile_seconds": entry.last_reconcile_seconds,
+                    "ready_condition": entry.detail,
+                }
+                for entry in self.ordered()
+            },
+        }
+
+
+def build_timeline(
+    objects: List[Dict], kustomizations: Dict[str, KustomizationSpec]
+) -> ReconcileTimeline:
+    """Join object status with the repository's dependsOn graph"""
+    entries: Dict[str, TimelineEntry] = {}
+    for obj in objects:
+        entry = timeline_entry(obj)
+        if entry is not None:
+            entries[entry.key] = entry
+
+    for entry in entries.values():
+        spec = kustomizations.get(entry.name)
+        if entry.kind == "Kustomization" and spec is not None:
+            entry.depends_on = [
+                _key("Kustomization", dep.namespace or entry.namespace, dep.name)
+                for dep in spec.depends_on
+            ]
+        if entry.applied_by == entry.key:
+            entry.applied_by = None
+
+        # Flux doesn't reconcile an object before all of its dependsOn are Ready
+        dependencies = [entries[dep] for dep in entry.depends_on if dep in entries]
+        blocking = max(
+            (dep for dep in dependencies if dep.ready is not None),
+            key=lambda dep: dep.ready,
+            default=None,
+        )
+        entry.start = entry.created
+        if blocking is not None and blocking.ready > entry.created:
+            entry.start, entry.gate = blocking.ready, blocking.key
+        elif entry.applied_by in entries and entries[entry.applied_by].ready:
+            # Only a parent that became Ready can have bounded this object
+            entry.gate = entry.applied_by
+        if entry.ready is not None and entry.ready < entry.start:
+            # Ready before a dependency's (later, flapping) Ready transition
+            entry.start = max(entry.created, min(entry.start, entry.ready))
+
+    critical_path: List[str] = []
+    ready = [entry for entry in entries.values() if entry.ready is not None]
+    current = max(ready, key=lambda e: (e.ready, e.key), default=None)
+    while current is not None and current.key not in critical_path:
+        critical_path.append(current.key)
+        current = entries.get(current.gate)
+    critical_path.reverse()
+
+    present = {
+        entry.name for entry in entries.values() if entry.kind == "Kustomization"
+    }
+    return ReconcileTimeline(
+        entries=entries,
+        origin=min((entry.created for entry in entries.values()), default=0.0),
+        critical_path=critical_path,
+        missing=sorted(set(kustomizations) - present),
+    )
+
+
+def load_objects(text: str) -> List[Dict]:
+    """Objects of a `kubectl get -o json` list (or a single object)"""
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("expected a Kubernetes object or List")
+    if "items" in data:
+        return [item for item in data["items"] or [] if isinstance(item, dict)]
+    return [data]
+
+
+def fetch_objects(kubectl: str = "kubectl", kubeconfig: Optional[str] = None) -> str:
+    """Live Kustomizations and HelmReleases from every namespace, as JSON"""
+    command = [kubectl]
+    if kubeconfig:
+        command.append(f"--kubeconfig={kubeconfig}")
+    command += ["get", FLUX_RESOURCES, "--all-namespaces", "-o", "json"]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ValueError(f"cannot run {kubectl}: {e}")
+    if result.returncode != 0:
+        raise ValueError(
+            result.stderr.strip() or f"{kubectl} exited {result.returncode}"
+        )
+    return result.stdout
@@ -0,0 +1,171 @@
+"""
+Flux rollout-wave planner
+Groups kustomizations into topological waves (everything in a wave can
+reconcile in parallel once earlier waves are Ready), finds the longest
+dependsOn chain and, given per-kustomization duration hints, estimates the
+critical path of a cold bootstrap.
+"""
+
+import re
+import yaml
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from dataclasses import dataclass
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value) -> float:
+    """Seconds from a number or a Go-style duration string ("90s", "1m30s")"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    parts = DURATION_PART.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        raise ValueError(f"Invalid duration: {value!r}")
+    return sum(float(n) * DURATION_UNITS[u] for n, u in parts)
+
+
+def load_duration_hints(path: Path) -> Dict[str, float]:
+    """Read a YAML/JSON mapping of kustomization name -> duration"""
+    with open(path, "r") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: timing hints must be a mapping of name -> duration")
+    return {str(name): parse_duration(value) for name, value in data.items()}
+
+
+@dataclass
+class ScheduledKustomization:
+    name: str
+    wave: int
+    duration: float
+    start: float
+    finish: float
+    slack: float
+
+
+@dataclass
+class RolloutPlan:
+    waves: List[List[str]]
+    longest_chain: List[str]
+    critical_path: List[str]
+    schedule: Dict[str, ScheduledKustomization]
+
+    @property
+    def critical_path_seconds(self) -> float:
+        return max((s.finish for s in self.schedule.values()), default=0.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "waves": self.waves,
+            "longest_chain": self.longest_chain,
+            "critical_path": {
+                "kustomizations": self.critical_path,
+                "seconds": self.critical_path_seconds,
+            },
+            "schedule": {
+                name: {
+                    "wave": s.wave + 1,
+                    "duration": s.duration,
+                    "start": s.start,
+                    "finish": s.finish,
+                    "slack": s.slack,
+                }
+                for name, s in sorted(self.schedule.items())
+            },
+        }
+
+
+def plan_rollout(
+    depends_on_map: Dict[str, Iterable[str]],
+    durations: Optional[Dict[str, float]] = None,
+    default_duration: float = 60.0,
+) -> RolloutPlan:
+    """Compute waves, longest chain and critical path; raises ValueError on cycles"""
+    durations = durations or {}
+    deps: Dict[str, List[str]] = {}
+    for name, direct in depends_on_map.items():
+        deps[name] = sorted(set(direct))
+        for dep in deps[name]:
+            deps.setdefault(dep, [])
+
+    dependents: Dict[str, List[str]] = {name: [] for name in deps}
+    remaining = {name: len(direct) for name, direct in deps.items()}
+    for name, direct in deps.items():
+        for dep in direct:
+            dependents[dep].append(name)
+
+    # Kahn's algorithm one wave at a time keeps the output deterministic
+    order: List[str] = []
+    wave_of: Dict[str, int] = {}
+    current = sorted(name for name, count in remaining.items() if count == 0)
+    waves: List[List[str]] = []
+    while current:
+        waves.append(current)
+        following = []
+        for name in current:
+            wave_of[name] = len(waves) - 1
+            order.append(name)
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    following.append(dependent)
+        current = sorted(following)
+
+    unplaced = sorted(name for name, count in remaining.items() if count > 0)
+    if unplaced:
+        raise ValueError(
+            f"Cannot plan rollout, dependency cycle involves: {', '.join(unplaced)}"
+        )
+
+    # Forward pass: earliest start/finish; remember which dependency gates each node
+    start: Dict[str, float] = {}
+    finish: Dict[str, float] = {}
+    gate_by_time: Dict[str, Optional[str]] = {}
+    gate_by_wave: Dict[str, Optional[str]] = {}
+    for name in order:
+        duration = durations.get(name, default_duration)
+        gate_by_time[name] = max(deps[name], key=lambda d: finish[d], default=None)
+        gate_by_wave[name] = max(deps[name], key=lambda d: wave_of[d], default=None)
+        start[name] = finish[gate_by_time[name]] if gate_by_time[name] else 0.0
+        finish[name] = start[name] + duration
+
+    # Backward pass: latest finish that doesn't delay the overall rollout
+    total = max(finish.values(), default=0.0)
+    latest_start: Dict[str, float] = {}
+    latest_finish: Dict[str, float] = {}
+    for name in reversed(order):
+        latest_finish[name] = min(
+            (latest_start[dependent] for dependent in dependents[name]), default=total
+        )
+        latest_start[name] = latest_finish[name] - (finish[name] - start[name])
+
+    def trace(end: Optional[str], gate: Dict[str, Optional[str]]) -> List[str]:
+        path = []
+        while end is not None:
+            path.append(end)
+            end = gate[end]
+        return list(reversed(path))
+
+    last_by_time = max(order, key=lambda n: (finish[n], n), default=None)
+    last_by_wave = max(order, key=lambda n: (wave_of[n], n), default=None)
+
+    schedule = {
+        name: ScheduledKustomization(
+            name=name,
+            wave=wave_of[name],
+            duration=finish[name] - start[name],
+            start=start[name],
+            finish=finish[name],
+            slack=latest_finish[name] - finish[name],
+        )
+        for name in order
+    }
+    return RolloutPlan(
+        waves=waves,
+        longest_chain=trace(last_by_wave, gate_by_wave),
+        critical_path=trace(last_by_time, gate_by_time),
+        schedule=schedule,
+    )
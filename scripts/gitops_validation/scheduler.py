@@ -0,0 +1,97 @@
+"""
+Bounded subprocess scheduler
+Runs build jobs through a fixed-size worker pool, longest-first according to
+durations recorded on earlier runs, so the slowest builds never start last.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+DEFAULT_HISTORY_PATH = Path(".cache/gitops-validation/build-durations.json")
+
+# Weight of the newest sample in the moving average of build durations
+SMOOTHING = 0.5
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class DurationHistory:
+    """Smoothed per-build durations persisted between runs"""
+
+    def __init__(self, path: Path = DEFAULT_HISTORY_PATH):
+        self.path = path
+        self.durations: Dict[str, float] = {}
+        try:
+            with open(path, "r") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self.durations = {
+                    str(k): float(v)
+                    for k, v in loaded.items()
+                    if isinstance(v, (int, float))
+                }
+        except (OSError, ValueError):
+            pass
+
+    def estimate(self, key: str) -> Optional[float]:
+        return self.durations.get(key)
+
+    def record(self, key: str, seconds: float) -> None:
+        previous = self.durations.get(key)
+        if previous is None:
+            self.durations[key] = seconds
+        else:
+            self.durations[key] = SMOOTHING * seconds + (1 - SMOOTHING) * previous
+
+    def longest_first(self, keys: Iterable[str]) -> List[str]:
+        """Order keys slowest first; never-seen builds go first as they may be slow"""
+        return sorted(
+            keys,
+            key=lambda k: (
+                self.estimate(k) is not None,
+                -(self.estimate(k) or 0.0),
+                k,
+            ),
+        )
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.durations, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError:
+            # History only affects scheduling order, never results
+            pass
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+async def run_bounded(
+    items: Iterable[T], worker: Callable[[T], Awaitable[R]], jobs: int
+) -> List[R]:
+    """Run worker over items in order with at most `jobs` running at once"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    results: List[R] = []
+
+    async def drain() -> None:
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.append(await worker(item))
+
+    await asyncio.gather(*(drain() for _ in range(max(1, jobs))))
+    return results
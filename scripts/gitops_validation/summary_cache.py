@@ -0,0 +1,127 @@
+"""
+Persistent content-hash cache of parsed YAML
+Validators only need a compact summary of each document (kind, apiVersion,
+metadata.name/namespace and a few spec fields), so that summary is what gets
+cached under .cache/, keyed by a hash of the source text. Changed content gets
+a new key, so stale entries are never read; least recently used entries are
+evicted once the cache grows past its entry limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import yaml
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from gitops_validation.header_scan import scan_summaries
+from gitops_validation.profiling import span
+
+# Bump when the summary format changes so old entries are ignored
+SUMMARY_FORMAT = 1
+
+DEFAULT_CACHE_DIR = Path(".cache/gitops-validation/summaries")
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class SummaryCache:
+    """On-disk cache of scan_summaries() results keyed by content hash"""
+
+    # Mixed into every key; subclasses caching other parse results override it
+    FORMAT = SUMMARY_FORMAT
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        enabled: bool = True,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, text: str) -> Path:
+        digest = hashlib.blake2b(
+            f"{self.FORMAT}\0{text}".encode(), digest_size=20
+        ).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def summarize(self, text: str) -> Tuple[List[Optional[Dict]], Optional[str]]:
+        """Return (summaries, parse error) for a YAML stream, parsing only on a miss"""
+        if not self.enabled:
+            with span(type(self).__name__, "parse", bytes=len(text)):
+                return self._parse(text)
+
+        entry = self._entry_path(text)
+        try:
+            with open(entry, "r") as f:
+                cached = json.load(f)
+            os.utime(entry)  # mark as recently used for LRU eviction
+            self.hits += 1
+            return cached["documents"], cached["error"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        self.misses += 1
+        with span(type(self).__name__, "parse", bytes=len(text)):
+            documents, error = self._parse(text)
+        self._store(entry, {"documents": documents, "error": error})
+        return documents, error
+
+    def summarize_file(self, path: Path) -> Tuple[List[Optional[Dict]], Optional[str]]:
+        try:
+            text = path.read_text()
+        except (OSError, UnicodeDecodeError) as e:
+            return [], str(e)
+        return self.summarize(text)
+
+    @staticmethod
+    def _parse(text: str) -> Tuple[List[Optional[Dict]], Optional[str]]:
+        try:
+            return scan_summaries(text), None
+        except yaml.YAMLError as e:
+            return [], str(e)
+
+    def _store(self, entry: Path, payload: Dict) -> None:
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            # Atomic replace so concurrently running hooks never see partial entries
+            fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f, default=str)
+            os.replace(tmp, entry)
+        except (OSError, TypeError, ValueError):
+            # Caching is best-effort; validation results never depend on it
+            pass
+
+    def evict(self) -> int:
+        """Drop least recently used entries beyond max_entries"""
+        if not self.enabled or not self.cache_dir.is_dir():
+            return 0
+
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return 0
+
+        entries.sort()
+        removed = 0
+        for _, path in entries[:excess]:
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,160 @@
+"""
+Manifest tree watcher
+Reports files created, modified, moved or deleted below a root directory.
+Uses Linux inotify through ctypes (no extra dependencies) with one watch per
+directory, and falls back to polling mtimes where inotify is unavailable.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _walk_files(directory: Path) -> Set[Path]:
+    return {path for path in directory.rglob("*") if path.is_file()}
+
+
+class InotifyWatcher:
+    """Recursive inotify watch; fileno() can be registered with an event loop"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._directories: Dict[int, Path] = {}
+        self._watch_tree(root)
+
+    def _watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return  # removed before we got to it
+            raise OSError(err, os.strerror(err), str(directory))
+        self._directories[wd] = directory
+
+    def _watch_tree(self, directory: Path) -> None:
+        self._watch(directory)
+        for path in directory.rglob("*"):
+            if path.is_dir():
+                self._watch(path)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def changes(self) -> Set[Path]:
+        """Drain pending events without blocking; returns changed file paths"""
+        changed: Set[Path] = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; report everything so callers rescan
+                    changed |= _walk_files(self.root)
+                    continue
+                if mask & IN_IGNORED:
+                    self._directories.pop(wd, None)
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None or not name:
+                    continue
+
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # New or moved-in directory: watch it and report its files
+                        self._watch_tree(path)
+                        changed |= _walk_files(path)
+                    else:
+                        # Deleted or moved-out directory: callers drop what was below it
+                        changed.add(path)
+                else:
+                    changed.add(path)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback that compares file mtimes and sizes on every changes() call"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for path in _walk_files(self.root):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def fileno(self) -> Optional[int]:
+        return None
+
+    def changes(self) -> Set[Path]:
+        current = self._scan()
+        changed = {
+            path
+            for path in current.keys() | self._snapshot.keys()
+            if current.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(root: Path):
+    """inotify where the platform supports it, mtime polling otherwise"""
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError):
+        return PollingWatcher(root)
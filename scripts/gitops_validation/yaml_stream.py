@@ -0,0 +1,70 @@
+"""
+Streaming YAML document splitting
+Splits a multi-document YAML stream into per-document text as it arrives, so
+build output can be analysed one document at a time instead of buffered whole.
+kustomize and flux always emit documents at column 0, so a line consisting of
+"---" (or a "..." end marker) at column 0 always separates documents.
+"""
+
+import asyncio
+from typing import AsyncIterator, Iterable, Iterator, List
+
+# Longest single line accepted from build output (inlined JSON dashboards etc.)
+STREAM_LINE_LIMIT = 16 * 1024 * 1024
+
+
+def _is_separator(line: str) -> bool:
+    stripped = line.rstrip("\r\n")
+    return (
+        stripped == "---"
+        or stripped.startswith("--- ")
+        or stripped.startswith("---\t")
+        or stripped == "..."
+    )
+
+
+class DocumentSplitter:
+    """Incrementally turns lines into complete YAML document texts"""
+
+    def __init__(self):
+        self._lines: List[str] = []
+
+    def feed(self, line: str) -> Iterator[str]:
+        if _is_separator(line):
+            yield from self._flush()
+            # "--- value" carries content on the separator line itself
+            rest = line.rstrip("\r\n")[3:].strip()
+            if rest:
+                self._lines.append(rest + "\n")
+        else:
+            self._lines.append(line)
+
+    def close(self) -> Iterator[str]:
+        yield from self._flush()
+
+    def _flush(self) -> Iterator[str]:
+        text = "".join(self._lines)
+        self._lines = []
+        if text.strip():
+            yield text
+
+
+def iter_documents(lines: Iterable[str]) -> Iterator[str]:
+    """Yield document texts from an iterable of lines (file, pipe, list)"""
+    splitter = DocumentSplitter()
+    for line in lines:
+        yield from splitter.feed(line)
+    yield from splitter.close()
+
+
+async def aiter_documents(reader: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Yield document texts from an asyncio subprocess pipe as they arrive"""
+    splitter = DocumentSplitter()
+    while True:
+        raw = await reader.readline()
+        if not raw:
+            break
+        for document in splitter.feed(raw.decode()):
+            yield document
+    for document in splitter.close():
+        yield document
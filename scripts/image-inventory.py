@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Container image inventory and Harbor prewarm list
+Builds every kustomization in parallel and collects the container images of
+the rendered output, HelmRelease values and charts/*/values.yaml into one
+deduplicated inventory (registry, repository, tag/digest and the workloads
+using each image).
+
+--prewarm writes the images as Harbor pull-through references, one per line,
+so a cold cluster's images can be pulled into the cache in parallel before
+rollout instead of serializing on upstream registries, e.g.:
+
+    scripts/image-inventory.py --prewarm prewarm.txt
+    xargs -P 8 -n 1 docker pull < prewarm.txt
+"""
+
+import asyncio
+import json
+import sys
+import textwrap
+from pathlib import Path
+import argparse
+
+from gitops_validation.crd_schemas import CHART_ROOT
+from gitops_validation.images import (
+    HARBOR_REGISTRY,
+    ImageInventory,
+    ImageScanCache,
+)
+from gitops_validation.kustomize_build import find_kustomizations, run_kustomize_builds
+from gitops_validation.kustomize_graph import KUSTOMIZATION_FILE, KustomizeGraph
+from gitops_validation.profiling import add_profile_argument, enable_from_args, span
+from gitops_validation.scheduler import default_jobs
+from gitops_validation.summary_cache import SummaryCache
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Inventory container images and write a Harbor prewarm list"
+    )
+    parser.add_argument(
+        "--root", default="k8s/", help="Root directory to search for kustomizations"
+    )
+    parser.add_argument(
+        "--charts",
+        type=Path,
+        default=CHART_ROOT,
+        help="Directory of local helm charts (default: charts)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["human", "json"],
+        default="human",
+        help="Print a summary (human) or the full inventory (json)",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="Also write the full inventory as JSON to a file"
+    )
+    parser.add_argument(
+        "--prewarm",
+        type=Path,
+        help="Write Harbor pull-through references, one per line, to a file",
+    )
+    parser.add_argument(
+        "--harbor",
+        default=HARBOR_REGISTRY,
+        help=f"Harbor registry host (default: {HARBOR_REGISTRY})",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=default_jobs(),
+        help="Maximum concurrent kustomize builds (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="Seconds before a single kustomize build is killed",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore .cache/: always run kustomize and re-scan its output",
+    )
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+    cache = SummaryCache(enabled=not args.no_cache)
+    scan_cache = ImageScanCache(enabled=not args.no_cache)
+
+    root = Path(args.root)
+    kustomizations = find_kustomizations(root.rglob(KUSTOMIZATION_FILE))
+    if not kustomizations:
+        print(f"No kustomizations found in {root}", file=sys.stderr)
+        return 1
+
+    # Parent kustomizations re-render their children; users dedupe by identity
+    inventory = ImageInventory(args.charts)
+    parse_errors = []
+
+    def scan(text: str, kustomization: Path) -> None:
+        entries, error = scan_cache.summarize(text)
+        if error is not None:
+            parse_errors.append(f"{kustomization.parent}: {error}")
+        inventory.add_scan(entries, str(kustomization.parent))
+
+    run = await run_kustomize_builds(
+        kustomizations,
+        KustomizeGraph.build(kustomizations),
+        cache,
+        args.jobs,
+        args.timeout,
+        use_build_cache=not args.no_cache,
+        on_document=scan,
+    )
+    with span("merge chart values"):
+        inventory.finish()
+    cache.evict()
+    scan_cache.evict()
+
+    if args.output:
+        args.output.write_text(json.dumps(inventory.to_dict(args.harbor), indent=2))
+    prewarm = inventory.prewarm(args.harbor)
+    if args.prewarm:
+        args.prewarm.write_text("".join(f"{reference}\n" for reference in prewarm))
+
+    if args.format == "json":
+        print(json.dumps(inventory.to_dict(args.harbor), indent=2))
+    else:
+        users = {user for entry in inventory.images.values() for user in entry.users}
+        print(
+            f"📦 {len(inventory.images)} images from {len(inventory.by_registry)} "
+            f"registries, used by {len(users)} workloads "
+            f"({len(kustomizations)} kustomizations in {run.wall_time:.2f}s)"
+        )
+        for registry, refs in sorted(
+            inventory.by_registry.items(), key=lambda x: -len(x[1])
+        ):
+            print(f"   {registry}: {len(refs)}")
+        untagged = [ref for ref in inventory.images if not ref.tag and not ref.digest]
+        if untagged:
+            print(f"⚠️  {len(untagged)} images without a tag (pulled as latest):")
+            for ref in sorted(untagged):
+                print(f"  {ref}")
+        if inventory.uncached:
+            print(
+                f"⚠️  {len(inventory.uncached)} images from registries Harbor doesn't proxy:"
+            )
+            for ref in inventory.uncached:
+                print(f"  {ref}")
+        if inventory.unresolved:
+            print(
+                f"⚠️  {len(inventory.unresolved)} image references could not be resolved:"
+            )
+            for reference, users in sorted(inventory.unresolved.items()):
+                print(f"  {reference}: {', '.join(sorted(users))}")
+        if inventory.remote_charts:
+            print(
+                f"ℹ️  {len(inventory.remote_charts)} HelmReleases use remote charts; "
+                "only images set in their values are included"
+            )
+        if args.prewarm:
+            print(f"✅ Wrote {len(prewarm)} Harbor references to {args.prewarm}")
+
+    if parse_errors:
+        print(
+            f"❌ Failed to parse output of {len(parse_errors)} documents:",
+            file=sys.stderr,
+        )
+        for error in parse_errors:
+            print(f"  {error}", file=sys.stderr)
+    if run.failed:
+        # The inventory is missing whatever the failed builds render
+        print(
+            f"❌ kustomize build failed for {len(run.failed)} kustomizations:",
+            file=sys.stderr,
+        )
+        for kustomization, error in run.failed:
+            print(f"  {kustomization.parent}:", file=sys.stderr)
+            print(textwrap.indent(error.strip(), "    "), file=sys.stderr)
+    return 1 if run.failed or parse_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
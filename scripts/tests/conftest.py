@@ -0,0 +1,58 @@
+"""
+Shared test setup
+Puts scripts/ on the import path so gitops_validation imports like it does in
+the scripts themselves, loads the dash-named scripts as modules, and points
+the offline kubectl/ssh/pvesm stand-ins in stubs/ at per-test scenarios.
+"""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+STUBS = Path(__file__).resolve().parent / "stubs"
+sys.path.insert(0, str(SCRIPTS))
+
+
+def load_script(path: Path):
+    """Import a script such as validate-dependencies.py as a module"""
+    name = path.stem.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fixtures() -> Path:
+    return FIXTURES
+
+
+class FakeKubectl:
+    """Scenario for stubs/kubectl; see that script for the rule format"""
+
+    path = str(STUBS / "kubectl")
+
+    def __init__(self, scenario: Path):
+        self.scenario = scenario
+
+    def serve(self, *rules: dict) -> None:
+        self.scenario.write_text(json.dumps(list(rules)))
+
+    @property
+    def requests(self) -> List[str]:
+        log = Path(f"{self.scenario}.log")
+        return log.read_text().splitlines() if log.exists() else []
+
+
+@pytest.fixture
+def fake_kubectl(tmp_path, monkeypatch) -> FakeKubectl:
+    scenario = tmp_path / "kubectl-scenario.json"
+    monkeypatch.setenv("FAKE_KUBECTL_SCENARIO", str(scenario))
+    return FakeKubectl(scenario)
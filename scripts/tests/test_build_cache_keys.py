@@ -0,0 +1,116 @@
+import textwrap
+
+import pytest
+
+from gitops_validation.build_cache import InputHasher
+from gitops_validation.kustomize_graph import KUSTOMIZATION_FILE, KustomizeGraph
+
+KUSTOMIZATION = """
+resources:
+  - deployment.yaml
+transformers:
+  - labels.yaml
+generators:
+  - generator.yaml
+validators:
+  - validator.yaml
+configurations:
+  - name-reference.yaml
+replacements:
+  - path: replacement.yaml
+openapi:
+  path: schema.json
+helmGlobals:
+  chartHome: vendor
+helmCharts:
+  - name: local
+    valuesFile: values.yaml
+    additionalValuesFiles:
+      - values-extra.yaml
+"""
+
+INPUTS = [
+    "deployment.yaml",
+    "labels.yaml",
+    "generator.yaml",
+    "validator.yaml",
+    "name-reference.yaml",
+    "replacement.yaml",
+    "schema.json",
+    "vendor/local/Chart.yaml",
+    "values.yaml",
+    "values-extra.yaml",
+]
+
+
+def write(root, kustomization: str, files=()):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / KUSTOMIZATION_FILE).write_text(textwrap.dedent(kustomization))
+    for name in files:
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(f"# {name}\n")
+    return root / KUSTOMIZATION_FILE
+
+
+def key(kustomization_file):
+    root = kustomization_file.parent.parent
+    graph = KustomizeGraph.build(root.rglob(KUSTOMIZATION_FILE))
+    return InputHasher(graph).key(kustomization_file, "salt")
+
+
+@pytest.mark.parametrize("changed", INPUTS)
+def test_every_file_bearing_field_is_hashed(tmp_path, changed):
+    kustomization_file = write(tmp_path / "app", KUSTOMIZATION, INPUTS)
+    before = key(kustomization_file)
+
+    (tmp_path / "app" / changed).write_text("# edited\n")
+
+    assert key(kustomization_file) not in (None, before)
+
+
+def test_nested_kustomization_inputs_are_hashed(tmp_path):
+    write(tmp_path / "base", "transformers:\n  - labels.yaml\n", ["labels.yaml"])
+    overlay = write(tmp_path / "overlay", "resources:\n  - ../base\n")
+    before = key(overlay)
+
+    (tmp_path / "base" / "labels.yaml").write_text("# edited\n")
+
+    assert key(overlay) != before
+
+
+@pytest.mark.parametrize(
+    "kustomization",
+    [
+        "resources:\n  - https://github.com/example/app//deploy?ref=main\n",
+        "helmCharts:\n  - name: app\n    repo: https://charts.example.com\n",
+        "transformers:\n  - |\n    apiVersion: builtin\n    kind: LabelTransformer\n",
+        "generators:\n  - apiVersion: builtin\n    kind: ConfigMapGenerator\n",
+    ],
+)
+def test_builds_with_unhashable_inputs_are_not_cached(tmp_path, kustomization):
+    write(tmp_path / "base", kustomization)
+    overlay = write(tmp_path / "overlay", "resources:\n  - ../base\n")
+
+    assert key(tmp_path / "base" / KUSTOMIZATION_FILE) is None
+    assert key(overlay) is None
+
+
+@pytest.mark.parametrize(
+    "changed", ["vendor/local/Chart.yaml", "vendor/local/templates/x.yaml"]
+)
+def test_changes_inside_referenced_directories_are_affected(tmp_path, changed):
+    kustomization_file = write(tmp_path / "app", KUSTOMIZATION, INPUTS)
+    overlay = write(tmp_path / "overlay", "resources:\n  - ../app\n")
+    graph = KustomizeGraph.build(tmp_path.rglob(KUSTOMIZATION_FILE))
+
+    affected = graph.affected([tmp_path / "app" / changed])
+
+    assert affected == {kustomization_file.resolve(), overlay.resolve()}
+
+
+def test_unreferenced_files_beside_a_kustomization_are_not_affected(tmp_path):
+    write(tmp_path / "app", KUSTOMIZATION, INPUTS)
+    write(tmp_path / "overlay", "resources:\n  - ../app\n")
+    graph = KustomizeGraph.build(tmp_path.rglob(KUSTOMIZATION_FILE))
+
+    assert graph.affected([tmp_path / "app" / "notes.txt"]) == set()
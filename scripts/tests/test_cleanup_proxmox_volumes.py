@@ -0,0 +1,177 @@
+import json
+import shutil
+
+import pytest
+
+from conftest import FIXTURES, SCRIPTS, STUBS, FakeKubectl, load_script
+
+cleanup = load_script(
+    SCRIPTS.parent / "terraform/01-infrastructure/scripts/cleanup-proxmox-volumes.py"
+)
+
+SSH = str(STUBS / "ssh")
+
+
+def volume(suffix: str) -> str:
+    return f"local:9999/vm-9999-pvc-0a1b2c3d-0000-4000-8000-00000000000{suffix}.raw"
+
+
+@pytest.fixture
+def proxmox(tmp_path, monkeypatch):
+    """Fake Proxmox host storage, seeded from fixtures/proxmox"""
+    storage = tmp_path / "proxmox"
+    shutil.copytree(FIXTURES / "proxmox", storage)
+    monkeypatch.setenv("FAKE_PVESM_DIR", str(storage))
+    monkeypatch.delenv("FAKE_PVESM_FAIL", raising=False)
+    monkeypatch.delenv("FAKE_SSH_DOWN", raising=False)
+    return storage
+
+
+def freed(storage) -> list:
+    log = storage / "freed.log"
+    return sorted(log.read_text().split()) if log.exists() else []
+
+
+def test_bulk_free_reports_partial_failure(proxmox, monkeypatch):
+    volumes = [volume(s) for s in "abcd"]
+    monkeypatch.setenv("FAKE_PVESM_FAIL", volume("b"))
+
+    results = cleanup.delete_volumes("root@atlas", volumes, jobs=2, ssh=SSH)
+
+    assert results[volume("b")] == (False, f"can't free {volume('b')}: volume is busy")
+    assert {v: ok for v, (ok, _) in results.items()} == {
+        volume("a"): True,
+        volume("b"): False,
+        volume("c"): True,
+        volume("d"): True,
+    }
+    assert freed(proxmox) == sorted([volume("a"), volume("c"), volume("d")])
+
+
+def test_bulk_free_with_ssh_down_fails_every_volume(proxmox, monkeypatch):
+    monkeypatch.setenv("FAKE_SSH_DOWN", "1")
+
+    results = cleanup.delete_volumes("root@atlas", [volume("a"), volume("c")], ssh=SSH)
+
+    assert all(not ok and "Connection refused" in msg for ok, msg in results.values())
+    assert freed(proxmox) == []
+
+
+def test_storage_inventory_in_one_listing(proxmox):
+    inventory = cleanup.list_storage_volumes("root@atlas", ["local"], ssh=SSH)
+
+    assert volume("a") in inventory
+    assert "local:100/vm-100-disk-0.raw" in inventory
+    with pytest.raises(cleanup.StorageUnavailable, match="does not exist"):
+        cleanup.list_storage_volumes("root@atlas", ["local", "ceph"], ssh=SSH)
+
+
+def pages(*names: str) -> list:
+    return [
+        {"body": json.loads((FIXTURES / "pvs" / name).read_text())} for name in names
+    ]
+
+
+def inventory(**kwargs):
+    return cleanup.PVInventory(
+        "kubeconfig", kubectl=FakeKubectl.path, sleep=lambda _: None, **kwargs
+    )
+
+
+def test_pv_pages_follow_continue_and_retry(fake_kubectl):
+    transient = {"stderr": "Unable to connect to the server: EOF", "exit": 1}
+    fake_kubectl.serve(
+        {
+            "match": "continue=page-2-token",
+            "replies": [transient, *pages("page-2.json")],
+        },
+        {"match": "persistentvolumes", "replies": pages("page-1.json")},
+    )
+    pvs = inventory(page_limit=2)
+
+    volumes = cleanup.collect_volumes(pvs)
+
+    assert volumes.retained == [volume("a"), volume("c")]
+    assert volumes.referenced == {volume("a"), volume("b"), volume("c")}
+    assert pvs.pages == 2
+    assert [
+        ("continue=" in url, "limit=2" in url) for url in fake_kubectl.requests
+    ] == [
+        (False, True),
+        (True, True),
+        (True, True),
+    ]
+
+
+def test_expired_continue_token_relists_without_duplicates(fake_kubectl):
+    expired = {
+        "stderr": "Error from server (Expired): continue parameter is too old",
+        "exit": 1,
+    }
+    fake_kubectl.serve(
+        {"match": "continue=", "replies": [expired, *pages("page-2.json")]},
+        {"match": "persistentvolumes", "replies": pages("page-1.json")},
+    )
+
+    names = [pv["metadata"]["name"] for pv in inventory()]
+
+    assert names == ["pvc-a", "pvc-b", "pvc-c", "nfs-data"]
+    assert len(fake_kubectl.requests) == 4
+
+
+def test_no_volumes_is_not_api_down(fake_kubectl):
+    fake_kubectl.serve({"match": "persistentvolumes", "replies": pages("empty.json")})
+    assert cleanup.collect_volumes(inventory()) == ([], set())
+
+    fake_kubectl.serve(
+        {
+            "match": "persistentvolumes",
+            "replies": [{"stderr": "Unable to connect to the server", "exit": 1}],
+        }
+    )
+    with pytest.raises(cleanup.InventoryUnavailable, match="Unable to connect"):
+        list(inventory(attempts=3))
+    # Two retries after the first attempt, then it gives up
+    assert len(fake_kubectl.requests) == 1 + 3
+
+
+def test_permanent_errors_are_not_retried(fake_kubectl):
+    fake_kubectl.serve(
+        {
+            "match": "persistentvolumes",
+            "replies": [
+                {"stderr": "error: You must be logged in (Unauthorized)", "exit": 1}
+            ],
+        }
+    )
+    with pytest.raises(cleanup.InventoryUnavailable, match="Unauthorized"):
+        list(inventory())
+    assert len(fake_kubectl.requests) == 1
+
+
+@pytest.mark.parametrize(
+    "flags, expected_delete",
+    [([], ["a", "c"]), (["--reconcile"], ["d"])],
+)
+def test_report_prints_only_json(
+    fake_kubectl, proxmox, monkeypatch, capsys, flags, expected_delete
+):
+    fake_kubectl.serve(
+        {"match": "continue=", "replies": pages("page-2.json")},
+        {"match": "persistentvolumes", "replies": pages("page-1.json")},
+    )
+    monkeypatch.setattr(
+        "sys.argv",
+        ["cleanup-proxmox-volumes.py", "--report", "--ssh", SSH]
+        + ["--kubectl", FakeKubectl.path, *flags],
+    )
+
+    assert cleanup.main() == 0
+
+    captured = capsys.readouterr()
+    report = json.loads(captured.out)
+    assert report["delete"] == [volume(s) for s in expected_delete]
+    # The young orphan is reported but left alone
+    assert report["orphans"] == [volume("d"), volume("e")]
+    assert "🧹" in captured.err
+    assert freed(proxmox) == []
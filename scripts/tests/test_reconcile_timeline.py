@@ -0,0 +1,36 @@
+import json
+
+from conftest import SCRIPTS, load_script
+from gitops_validation.reconcile_timeline import build_timeline, load_objects
+
+BROKEN = "timeline-broken-bringup.json"
+APPS = "Kustomization/flux-system/apps"
+WEB = "HelmRelease/apps/web"
+
+
+def broken_timeline(fixtures):
+    return build_timeline(load_objects((fixtures / BROKEN).read_text()), {})
+
+
+def test_never_ready_parent_is_not_a_gate(fixtures):
+    timeline = broken_timeline(fixtures)
+
+    assert timeline.entries[WEB].gate is None
+    assert timeline.critical_path == [WEB]
+    assert timeline.ready_seconds == 70
+    assert {entry.key for entry in timeline.pending} == {
+        APPS,
+        "HelmRelease/apps/worker",
+    }
+    assert json.loads(json.dumps(timeline.to_dict()))["critical_path"] == [WEB]
+
+
+def test_print_timeline_with_never_ready_objects(fixtures, capsys):
+    validate_dependencies = load_script(SCRIPTS / "validate-dependencies.py")
+
+    validate_dependencies.print_timeline(broken_timeline(fixtures))
+
+    output = capsys.readouterr().out
+    assert "0 Kustomizations and 1 HelmReleases Ready after 70s" in output
+    assert "2 objects have never been Ready" in output
+    assert "HealthCheckFailed" in output
@@ -0,0 +1,111 @@
+from pathlib import Path
+
+from conftest import SCRIPTS
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.summary_cache import SummaryCache
+
+MANIFESTS = {
+    "apps/kustomization.yaml": (
+        "apiVersion: kustomize.config.k8s.io/v1beta1\n"
+        "kind: Kustomization\n"
+        "resources:\n  - deployment.yaml\n"
+    ),
+    "apps/deployment.yaml": (
+        "apiVersion: apps/v1\nkind: Deployment\n"
+        "metadata:\n  name: web\n  namespace: apps\n"
+        "spec:\n  replicas: 2\n"
+        "---\n"
+        "apiVersion: v1\nkind: Service\n"
+        "metadata:\n  name: web\n  namespace: apps\n"
+        "---\n"
+    ),
+    "apps/empty.yaml": "",
+    "apps/broken.yaml": "kind: ConfigMap\nmetadata: [unterminated\n",
+}
+
+
+def write_tree(root: Path) -> Path:
+    for name, text in MANIFESTS.items():
+        path = root / "k8s" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root / "k8s"
+
+
+def snapshot(index: ManifestIndex):
+    return (
+        [(d.path, d.position, d.doc) for d in index.documents],
+        {path: bool(error) for path, error in index.errors.items()},
+        index.files,
+    )
+
+
+def test_warm_cache_matches_cold_run(tmp_path):
+    root = write_tree(tmp_path)
+    cache_dir = tmp_path / "cache"
+
+    cold_cache = SummaryCache(cache_dir)
+    cold = ManifestIndex.build(root, cold_cache)
+    warm_cache = SummaryCache(cache_dir)
+    warm = ManifestIndex.build(root, warm_cache)
+
+    assert snapshot(warm) == snapshot(cold)
+    assert snapshot(cold) == snapshot(ManifestIndex.build(root))
+    assert (cold_cache.hits, cold_cache.misses) == (0, len(MANIFESTS))
+    assert (warm_cache.hits, warm_cache.misses) == (len(MANIFESTS), 0)
+    assert [d.name for d in warm.find("Deployment")] == ["web"]
+    assert root / "apps/broken.yaml" in warm.errors
+
+
+def test_repository_manifests_warm_matches_cold(tmp_path):
+    root = SCRIPTS.parent / "k8s"
+    cold = ManifestIndex.build(root, SummaryCache(tmp_path))
+    warm_cache = SummaryCache(tmp_path)
+    warm = ManifestIndex.build(root, warm_cache)
+
+    assert snapshot(warm) == snapshot(cold)
+    assert warm_cache.misses == 0
+
+
+def test_edited_file_is_parsed_again(tmp_path):
+    root = write_tree(tmp_path)
+    cache_dir = tmp_path / "cache"
+    ManifestIndex.build(root, SummaryCache(cache_dir))
+
+    deployment = root / "apps/deployment.yaml"
+    deployment.write_text(deployment.read_text().replace("name: web", "name: api", 1))
+    cache = SummaryCache(cache_dir)
+    index = ManifestIndex.build(root, cache)
+
+    assert (cache.hits, cache.misses) == (len(MANIFESTS) - 1, 1)
+    assert [d.name for d in index.find("Deployment")] == ["api"]
+
+
+def test_disabled_cache_neither_reads_nor_writes(tmp_path):
+    root = write_tree(tmp_path)
+    cache_dir = tmp_path / "cache"
+    ManifestIndex.build(root, SummaryCache(cache_dir))
+    entries = sorted(cache_dir.rglob("*.json"))
+
+    # Poison every entry: a disabled cache must not serve them
+    for entry in entries:
+        entry.write_text('{"documents": [], "error": "poisoned"}')
+    cache = SummaryCache(cache_dir, enabled=False)
+    index = ManifestIndex.build(root, cache)
+
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert snapshot(index) == snapshot(ManifestIndex.build(root))
+    assert sorted(cache_dir.rglob("*.json")) == entries
+
+
+def test_parse_errors_reported_for_prefixed_flux_kustomizations(tmp_path, capsys):
+    root = tmp_path / "k8s"
+    (root / "metallb").mkdir(parents=True)
+    (root / "metallb/config-flux-kustomization.yaml").write_text("spec: [broken\n")
+    (root / "metallb/values.yaml").write_text("key: [broken\n")
+
+    ManifestIndex.build(root).report_errors("flux-kustomization.yaml")
+
+    err = capsys.readouterr().err
+    assert "config-flux-kustomization.yaml" in err
+    assert "values.yaml" not in err
@@ -0,0 +1,122 @@
+import asyncio
+
+from conftest import SCRIPTS, FakeKubectl, load_script
+
+wait_ready = load_script(SCRIPTS / "wait-ready.py")
+
+
+def node(name: str, ready: bool, version: str) -> dict:
+    return {
+        "metadata": {"name": name, "resourceVersion": version},
+        "status": {
+            "conditions": [{"type": "Ready", "status": "True" if ready else "False"}]
+        },
+    }
+
+
+def deployment(generation: int, observed: int, version: str) -> dict:
+    return {
+        "metadata": {
+            "namespace": "authentik-system",
+            "name": "authentik",
+            "generation": generation,
+            "resourceVersion": version,
+        },
+        "status": {
+            "observedGeneration": observed,
+            "conditions": [
+                {
+                    "type": "Available",
+                    "status": "True",
+                    "reason": "MinimumReplicasAvailable",
+                }
+            ],
+        },
+    }
+
+
+def events(*pairs) -> dict:
+    return {"events": [{"type": kind, "object": obj} for kind, obj in pairs]}
+
+
+def wait(*specs: str, timeout: float = 10):
+    conditions = [wait_ready.parse_condition(spec) for spec in specs]
+    waiter = wait_ready.ReadinessWaiter(conditions, kubectl=FakeKubectl.path)
+    return conditions, asyncio.run(waiter.wait(timeout))
+
+
+def test_410_gone_relists_from_scratch(fake_kubectl):
+    gone = {"kind": "Status", "code": 410, "message": "too old resource version"}
+    fake_kubectl.serve(
+        {
+            "match": "/api/v1/nodes",
+            "replies": [
+                events(
+                    ("ADDED", node("n0", True, "1")),
+                    ("ADDED", node("removed", True, "2")),
+                    ("ERROR", gone),
+                ),
+                # The relist no longer has "removed"; it must not still count
+                events(
+                    ("ADDED", node("n0", True, "7")), ("ADDED", node("n1", True, "8"))
+                ),
+                events(("MODIFIED", node("n2", True, "9"))),
+            ],
+        }
+    )
+
+    (nodes,), pending = wait("nodes=3")
+
+    assert pending == []
+    assert nodes.detail == "3/3 nodes Ready (3 nodes)"
+    requests = fake_kubectl.requests
+    assert ["resourceVersion=" in url for url in requests] == [False, False, True]
+    assert "resourceVersion=8" in requests[2]
+
+
+def test_ready_only_counts_for_the_observed_generation(fake_kubectl):
+    fake_kubectl.serve(
+        {
+            "match": "/apis/apps/v1/deployments",
+            "replies": [
+                events(("ADDED", deployment(3, 2, "10"))),
+                events(("MODIFIED", deployment(3, 3, "11"))),
+            ],
+        }
+    )
+
+    (condition,), pending = wait("deployment/authentik-system/authentik")
+
+    assert pending == []
+    # The stale Available=True at generation 2 didn't end the first watch
+    assert len(fake_kubectl.requests) == 2
+    assert "resourceVersion=10" in fake_kubectl.requests[1]
+    assert condition.detail == "Available=True (MinimumReplicasAvailable)"
+
+
+def test_stale_generation_is_not_ready():
+    condition = wait_ready.parse_condition("deployment/authentik-system/authentik")
+
+    assert not condition.observe("ADDED", deployment(3, 2, "10"))
+    assert condition.detail == "generation 3 not observed yet"
+    assert condition.observe("MODIFIED", deployment(3, 3, "11"))
+
+
+def test_timeout_reports_pending_conditions_with_last_error(fake_kubectl):
+    missing_crd = (
+        "Error from server (NotFound): the server could not find the requested resource"
+    )
+    fake_kubectl.serve(
+        {
+            "match": "/api/v1/nodes",
+            "replies": [events(("ADDED", node("n0", True, "1")))],
+        },
+        {"match": "kustomizations", "replies": [{"stderr": missing_crd, "exit": 1}]},
+    )
+
+    conditions, pending = wait("nodes=1", "kustomization/flux-system/apps", timeout=1.5)
+
+    assert [c.spec for c in pending] == ["kustomization/flux-system/apps"]
+    assert pending[0].detail == "not seen yet"
+    assert pending[0].error == missing_crd
+    assert conditions[0].ready_after is not None
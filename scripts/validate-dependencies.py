@@ -2,280 +2,363 @@
 """
 GitOps Dependency Validation Script
 Validates Flux kustomization dependencies are correctly ordered and logical
+
+Checks the working tree by default; --staged, --rev and --range read manifests
+straight from git instead, so staged content or every commit of a range can be
+validated without a checkout.
+
+`plan` estimates rollout waves and the bootstrap critical path from duration
+hints; `timeline` measures them instead, from the Ready transitions and
+reconcile history of a live cluster or a saved `kubectl get -o json` dump.
 """
 
+import argparse
+import json
 import sys
+import time
 import yaml
 from pathlib import Path
-from typing import Dict, List, Set, Optional
-from collections import defaultdict
-from dataclasses import dataclass
-
-
-@dataclass
-class DependsOn:
-    name: str
-    namespace: Optional[str] = None
-
-
-@dataclass
-class KustomizationSpec:
-    path: str
-    depends_on: List[DependsOn]
-
-    @classmethod
-    def from_dict(cls, spec_dict: Dict) -> "KustomizationSpec":
-        depends_on = []
-        for dep in spec_dict.get("dependsOn", []):
-            if isinstance(dep, dict) and dep.get("name"):
-                depends_on.append(
-                    DependsOn(name=dep["name"], namespace=dep.get("namespace"))
-                )
-
-        return cls(path=spec_dict.get("path", ""), depends_on=depends_on)
-
-
-def load_kustomizations(root: Path = Path("k8s")) -> Dict[str, KustomizationSpec]:
-    """Load all Flux kustomizations from the repository"""
-    kustomizations = {}
-
-    for flux_kustomization_file in root.rglob("flux-kustomization.yaml"):
-        try:
-            with open(flux_kustomization_file, "r") as f:
-                docs = list(yaml.safe_load_all(f))
-                for doc in docs:
-                    if (
-                        doc
-                        and doc.get("kind") == "Kustomization"
-                        and doc.get("apiVersion", "").startswith(
-                            "kustomize.toolkit.fluxcd.io"
-                        )
-                    ):
-                        name = doc.get("metadata", {}).get("name")
-                        if name:
-                            kustomizations[name] = KustomizationSpec.from_dict(
-                                doc.get("spec", {})
-                            )
-        except Exception as e:
-            print(
-                f"Warning: Failed to parse {flux_kustomization_file}: {e}",
-                file=sys.stderr,
-            )
-
-    return kustomizations
-
-
-def build_dependency_graph(
-    kustomizations: Dict[str, KustomizationSpec],
-) -> Dict[str, List[str]]:
-    """Build dependency graph from kustomizations"""
-    graph = defaultdict(list)
-
-    for name, spec in kustomizations.items():
-        depends_on = spec.depends_on
-        for dep in depends_on:
-            graph[dep.name].append(name)
-
-    return dict(graph)
-
-
-def find_cycles(graph: Dict[str, List[str]], all_nodes: Set[str]) -> List[List[str]]:
-    """Find cycles in dependency graph using DFS"""
-    WHITE, GRAY, BLACK = 0, 1, 2
-    color = {node: WHITE for node in all_nodes}
-    cycles = []
-
-    def dfs(node: str, path: List[str]):
-        if color[node] == GRAY:
-            # Found cycle
-            cycle_start = path.index(node)
-            cycles.append(path[cycle_start:] + [node])
-            return
-
-        if color[node] == BLACK:
-            return
-
-        color[node] = GRAY
-        path.append(node)
-
-        for neighbor in graph.get(node, []):
-            dfs(neighbor, path)
-
-        path.pop()
-        color[node] = BLACK
-
-    for node in all_nodes:
-        if color[node] == WHITE:
-            dfs(node, [])
-
-    return cycles
-
-
-def check_required_dependencies() -> List[str]:
-    """Check that critical dependencies are correctly set up"""
-    errors = []
-
-    # Define critical dependency rules
-    dependency_rules = {
-        "external-secrets-config": {
-            "must_come_before": ["authentik", "gitea", "harbor", "powerdns", "matrix"],
-            "reason": "Applications need external-secrets ClusterSecretStore to sync secrets from Vault",
-        },
-        "cert-manager": {
-            "must_come_before": ["ingress-nginx", "authentik", "gitea", "harbor"],
-            "reason": "TLS certificates required for ingress and applications",
-        },
-        "ingress-nginx": {
-            "must_come_before": ["authentik", "gitea", "harbor", "matrix"],
-            "reason": "Applications need ingress controller for external access",
-        },
-        "vault": {
-            "must_come_before": [
-                "external-secrets-operator",
-                "external-secrets-config",
-            ],
-            "reason": "Vault must be ready before external-secrets can connect",
-        },
-        "metallb-config": {
-            "must_come_before": ["ingress-nginx"],
-            "reason": "Load balancer needed for ingress controller",
-        },
-    }
-
-    kustomizations = load_kustomizations()
-
-    # Build reverse dependency lookup
-    depends_on_map = {}
-    for name, spec in kustomizations.items():
-        depends_on_map[name] = [dep.name for dep in spec.depends_on]
-
-    def has_dependency_path(
-        from_kust: str, to_kust: str, visited: Set[str] = None
-    ) -> bool:
-        """Check if there's a dependency path from from_kust to to_kust"""
-        if visited is None:
-            visited = set()
-
-        if from_kust in visited:
-            return False
-
-        if from_kust == to_kust:
-            return True
-
-        visited.add(from_kust)
-
-        for dep in depends_on_map.get(to_kust, []):
-            if has_dependency_path(from_kust, dep, visited):
-                return True
-
-        return False
-
-    # Check each dependency rule
-    for prereq, rule in dependency_rules.items():
-        if prereq not in kustomizations:
-            continue
-
-        for dependent in rule["must_come_before"]:
-            if dependent not in kustomizations:
-                continue
-
-            # Check if dependent has prereq in its dependency chain
-            if prereq not in depends_on_map.get(dependent, []):
-                # Also check for transitive dependencies
-                has_transitive_dep = False
-                for dep in depends_on_map.get(dependent, []):
-                    if has_dependency_path(prereq, dep):
-                        has_transitive_dep = True
-                        break
-
-                if not has_transitive_dep:
-                    errors.append(
-                        f"❌ {dependent} should depend on {prereq} ({rule['reason']})"
-                    )
-
-    return errors
-
-
-def validate_external_secrets_dependencies() -> List[str]:
-    """Validate external-secrets specific dependency patterns"""
-    errors = []
-    kustomizations = load_kustomizations()
-
-    # Check that services using ExternalSecret resources depend on external-secrets
-    services_with_external_secrets = []
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from gitops_validation.dependency_rules import DEFAULT_POLICY_PATH, DependencyPolicy
+from gitops_validation.flux_kustomizations import (
+    FLUX_KUSTOMIZATION_FILE,
+    check_dependencies,
+    load_kustomizations,
+)
+from gitops_validation.git_source import (
+    GitError,
+    GitObjectStore,
+    GitTree,
+    rev_list,
+)
+from gitops_validation.kustomize_graph import KUSTOMIZATION_FILE, KustomizeGraph
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import add_profile_argument, enable_from_args, span
+from gitops_validation.reconcile_timeline import (
+    ReconcileTimeline,
+    build_timeline,
+    fetch_objects,
+    load_objects,
+)
+from gitops_validation.rollout_plan import (
+    RolloutPlan,
+    load_duration_hints,
+    parse_duration,
+    plan_rollout,
+)
+from gitops_validation.summary_cache import SummaryCache
+
+
+def print_rollout_plan(plan: RolloutPlan) -> None:
+    """Human-readable rollout waves and critical path"""
+    print(
+        f"🌊 {len(plan.schedule)} kustomizations reconcile in {len(plan.waves)} waves:"
+    )
+    for number, wave in enumerate(plan.waves, start=1):
+        start = min(plan.schedule[name].start for name in wave)
+        print(f"  Wave {number} (t≥{start:.0f}s): {', '.join(wave)}")
+
+    print(f"\n⛓️  Longest dependency chain ({len(plan.longest_chain)} kustomizations):")
+    print(f"  {' → '.join(plan.longest_chain)}")
+
+    print(f"\n⏱️  Estimated critical path: {plan.critical_path_seconds:.0f}s")
+    for name in plan.critical_path:
+        scheduled = plan.schedule[name]
+        print(
+            f"  {scheduled.start:6.0f}s → {scheduled.finish:6.0f}s  {name} "
+            f"({scheduled.duration:.0f}s)"
+        )
+
+
+def plan(args: argparse.Namespace, cache: SummaryCache) -> int:
+    """Print Flux rollout waves and the estimated bootstrap critical path"""
+    index = ManifestIndex.build(Path("k8s"), cache)
+    index.report_errors(FLUX_KUSTOMIZATION_FILE)
+    cache.evict()
+
+    kustomizations = load_kustomizations(index=index)
+    if not kustomizations:
+        print("❌ No Flux kustomizations found!", file=sys.stderr)
+        return 1
 
-    for kust_file in Path("k8s").rglob("*.yaml"):
-        if "flux-kustomization" in kust_file.name:
-            continue
+    try:
+        durations = load_duration_hints(args.timings) if args.timings else {}
+        rollout = plan_rollout(
+            {
+                name: [dep.name for dep in spec.depends_on]
+                for name, spec in kustomizations.items()
+            },
+            durations,
+            parse_duration(args.default_duration),
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
 
-        try:
-            with open(kust_file, "r") as f:
-                docs = list(yaml.safe_load_all(f))
-                for doc in docs:
-                    if (
-                        doc
-                        and doc.get("kind") == "ExternalSecret"
-                        and doc.get("apiVersion", "").startswith("external-secrets.io")
-                    ):
-                        # Find which kustomization this belongs to
-                        relative_path = kust_file.relative_to(Path("k8s"))
-                        service_name = (
-                            relative_path.parts[0] if relative_path.parts else None
-                        )
-                        if (
-                            service_name
-                            and service_name not in services_with_external_secrets
-                        ):
-                            services_with_external_secrets.append(service_name)
-        except Exception:
+    if args.format == "json":
+        print(json.dumps(rollout.to_dict(), indent=2))
+    else:
+        print_rollout_plan(rollout)
+    return 0
+
+
+def print_timeline(timeline: ReconcileTimeline) -> None:
+    """Human-readable reconcile timeline, critical path and slowest objects"""
+    kinds = [
+        entry.kind for entry in timeline.entries.values() if entry.ready is not None
+    ]
+    print(
+        f"⏱️  {kinds.count('Kustomization')} Kustomizations and "
+        f"{kinds.count('HelmRelease')} HelmReleases Ready after "
+        f"{timeline.ready_seconds:.0f}s"
+    )
+    print("   created    start    ready  waiting     self  object")
+    for entry in timeline.ordered():
+        if entry.ready is None:
             continue
+        print(
+            f"  {entry.created - timeline.origin:7.0f}s {entry.start - timeline.origin:7.0f}s "
+            f"{entry.ready - timeline.origin:7.0f}s {entry.waiting:7.0f}s "
+            f"{entry.self_time:7.0f}s  {entry.label}"
+        )
+
+    print(f"\n⛓️  Critical path ({timeline.ready_seconds:.0f}s):")
+    for key in timeline.critical_path:
+        entry = timeline.entries[key]
+        print(
+            f"  {entry.start - timeline.origin:6.0f}s → "
+            f"{entry.ready - timeline.origin:6.0f}s  {entry.label} "
+            f"({entry.self_time:.0f}s self, {entry.waiting:.0f}s waiting)"
+        )
+
+    slowest = sorted(
+        (entry for entry in timeline.entries.values() if entry.ready is not None),
+        key=lambda entry: -entry.self_time,
+    )[:10]
+    print("\n🐢 Most self time:")
+    for entry in slowest:
+        print(f"  {entry.self_time:7.0f}s  {entry.label}")
+
+    if timeline.pending:
+        print(f"\n⚠️  {len(timeline.pending)} objects have never been Ready:")
+        for entry in sorted(timeline.pending, key=lambda entry: entry.key):
+            print(f"  {entry.label}: {entry.detail}")
+    if timeline.missing:
+        print(
+            f"\nℹ️  {len(timeline.missing)} Flux kustomizations in k8s/ are not in "
+            f"the dump: {', '.join(timeline.missing)}"
+        )
+
+
+def timeline(args: argparse.Namespace, cache: SummaryCache) -> int:
+    """Print how long each Flux object took to become Ready and why"""
+    index = ManifestIndex.build(Path("k8s"), cache)
+    index.report_errors(FLUX_KUSTOMIZATION_FILE)
+    cache.evict()
+    kustomizations = load_kustomizations(index=index)
 
-    # Check dependencies
-    for service in services_with_external_secrets:
-        if service in kustomizations:
-            deps = [dep.name for dep in kustomizations[service].depends_on]
-            if "external-secrets-config" not in deps:
-                errors.append(
-                    f"❌ {service} uses ExternalSecret resources but doesn't depend on external-secrets-config kustomization"
-                )
+    try:
+        if args.dump is None:
+            text = fetch_objects(args.kubectl, args.kubeconfig)
+        elif str(args.dump) == "-":
+            text = sys.stdin.read()
+        else:
+            text = args.dump.read_text()
+        result = build_timeline(load_objects(text), kustomizations)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if not result.entries:
+        print("❌ No Flux Kustomizations or HelmReleases in the dump", file=sys.stderr)
+        return 1
 
-    return errors
+    if args.write_timings:
+        args.write_timings.write_text(yaml.safe_dump(result.timings()))
+    if args.format == "json":
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print_timeline(result)
+        if args.write_timings:
+            print(
+                f"\n✅ Wrote {len(result.timings())} measured durations to "
+                f"{args.write_timings} (use with plan --timings)"
+            )
+    return 0
+
+
+def validate_tree(
+    tree: GitTree,
+    cache: SummaryCache,
+    policy: DependencyPolicy,
+    graphs: Optional[Dict[FrozenSet, KustomizeGraph]] = None,
+) -> Tuple[int, List[str]]:
+    """(Flux kustomization count, errors) for one git snapshot of k8s/
+
+    graphs is shared between snapshots: one whose kustomization.yaml files are
+    all unchanged reuses the reference graph instead of re-reading them.
+    """
+    index = ManifestIndex.build(tree.root, cache, source=tree)
+    kustomizations = load_kustomizations(index=index)
+    if not kustomizations:
+        return 0, ["❌ No Flux kustomizations found!"]
+    graphs = graphs if graphs is not None else {}
+    kustomization_files = [
+        path for path in tree.paths() if path.name == KUSTOMIZATION_FILE
+    ]
+    key = frozenset((path, tree.files[path]) for path in kustomization_files)
+    if key not in graphs:
+        graphs[key] = KustomizeGraph.build(kustomization_files, read=tree.read_text)
+    graph = graphs[key]
+    return len(kustomizations), check_dependencies(index, kustomizations, policy, graph)
+
+
+def validate_range(
+    revision_range: str, cache: SummaryCache, policy: DependencyPolicy
+) -> int:
+    """Validate every commit of a range, oldest first"""
+    started = time.monotonic()
+    commits = rev_list(revision_range)
+    print(f"🔍 Validating GitOps dependencies in {len(commits)} commits...")
+
+    failed = 0
+    # k8s/ tree id -> errors; commits that didn't touch k8s/ share one result
+    results: Dict[Optional[str], List[str]] = {}
+    graphs: Dict[FrozenSet, KustomizeGraph] = {}
+    with GitObjectStore() as store:
+        for commit, description in commits:
+            tree = store.tree(commit, Path("k8s"))
+            if tree.tree_id not in results:
+                with span("validate commit", commit=description):
+                    results[tree.tree_id] = validate_tree(tree, cache, policy, graphs)[
+                        1
+                    ]
+            errors = results[tree.tree_id]
+            if errors:
+                failed += 1
+                print(f"❌ {description}")
+                print("\n".join(f"   {error}" for error in errors))
+            else:
+                print(f"✅ {description}")
+        reads = store.reads
+    cache.evict()
+
+    print(
+        f"📊 {len(commits)} commits, {failed} failed "
+        f"({len(results)} distinct k8s/ trees, {reads} git objects read) "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    return 1 if failed else 0
 
 
 def main():
     """Main validation function"""
-    print("🔍 Validating GitOps dependencies...")
-
-    errors = []
+    parser = argparse.ArgumentParser(description="Validate GitOps dependencies")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-parse every manifest instead of using cached summaries in .cache/",
+    )
+    parser.add_argument(
+        "--policy",
+        type=Path,
+        default=DEFAULT_POLICY_PATH,
+        help="YAML file with ordering and resource dependency rules",
+    )
+    subcommands = parser.add_subparsers(dest="command")
+    plan_parser = subcommands.add_parser(
+        "plan", help="Show Flux rollout waves and the bootstrap critical path"
+    )
+    plan_parser.add_argument(
+        "--timings",
+        type=Path,
+        help="YAML/JSON mapping of kustomization name to expected duration",
+    )
+    plan_parser.add_argument(
+        "--default-duration",
+        default="60s",
+        help="Duration assumed for kustomizations without a timing hint",
+    )
+    plan_parser.add_argument("--format", choices=["text", "json"], default="text")
+    add_profile_argument(plan_parser, subcommand=True)
+    timeline_parser = subcommands.add_parser(
+        "timeline",
+        help="Measure how long each Flux object took to become Ready, and why",
+    )
+    timeline_parser.add_argument(
+        "dump",
+        nargs="?",
+        type=Path,
+        help=(
+            "`kubectl get kustomizations,helmreleases -A -o json` output, or - for "
+            "stdin (default: query the cluster)"
+        ),
+    )
+    timeline_parser.add_argument("--kubeconfig", help="Kubeconfig (default: kubectl's)")
+    timeline_parser.add_argument("--kubectl", default="kubectl", help="kubectl binary")
+    timeline_parser.add_argument(
+        "--write-timings",
+        type=Path,
+        help="Write measured Kustomization durations as plan --timings hints",
+    )
+    timeline_parser.add_argument("--format", choices=["text", "json"], default="text")
+    add_profile_argument(timeline_parser, subcommand=True)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--staged",
+        action="store_true",
+        help="Validate k8s/ as staged in the git index instead of the working tree",
+    )
+    source.add_argument("--rev", metavar="COMMIT", help="Validate k8s/ at a commit")
+    source.add_argument(
+        "--range",
+        metavar="RANGE",
+        help="Validate every commit in a git range such as main..HEAD",
+    )
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+    cache = SummaryCache(enabled=not args.no_cache)
+
+    if args.command == "plan":
+        return plan(args, cache)
+    if args.command == "timeline":
+        return timeline(args, cache)
 
     try:
-        # Load all kustomizations
-        kustomizations = load_kustomizations()
-
-        if not kustomizations:
-            print("❌ No Flux kustomizations found!")
-            return 1
-
-        print(f"📋 Found {len(kustomizations)} kustomizations")
-
-        # Build dependency graph
-        graph = build_dependency_graph(kustomizations)
-        all_nodes = set(kustomizations.keys()) | set().union(*graph.values())
+        policy = DependencyPolicy.load(args.policy)
+        if args.range:
+            return validate_range(args.range, cache, policy)
+
+        print("🔍 Validating GitOps dependencies...")
+
+        if args.staged or args.rev:
+            with GitObjectStore() as store:
+                if args.staged:
+                    tree = store.staged(Path("k8s"))
+                else:
+                    tree = store.tree(args.rev, Path("k8s"))
+                count, errors = validate_tree(tree, cache, policy)
+            cache.evict()
+            if not count:
+                print("\n".join(errors))
+                return 1
+            print(f"📋 Found {count} kustomizations")
+        else:
+            # Walk and parse the manifest tree once; every check shares the index
+            index = ManifestIndex.build(Path("k8s"), cache)
+            index.report_errors(FLUX_KUSTOMIZATION_FILE)
+            cache.evict()
 
-        # Check for circular dependencies
-        cycles = find_cycles(graph, all_nodes)
-        if cycles:
-            errors.append("❌ Circular dependencies detected:")
-            for cycle in cycles:
-                errors.append(f"   {' → '.join(cycle)}")
+            # Load all kustomizations
+            kustomizations = load_kustomizations(index=index)
 
-        # Check required dependencies
-        required_errors = check_required_dependencies()
-        errors.extend(required_errors)
+            if not kustomizations:
+                print("❌ No Flux kustomizations found!")
+                return 1
 
-        # Check external-secrets specific dependencies
-        es_errors = validate_external_secrets_dependencies()
-        errors.extend(es_errors)
+            print(f"📋 Found {len(kustomizations)} kustomizations")
+            errors = check_dependencies(index, kustomizations, policy)
 
         # Report results
         if errors:
@@ -285,6 +368,9 @@ def main():
             print("✅ All dependency validations passed!")
             return 0
 
+    except GitError as e:
+        print(f"❌ git: {e}", file=sys.stderr)
+        return 1
     except Exception as e:
         print(f"❌ Validation failed with error: {e}", file=sys.stderr)
         return 1
@@ -1,148 +1,107 @@
 #!/usr/bin/env python3
 """
 Flux Build Validation Script
-Validates that Flux can build all kustomizations and analyzes the results.
+Builds every Flux Kustomization in parallel (one flux build per Kustomization,
+each with its own timeout) and analyzes the combined results.
 Requires flux CLI to be available - does not fall back to alternatives.
 """
 
-import subprocess
+import argparse
+import asyncio
 import sys
-import yaml
-from collections import defaultdict
-from typing import List, Tuple
+import textwrap
+from pathlib import Path
+
+from gitops_validation.flux_build import (
+    FLUX_BUILD_TIMEOUT,
+    FluxOutputAnalysis,
+    flux_build_targets,
+    run_flux_builds,
+)
+from gitops_validation.flux_kustomizations import FLUX_KUSTOMIZATION_FILE
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import add_profile_argument, enable_from_args
+from gitops_validation.scheduler import default_jobs
+from gitops_validation.summary_cache import SummaryCache
 
 
-def run_flux_build() -> Tuple[bool, str, str]:
-    """Run flux build and capture output - fail if flux is not available"""
-    import os
+def main():
+    """Main validation function"""
+    parser = argparse.ArgumentParser(description="Validate flux build output")
+    parser.add_argument(
+        "--root", default="k8s/", help="Root directory of the Kubernetes manifests"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=default_jobs(),
+        help="Maximum concurrent flux builds (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=FLUX_BUILD_TIMEOUT,
+        help="Seconds before a single Kustomization's flux build is killed",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Show per-Kustomization timings"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-parse build output instead of using cached summaries in .cache/",
+    )
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+    cache = SummaryCache(enabled=not args.no_cache)
 
-    try:
-        # Try flux build with dry-run (requires kustomization file)
-        kustomization_file = "./k8s/flux-system/gotk-sync.yaml"
+    print("🔧 Running flux build validation...")
 
-        # Skip validation if flux-system doesn't exist yet (created during bootstrap)
-        if not os.path.exists(kustomization_file):
-            return True, "", "flux-system not bootstrapped yet - skipping validation"
+    index = ManifestIndex.build(Path(args.root), cache)
+    index.report_errors(FLUX_KUSTOMIZATION_FILE)
+    targets = flux_build_targets(index)
+    if not targets:
+        print("ℹ️  No Flux Kustomizations found - skipping validation")
+        return 0
 
-        result = subprocess.run(
-            [
-                "flux",
-                "build",
-                "kustomization",
-                "flux-system",
-                "--path",
-                "./k8s",
-                "--kustomization-file",
-                kustomization_file,
-                "--dry-run",
-            ],
-            capture_output=True,
-            text=True,
-            timeout=60,
+    # Build every Kustomization in parallel, analyzing documents as they stream in
+    analysis = FluxOutputAnalysis(cache)
+    labels = {target.name: target.label for target in targets}
+    run = asyncio.run(
+        run_flux_builds(
+            targets,
+            lambda text, name: analysis.observe_text(text, labels[name]),
+            args.jobs,
+            args.timeout,
         )
+    )
 
-        return result.returncode == 0, result.stdout, result.stderr
-
-    except FileNotFoundError:
-        return False, "", "flux CLI not found - ensure flux is installed and available"
-    except subprocess.TimeoutExpired:
-        return False, "", "flux build timed out after 60 seconds"
-    except Exception as e:
-        return False, "", f"flux build failed: {str(e)}"
-
-
-def analyze_flux_output(output: str) -> List[str]:
-    """Analyze the flux build output for potential issues"""
-    warnings = []
-
-    try:
-        # Parse YAML documents from flux build output
-        documents = list(yaml.safe_load_all(output))
-
-        # Count resources by type
-        resource_counts = defaultdict(int)
-        namespaces = set()
-
-        for doc in documents:
-            if not doc:
-                continue
-
-            kind = doc.get("kind")
-            if kind:
-                resource_counts[kind] += 1
-
-            namespace = doc.get("metadata", {}).get("namespace")
-            if namespace:
-                namespaces.add(namespace)
-
-        # Check for suspicious patterns
-        if resource_counts.get("HelmRelease", 0) == 0:
-            warnings.append(
-                "⚠️  No HelmRelease resources found - expected for GitOps deployment"
-            )
-
-        if resource_counts.get("Kustomization", 0) == 0:
-            warnings.append("⚠️  No Flux Kustomization resources found")
+    if args.verbose:
+        print(f"⏱️  Flux build timings ({args.jobs} jobs, {run.wall_time:.2f}s wall):")
+        for name, elapsed in sorted(run.timings.items(), key=lambda x: -x[1]):
+            print(f"  {elapsed:7.2f}s  {name}")
 
-        # Check for duplicate external-secrets (redundant with other script but good double-check)
-        external_secrets_count = 0
-        for doc in documents:
-            if (
-                doc
-                and doc.get("kind") == "HelmRelease"
-                and doc.get("metadata", {}).get("name") == "external-secrets"
-            ):
-                external_secrets_count += 1
-
-        if external_secrets_count > 1:
-            warnings.append(
-                f"❌ Found {external_secrets_count} external-secrets HelmReleases (should be exactly 1)"
-            )
-        elif external_secrets_count == 0:
-            warnings.append("⚠️  No external-secrets HelmRelease found")
-
-        # Summary
-        total_resources = sum(resource_counts.values())
-        if total_resources > 0:
+    if run.failed:
+        print(f"❌ flux build failed for {len(run.failed)} Kustomizations:")
+        for result in run.failed:
             print(
-                f"📊 Flux build generated {total_resources} resources across {len(namespaces)} namespaces"
+                f"  {result.name} ({result.path}):"
+                if result.path
+                else f"  {result.name}:"
             )
-
-            # Show top resource types
-            top_resources = sorted(
-                resource_counts.items(), key=lambda x: x[1], reverse=True
-            )[:5]
-            for resource_type, count in top_resources:
-                print(f"   {resource_type}: {count}")
-
-    except yaml.YAMLError as e:
-        warnings.append(f"⚠️  Failed to parse flux build output as YAML: {e}")
-    except Exception as e:
-        warnings.append(f"⚠️  Error analyzing flux build output: {e}")
-
-    return warnings
-
-
-def main():
-    """Main validation function"""
-    print("🔧 Running flux build validation...")
-
-    # Run flux build
-    success, stdout, stderr = run_flux_build()
-
-    if not success:
-        print("❌ flux build failed:")
-        if stderr:
-            print(stderr)
+            print(textwrap.indent(result.error.strip(), "    "))
         return 1
 
-    # Check if validation was skipped
-    if stderr and "skipping validation" in stderr:
-        print(f"ℹ️  {stderr}")
-        return 0
-
-    # Analyze the output
-    warnings = analyze_flux_output(stdout)
+    # Report the analysis
+    try:
+        for line in analysis.summary():
+            print(line)
+        warnings = analysis.warnings()
+    except Exception as e:
+        warnings = [f"⚠️  Error analyzing flux build output: {e}"]
+    cache.evict()
 
     # Report results
     if warnings:
@@ -155,7 +114,12 @@ def main():
         if error_count > 0:
             return 1
 
-    print("✅ Flux build validation passed!")
+    timings = run.timings
+    slowest = max(timings, key=timings.get)
+    print(
+        f"✅ Flux build validation passed! ({len(run.successful)} Kustomizations "
+        f"in {run.wall_time:.2f}s, slowest: {slowest} {timings[slowest]:.2f}s)"
+    )
     return 0
 
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Unified GitOps validation
+Runs the kustomize build, local helm chart, sharded flux build and dependency
+checks concurrently in a single process. The manifest tree is walked and parsed
+once and shared by every check, and the external-secrets installation and
+offline CRD schema checks run once over the rendered kustomize output; the
+charts in charts/, rendered with the values their HelmReleases pass, are
+validated against the same CRD schemas. The flux check indexes every
+rendered resource by identity and warns about ones applied by more than one
+Flux Kustomization.
+
+With --serve it stays resident as a watch daemon; --via-daemon makes this a
+thin client of that daemon (falling back to an in-process run).
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from gitops_validation.checks import (
+    CHECKS,
+    CheckOptions,
+    print_human,
+    print_json,
+    run_checks,
+)
+from gitops_validation.daemon import DEFAULT_SOCKET_PATH, serve, validate_via_daemon
+from gitops_validation.dependency_rules import DEFAULT_POLICY_PATH
+from gitops_validation.flux_build import FLUX_BUILD_TIMEOUT
+from gitops_validation.flux_kustomizations import FLUX_KUSTOMIZATION_FILE
+from gitops_validation.helm_render import HELM_TIMEOUT
+from gitops_validation.kustomize_build import git_changed_files
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import add_profile_argument, enable_from_args
+from gitops_validation.scheduler import default_jobs
+from gitops_validation.summary_cache import SummaryCache
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Run every GitOps validation check in one process"
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        type=Path,
+        help="Changed files; only kustomizations affected by them are built",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REV",
+        help="Only build kustomizations affected by changes since a git revision",
+    )
+    parser.add_argument(
+        "--root", default="k8s/", help="Root directory of the Kubernetes manifests"
+    )
+    parser.add_argument(
+        "--skip",
+        action="append",
+        choices=CHECKS,
+        default=[],
+        help="Skip a check (repeatable)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=default_jobs(),
+        help="Maximum concurrent kustomize and flux builds per check (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="Seconds before a single kustomize build is killed",
+    )
+    parser.add_argument(
+        "--flux-timeout",
+        type=float,
+        default=FLUX_BUILD_TIMEOUT,
+        help="Seconds before a single Kustomization's flux build is killed",
+    )
+    parser.add_argument(
+        "--helm-timeout",
+        type=float,
+        default=HELM_TIMEOUT,
+        help="Seconds before a single chart's helm template is killed",
+    )
+    parser.add_argument(
+        "--policy",
+        type=Path,
+        default=DEFAULT_POLICY_PATH,
+        help="YAML file with ordering and resource dependency rules",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore .cache/: always run kustomize and helm and re-parse every manifest",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Show per-check details"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a daemon that watches --root and keeps results warm",
+    )
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="Ask a running daemon for results; validate in-process if none is running",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=DEFAULT_SOCKET_PATH,
+        help="Unix socket the daemon listens on",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["human", "json"],
+        default="human",
+        help="Output format (human or json for Terraform)",
+    )
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+    cache = SummaryCache(enabled=not args.no_cache)
+    root = Path(args.root)
+    options = CheckOptions(
+        jobs=args.jobs,
+        timeout=args.timeout,
+        flux_timeout=args.flux_timeout,
+        helm_timeout=args.helm_timeout,
+        policy=args.policy,
+        use_build_cache=not args.no_cache,
+    )
+
+    if args.serve:
+        return await serve(root, cache, options, args.socket)
+
+    changed_files = None
+    if args.files or args.since:
+        changed_files = list(args.files)
+        if args.since:
+            changed_files.extend(git_changed_files(args.since))
+
+    answer = None
+    if args.via_daemon:
+        answer = validate_via_daemon(root, args.skip, changed_files, args.socket)
+    if answer is not None:
+        results, wall_time = answer
+    else:
+        started = time.monotonic()
+
+        # Walk and parse the manifest tree once; every check shares the index
+        index = ManifestIndex.build(root, cache)
+        index.report_errors(FLUX_KUSTOMIZATION_FILE)
+
+        results = await run_checks(index, cache, options, args.skip, changed_files)
+        wall_time = time.monotonic() - started
+        cache.evict()
+
+    if args.format == "json":
+        print_json(results, wall_time)
+    else:
+        print_human(results, wall_time, args.verbose)
+
+    return 0 if all(r.passed for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -9,33 +9,24 @@ import sys
 import json
 from pathlib import Path
 import argparse
-from collections import defaultdict
 
 try:
-    import yaml
+    import yaml  # noqa: F401
 except ImportError:
     print("PyYAML required: pip install PyYAML", file=sys.stderr)
     sys.exit(1)
 
-
-async def validate_kustomization(kustomization_path: Path) -> tuple[Path, bool, str]:
-    """Validate a single kustomization directory"""
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            "kustomize",
-            "build",
-            str(kustomization_path.parent),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-
-        if proc.returncode == 0:
-            return kustomization_path, True, stdout.decode()
-        else:
-            return kustomization_path, False, stderr.decode()
-    except Exception as e:
-        return kustomization_path, False, str(e)
+from gitops_validation.kustomize_build import (
+    find_kustomizations,
+    git_changed_files,
+    run_kustomize_builds,
+    select_affected,
+)
+from gitops_validation.kustomize_graph import KUSTOMIZATION_FILE, KustomizeGraph
+from gitops_validation.manifest_index import ManifestIndex
+from gitops_validation.profiling import add_profile_argument, enable_from_args
+from gitops_validation.scheduler import default_jobs
+from gitops_validation.summary_cache import SummaryCache
 
 
 async def main():
@@ -52,76 +43,81 @@ async def main():
         default="human",
         help="Output format (human or json for Terraform)",
     )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        type=Path,
+        help="Changed files; only kustomizations affected by them are built",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REV",
+        help="Only build kustomizations affected by changes since a git revision",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=default_jobs(),
+        help="Maximum concurrent kustomize builds (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="Seconds before a single kustomize build is killed",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore .cache/: always run kustomize and re-parse its output",
+    )
+    add_profile_argument(parser)
     args = parser.parse_args()
+    enable_from_args(args)
+    cache = SummaryCache(enabled=not args.no_cache)
 
     # Find all kustomization.yaml files (excluding flux-system)
     root = Path(args.root)
-    kustomizations = []
-
-    for kustomization_file in root.rglob("kustomization.yaml"):
-        if "flux-system" not in kustomization_file.parts:
-            kustomizations.append(kustomization_file)
+    kustomizations = find_kustomizations(root.rglob(KUSTOMIZATION_FILE))
 
     if not kustomizations:
         print(f"No kustomizations found in {root}")
         return 0
 
-    # Validate all kustomizations in parallel
-    tasks = [validate_kustomization(k) for k in kustomizations]
-    results = await asyncio.gather(*tasks)
+    graph = KustomizeGraph.build(kustomizations)
+
+    changed_files = list(args.files)
+    if args.since:
+        changed_files.extend(git_changed_files(args.since))
+    if args.files or args.since:
+        index = ManifestIndex.build(root, cache)
+        kustomizations = select_affected(kustomizations, changed_files, index, graph)
+        if not kustomizations:
+            if args.format == "json":
+                print(json.dumps({"status": "passed", "validated_count": "0"}))
+            else:
+                print("✅ No kustomizations affected by the changed files")
+            return 0
 
-    # Process results
-    successful = []
-    failed = []
-    kustomize_outputs = {}
+    run = await run_kustomize_builds(
+        kustomizations,
+        graph,
+        cache,
+        args.jobs,
+        args.timeout,
+        use_build_cache=not args.no_cache,
+    )
+    cache.evict()
 
-    for kustomization, success, output in results:
-        if success:
-            successful.append(kustomization)
-            kustomize_outputs[kustomization] = output
-        else:
-            failed.append((kustomization, output))
-
-    # Check for duplicate external-secrets installations
-    external_secrets_deployments = defaultdict(list)
-
-    for kustomization, output in kustomize_outputs.items():
-        try:
-            documents = yaml.safe_load_all(output)
-            for doc in documents:
-                if (
-                    doc
-                    and doc.get("kind") == "HelmRelease"
-                    and doc.get("metadata", {}).get("name") == "external-secrets"
-                ):
-                    namespace = doc.get("metadata", {}).get("namespace", "default")
-                    chart_version = (
-                        doc.get("spec", {})
-                        .get("chart", {})
-                        .get("spec", {})
-                        .get("version", "unknown")
-                    )
-                    external_secrets_deployments[f"{namespace}/{chart_version}"].append(
-                        str(kustomization.parent)
-                    )
-        except Exception:
-            # Ignore YAML parsing errors for duplicate check
-            pass
+    successful = run.successful
+    failed = run.failed
+    timings = run.timings
+    wall_time = run.wall_time
+    cached_builds = {r.kustomization for r in run.results if r.cached}
 
     # Validate exactly one external-secrets installation
-    duplicate_errors = []
-    if len(external_secrets_deployments) > 1:
-        duplicate_errors.append("Multiple external-secrets HelmRelease found:")
-        for deployment, paths in external_secrets_deployments.items():
-            duplicate_errors.append(f"  {deployment}: {', '.join(paths)}")
-        duplicate_errors.append(
-            "There should be exactly ONE external-secrets installation."
-        )
-    elif len(external_secrets_deployments) == 0:
-        duplicate_errors.append(
-            "No external-secrets HelmRelease found. At least one is required."
-        )
-
+    duplicate_errors = run.external_secrets().errors()
     if duplicate_errors:
         error_msg = "\n".join(duplicate_errors)
         failed.append((Path("external-secrets-validation"), error_msg))
@@ -140,7 +136,14 @@ async def main():
             print(json.dumps(result), file=sys.stderr)
             return 1
         else:
-            result = {"status": "passed", "validated_count": str(len(successful))}
+            # Terraform external data sources only accept string values
+            result = {
+                "status": "passed",
+                "validated_count": str(len(successful)),
+                "wall_time_seconds": f"{wall_time:.2f}",
+                "cache_hits": str(run.cache_hits),
+                "cache_misses": str(run.cache_misses),
+            }
             print(json.dumps(result))
             return 0
     else:
@@ -150,6 +153,13 @@ async def main():
             for k in successful:
                 print(f"  {k.parent}")
 
+        if args.verbose:
+            print(f"⏱️  Build timings ({args.jobs} jobs, {wall_time:.2f}s wall):")
+            for k, elapsed in sorted(timings.items(), key=lambda x: -x[1]):
+                marker = " (cached)" if k in cached_builds else ""
+                print(f"  {elapsed:7.2f}s  {k.parent}{marker}")
+            print(f"📦 Build cache: {run.cache_hits} hits, {run.cache_misses} misses")
+
         if failed:
             print(f"❌ Failed to validate {len(failed)} kustomizations:")
             for kustomization, error in failed:
@@ -158,7 +168,12 @@ async def main():
             return 1
 
         if not args.verbose:
-            print(f"✅ All {len(successful)} kustomizations valid")
+            slowest = max(timings, key=timings.get)
+            print(
+                f"✅ All {len(successful)} kustomizations valid in {wall_time:.2f}s "
+                f"(slowest: {slowest.parent} {timings[slowest]:.2f}s, "
+                f"build cache: {run.cache_hits} hits, {run.cache_misses} misses)"
+            )
 
         return 0
 
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Wait for cluster readiness conditions concurrently
+Replaces bootstrap.sh's sleep-and-poll loops: every condition is waited on at
+once, Kubernetes objects over one `kubectl get --raw ...?watch=1` stream per
+resource type, and each is reported the moment it holds, with how long that
+took. HTTP endpoints have nothing to watch and are polled.
+
+Conditions, on the command line or one per line in --file (# comments):
+
+    nodes=6                          at least 6 nodes Ready
+    deployment/NAMESPACE/NAME        Deployment Available
+    kustomization/NAMESPACE/NAME     Flux Kustomization Ready
+    helmrelease/NAMESPACE/NAME       Flux HelmRelease Ready
+    http=URL                         URL answers with a 2xx status
+
+Object conditions only count once the controller has observed the object's
+current generation, so a stale Ready from before an upgrade doesn't pass.
+
+The API server (or Flux's CRDs) may not exist yet: failed watches are retried
+with backoff until --timeout, so waiting for nodes also waits for the API.
+Pointing --kubectl at a stub, or --kubeconfig at a local fake API server that
+serves watch streams, exercises the whole tool offline.
+"""
+
+import abc
+import argparse
+import asyncio
+import json
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from gitops_validation.profiling import add_profile_argument, enable_from_args, span
+
+# Kind in a condition -> (list/watch path of all objects, status condition)
+OBJECT_KINDS = {
+    "deployment": ("/apis/apps/v1/deployments", "Available"),
+    "kustomization": (
+        "/apis/kustomize.toolkit.fluxcd.io/v1/kustomizations",
+        "Ready",
+    ),
+    "helmrelease": ("/apis/helm.toolkit.fluxcd.io/v2/helmreleases", "Ready"),
+}
+NODES_PATH = "/api/v1/nodes"
+
+# Server-side lifetime of one watch request; the stream is then reopened
+WATCH_TIMEOUT_SECONDS = 300
+# Backoff between failed watch attempts (API down, CRD not installed yet)
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 5.0
+HTTP_INTERVAL = 2.0
+HTTP_TIMEOUT = 5.0
+# Watch events carry whole objects; HelmRelease values can be large
+MAX_EVENT_BYTES = 16 * 2**20
+
+
+class KubectlUnavailable(Exception):
+    """kubectl itself could not be started; no amount of waiting helps"""
+
+
+def _status_condition(obj: Dict, condition_type: str) -> Optional[Dict]:
+    for condition in (obj.get("status") or {}).get("conditions") or []:
+        if condition.get("type") == condition_type:
+            return condition
+    return None
+
+
+class Condition:
+    """One thing to wait for; `detail` describes its last known state"""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        self.detail = "not seen yet"
+        self.error: Optional[str] = None
+        self.ready_after: Optional[float] = None
+
+
+class WatchedCondition(Condition, abc.ABC):
+    """A condition on Kubernetes objects, fed by a watch on `path`"""
+
+    path: str
+
+    def reset(self) -> None:
+        """Forget observed state before a watch replays every object"""
+
+    @abc.abstractmethod
+    def observe(self, event_type: str, obj: Dict) -> bool:
+        """Update from a watch event; True once the condition holds"""
+
+
+class ObjectCondition(WatchedCondition):
+    """A named object's status condition is True for its current generation"""
+
+    def __init__(self, spec: str, kind: str, namespace: str, name: str):
+        super().__init__(spec)
+        self.path, self.condition_type = OBJECT_KINDS[kind]
+        self.namespace = namespace
+        self.name = name
+
+    def observe(self, event_type: str, obj: Dict) -> bool:
+        metadata = obj.get("metadata") or {}
+        if metadata.get("namespace") != self.namespace:
+            return False
+        if metadata.get("name") != self.name:
+            return False
+        if event_type == "DELETED":
+            self.detail = "deleted"
+            return False
+
+        generation = metadata.get("generation")
+        observed = (obj.get("status") or {}).get("observedGeneration")
+        if generation is not None and (observed is None or observed < generation):
+            self.detail = f"generation {generation} not observed yet"
+            return False
+        condition = _status_condition(obj, self.condition_type)
+        if condition is None:
+            self.detail = f"no {self.condition_type} condition yet"
+            return False
+        self.detail = f"{self.condition_type}={condition.get('status')}"
+        if condition.get("reason"):
+            self.detail += f" ({condition['reason']})"
+        if condition.get("status") == "True":
+            return True
+        if condition.get("message"):
+            self.detail += f": {condition['message']}"
+        return False
+
+
+class NodeCount(WatchedCondition):
+    """At least `count` nodes have a Ready=True condition"""
+
+    path = NODES_PATH
+
+    def __init__(self, spec: str, count: int):
+        super().__init__(spec)
+        self.count = count
+        self.ready: Dict[str, bool] = {}
+
+    def reset(self) -> None:
+        self.ready.clear()
+
+    def observe(self, event_type: str, obj: Dict) -> bool:
+        name = (obj.get("metadata") or {}).get("name")
+        if event_type == "DELETED":
+            self.ready.pop(name, None)
+        else:
+            condition = _status_condition(obj, "Ready")
+            self.ready[name] = (condition or {}).get("status") == "True"
+        ready = sum(self.ready.values())
+        self.detail = f"{ready}/{self.count} nodes Ready ({len(self.ready)} nodes)"
+        return ready >= self.count
+
+
+class HttpCondition(Condition):
+    """An HTTP GET of `url` succeeds with a 2xx status"""
+
+    def __init__(self, spec: str, url: str):
+        super().__init__(spec)
+        self.url = url
+
+    def probe(self) -> bool:
+        try:
+            with urllib.request.urlopen(self.url, timeout=HTTP_TIMEOUT) as response:
+                self.detail = f"HTTP {response.status}"
+                return 200 <= response.status < 300
+        except urllib.error.HTTPError as e:
+            self.detail = f"HTTP {e.code}"
+        except (urllib.error.URLError, OSError) as e:
+            self.detail = str(getattr(e, "reason", e))
+        return False
+
+
+def parse_condition(spec: str) -> Condition:
+    key, separator, value = spec.partition("=")
+    if separator:
+        if key == "nodes" and value.isdigit():
+            return NodeCount(spec, int(value))
+        if key == "http" and value:
+            return HttpCondition(spec, value)
+    else:
+        parts = spec.split("/")
+        if len(parts) == 3 and parts[0] in OBJECT_KINDS and all(parts):
+            return ObjectCondition(spec, *parts)
+    raise ValueError(f"unrecognized condition {spec!r}")
+
+
+def read_conditions(path: Path) -> List[str]:
+    specs = []
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            specs.append(line)
+    return specs
+
+
+class ReadinessWaiter:
+    """Waits for all conditions at once, one watch per resource type"""
+
+    def __init__(
+        self,
+        conditions: List[Condition],
+        kubeconfig: Optional[str] = None,
+        kubectl: str = "kubectl",
+        http_interval: float = HTTP_INTERVAL,
+    ):
+        self.conditions = conditions
+        self.kubeconfig = kubeconfig
+        self.kubectl = kubectl
+        self.http_interval = http_interval
+        self.watches = 0
+        self._start = time.monotonic()
+
+    def _ready(self, condition: Condition) -> None:
+        condition.ready_after = time.monotonic() - self._start
+        print(
+            f"✅ {condition.spec} after {condition.ready_after:.1f}s "
+            f"({condition.detail})",
+            flush=True,
+        )
+
+    def _command(self, path: str, resource_version: Optional[str]) -> List[str]:
+        params = {
+            "watch": "1",
+            "allowWatchBookmarks": "true",
+            "timeoutSeconds": str(WATCH_TIMEOUT_SECONDS),
+        }
+        if resource_version:
+            params["resourceVersion"] = resource_version
+        command = [self.kubectl]
+        if self.kubeconfig:
+            command.append(f"--kubeconfig={self.kubeconfig}")
+        return command + ["get", "--raw", f"{path}?{urllib.parse.urlencode(params)}"]
+
+    async def _watch(self, path: str, pending: List[WatchedCondition]) -> None:
+        """Stream events for one resource type until its conditions all hold"""
+        # Without a resourceVersion the server first replays every existing
+        # object as ADDED, so a (re)started watch sees the full current state
+        resource_version = None
+        failures = 0
+        while pending:
+            if resource_version is None:
+                for condition in pending:
+                    condition.reset()
+            self.watches += 1
+            error = None
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *self._command(path, resource_version),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    limit=MAX_EVENT_BYTES,
+                )
+            except OSError as e:
+                raise KubectlUnavailable(f"cannot run {self.kubectl}: {e}")
+            with span("watch", "subprocess", lane=True, path=path):
+                try:
+                    async for line in process.stdout:
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue
+                        event_type = event.get("type")
+                        obj = event.get("object") or {}
+                        if event_type == "ERROR":
+                            # 410 Gone: resourceVersion too old, relist from scratch
+                            if obj.get("code") == 410:
+                                resource_version = None
+                            error = obj.get("message") or "watch error"
+                            break
+                        failures = 0
+                        resource_version = (obj.get("metadata") or {}).get(
+                            "resourceVersion", resource_version
+                        )
+                        if event_type == "BOOKMARK":
+                            continue
+                        for condition in list(pending):
+                            if condition.observe(event_type, obj):
+                                pending.remove(condition)
+                                self._ready(condition)
+                        if not pending:
+                            break
+                finally:
+                    if process.returncode is None:
+                        process.kill()
+                    stderr = (await process.stderr.read()).decode(errors="replace")
+                    await process.wait()
+
+            if not pending:
+                return
+            if error is None and process.returncode:
+                error = stderr.strip() or f"kubectl exited {process.returncode}"
+            if error is None:
+                # The server ended the watch (timeoutSeconds); resume from
+                # the last resourceVersion seen
+                continue
+            for condition in pending:
+                condition.error = error.splitlines()[-1]
+            await asyncio.sleep(min(RETRY_BASE_DELAY * 2**failures, RETRY_MAX_DELAY))
+            failures += 1
+
+    async def _poll(self, condition: HttpCondition) -> None:
+        while True:
+            with span("http probe", lane=True, url=condition.url):
+                if await asyncio.to_thread(condition.probe):
+                    break
+            await asyncio.sleep(self.http_interval)
+        self._ready(condition)
+
+    async def wait(self, timeout: float) -> List[Condition]:
+        """Wait up to timeout seconds; returns the conditions still not met"""
+        self._start = time.monotonic()
+        by_path: Dict[str, List[WatchedCondition]] = {}
+        tasks = []
+        for condition in self.conditions:
+            if isinstance(condition, HttpCondition):
+                tasks.append(asyncio.create_task(self._poll(condition)))
+            else:
+                by_path.setdefault(condition.path, []).append(condition)
+        for path, pending in by_path.items():
+            tasks.append(asyncio.create_task(self._watch(path, pending)))
+
+        done, running = await asyncio.wait(
+            tasks, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION
+        )
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        for task in done:
+            task.result()  # re-raise failures to start kubectl
+        return [
+            condition for condition in self.conditions if condition.ready_after is None
+        ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Wait for nodes, Deployments, Flux objects and HTTP endpoints",
+        epilog=__doc__.split("\n\n", 1)[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("conditions", nargs="*", help="Conditions to wait for")
+    parser.add_argument(
+        "--file", type=Path, help="Read further conditions from a file, one per line"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=600,
+        help="Seconds to wait for all conditions (default: 600)",
+    )
+    parser.add_argument("--kubeconfig", help="Kubeconfig (default: kubectl's)")
+    parser.add_argument(
+        "--kubectl",
+        default="kubectl",
+        help="kubectl binary (e.g. a local stub for testing)",
+    )
+    parser.add_argument(
+        "--http-interval",
+        type=float,
+        default=HTTP_INTERVAL,
+        help=f"Seconds between HTTP probes (default: {HTTP_INTERVAL})",
+    )
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    enable_from_args(args)
+
+    specs = list(args.conditions)
+    if args.file:
+        specs += read_conditions(args.file)
+    if not specs:
+        parser.error("no conditions given")
+    try:
+        conditions = [parse_condition(spec) for spec in specs]
+    except ValueError as e:
+        parser.error(str(e))
+
+    waiter = ReadinessWaiter(
+        conditions, args.kubeconfig, args.kubectl, args.http_interval
+    )
+    try:
+        pending = await waiter.wait(args.timeout)
+    except KubectlUnavailable as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if pending:
+        print(
+            f"❌ Timed out after {args.timeout:.0f}s waiting for "
+            f"{len(pending)} of {len(conditions)} conditions:",
+            file=sys.stderr,
+        )
+        for condition in pending:
+            line = f"  {condition.spec}: {condition.detail}"
+            if condition.error:
+                line += f" (last error: {condition.error})"
+            print(line, file=sys.stderr)
+        return 1
+
+    slowest = max(conditions, key=lambda c: c.ready_after)
+    print(
+        f"✅ All {len(conditions)} conditions ready in {slowest.ready_after:.1f}s "
+        f"(slowest: {slowest.spec}, {waiter.watches} watch requests)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
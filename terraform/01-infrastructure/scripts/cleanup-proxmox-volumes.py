@@ -3,104 +3,611 @@
 Cleanup Proxmox volumes for retained PVs during terraform destroy.
 
 Strategy:
-1. Query Kubernetes for Proxmox CSI PV volume handles
+1. Query Kubernetes for Proxmox CSI PV volume handles (paginated, with retries)
 2. Extract Proxmox volume IDs from handles
-3. Delete volumes via SSH to Proxmox host
+3. List the Proxmox storage inventory in one `pvesm list` call and diff it
+   against those volume IDs
+4. Delete volumes via one SSH session to the Proxmox host (parallel pvesm free)
+
+By default (terraform destroy) the volumes of retained PVs that still exist
+are deleted. --reconcile instead deletes orphans: Proxmox CSI volumes that no
+PV refers to any more. Either mode is idempotent, and --dry-run/--report show
+the difference without deleting anything.
 
 IMPORTANT: This script MUST run while cluster API is accessible.
 It will fail if it cannot query Kubernetes to avoid deleting wrong volumes.
 """
 
-import sys
-import subprocess
+import argparse
 import json
-from typing import List
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+PROXMOX_CSI_DRIVER = "csi.proxmox.sinextra.dev"
+RETAIN_STORAGE_CLASS = "proxmox-csi-retain"
+# Disks Proxmox CSI creates ("local:9999/vm-9999-pvc-<uid>.raw" or
+# "local-lvm:vm-9999-pvc-<uid>"); nothing else in the inventory is ever deleted
+CSI_VOLUME_NAME = re.compile(r"^[^:]+:(\d+/)?vm-\d+-pvc-[0-9a-f-]+(\.[a-z0-9]+)?$")
+DEFAULT_STORAGES = ["local"]
+# Orphans younger than this are left alone: the CSI driver creates the disk
+# before the PV object that refers to it exists
+DEFAULT_MIN_ORPHAN_AGE = 600
+
+PV_LIST_PATH = "/api/v1/persistentvolumes"
+# PVs per list request; bounds memory regardless of how many PVs exist
+PAGE_LIMIT = 250
+# Per-request timeout handed to kubectl
+REQUEST_TIMEOUT = "10s"
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 1.0
+
+# kubectl errors that retrying won't fix
+PERMANENT_ERRORS = (
+    "Unauthorized",
+    "Forbidden",
+    "NotFound",
+    "BadRequest",
+    "must be logged in",
+    "no configuration has been provided",
+    "no such file or directory",
+)
+# The continue token outlived the resourceVersion it pins; relist from the start
+EXPIRED_CONTINUE_ERRORS = ("(Expired)", "continue parameter is too old")
+
+
+class InventoryUnavailable(Exception):
+    """The PV list could not be read, as opposed to an empty PV list"""
+
+
+class ContinueExpired(Exception):
+    """A continue token expired mid-listing"""
+
+
+class PVInventory:
+    """Lists PVs page by page (limit/continue) through `kubectl get --raw`
+
+    Label and field selectors are applied by the API server. Transient
+    failures are retried with exponential backoff; when retries are exhausted,
+    or on errors retrying can't fix, InventoryUnavailable is raised.
+    Pointing --kubectl at a stub (or a kubeconfig at a local fake API server
+    serving fixture pages) exercises the whole layer offline.
+    """
+
+    def __init__(
+        self,
+        kubeconfig: str,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        page_limit: int = PAGE_LIMIT,
+        kubectl: str = "kubectl",
+        attempts: int = RETRY_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.kubeconfig = kubeconfig
+        self.label_selector = label_selector
+        self.field_selector = field_selector
+        self.page_limit = page_limit
+        self.kubectl = kubectl
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.sleep = sleep
+        self.pages = 0
+
+    def _url(self, continue_token: Optional[str]) -> str:
+        params = {"limit": str(self.page_limit)}
+        if self.label_selector:
+            params["labelSelector"] = self.label_selector
+        if self.field_selector:
+            params["fieldSelector"] = self.field_selector
+        if continue_token:
+            params["continue"] = continue_token
+        return f"{PV_LIST_PATH}?{urllib.parse.urlencode(params)}"
+
+    def _get(self, url: str) -> Dict:
+        """One list request, retried with exponential backoff"""
+        command = [
+            self.kubectl,
+            f"--kubeconfig={self.kubeconfig}",
+            f"--request-timeout={REQUEST_TIMEOUT}",
+            "get",
+            "--raw",
+            url,
+        ]
+        error = "no attempts made"
+        for attempt in range(self.attempts):
+            if attempt:
+                self.sleep(self.base_delay * 2 ** (attempt - 1))
+            try:
+                result = subprocess.run(
+                    command, capture_output=True, text=True, timeout=30
+                )
+            except subprocess.TimeoutExpired:
+                error = "kubectl timed out"
+                continue
+            except OSError as e:
+                raise InventoryUnavailable(f"cannot run {self.kubectl}: {e}")
+
+            if result.returncode == 0:
+                try:
+                    return json.loads(result.stdout)
+                except json.JSONDecodeError as e:
+                    error = f"malformed PV list response: {e}"
+                    continue
+
+            error = result.stderr.strip() or f"kubectl exited {result.returncode}"
+            if any(marker in error for marker in EXPIRED_CONTINUE_ERRORS):
+                raise ContinueExpired(error)
+            if any(marker in error for marker in PERMANENT_ERRORS):
+                break
+        raise InventoryUnavailable(error)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield PV objects one page at a time"""
+        continue_token = None
+        restarted = False
+        seen = set()
+        while True:
+            try:
+                page = self._get(self._url(continue_token))
+            except ContinueExpired:
+                if restarted:
+                    raise InventoryUnavailable("PV list kept changing while paging")
+                # Relist from the start; PVs already yielded are skipped
+                restarted, continue_token = True, None
+                continue
+            if page.get("kind") not in (None, "PersistentVolumeList"):
+                raise InventoryUnavailable(f"unexpected response kind {page['kind']}")
+            self.pages += 1
 
+            for item in page.get("items") or []:
+                metadata = item.get("metadata") or {}
+                uid = metadata.get("uid") or metadata.get("name")
+                if uid is None or uid not in seen:
+                    seen.add(uid)
+                    yield item
 
-def get_volumes_from_kubernetes(kubeconfig_path: str) -> List[str]:
-    """Get Proxmox volume IDs from Kubernetes PVs."""
+            continue_token = (page.get("metadata") or {}).get("continue")
+            if not continue_token:
+                return
+
+
+def proxmox_volume_id(pv: Dict) -> Optional[str]:
+    """Proxmox volume ID of a Proxmox CSI PV, or None for other PVs"""
+    csi = (pv.get("spec") or {}).get("csi") or {}
+    # csi.driver isn't a PV field selector; filter here
+    if csi.get("driver") != PROXMOX_CSI_DRIVER:
+        return None
+
+    # Extract volume handle: cluster/atlas/local/9999/vm-9999-pvc-XXX.raw
+    # Convert to: local:9999/vm-9999-pvc-XXX.raw
+    parts = (csi.get("volumeHandle") or "").split("/")
+    if len(parts) < 4:
+        return None
+    # Remove "cluster/<node>/" prefix and rejoin with ":" after the storage
+    return f"{parts[2]}:{'/'.join(parts[3:])}"
+
+
+class PVVolumes(NamedTuple):
+    # Volumes of retained PVs (storageClassName proxmox-csi-retain), in list order
+    retained: List[str]
+    # Volumes of every Proxmox CSI PV, whatever its storage class
+    referenced: Set[str]
+
+
+def collect_volumes(pvs: Iterable[Dict]) -> PVVolumes:
+    volumes = PVVolumes(retained=[], referenced=set())
+    for pv in pvs:
+        volume = proxmox_volume_id(pv)
+        if not volume:
+            continue
+        volumes.referenced.add(volume)
+        # storageClassName isn't a PV field selector either
+        if (pv.get("spec") or {}).get("storageClassName") == RETAIN_STORAGE_CLASS:
+            volumes.retained.append(volume)
+    return volumes
+
+
+def get_volumes_from_kubernetes(
+    kubeconfig_path: str,
+    label_selector: Optional[str] = None,
+    field_selector: Optional[str] = None,
+    kubectl: str = "kubectl",
+) -> PVVolumes:
+    """Get Proxmox volume IDs from Kubernetes PVs.
+
+    Empty results mean there are no Proxmox CSI PVs; an unreachable API
+    raises InventoryUnavailable instead.
+    """
+    inventory = PVInventory(
+        kubeconfig_path, label_selector, field_selector, kubectl=kubectl
+    )
+    return collect_volumes(inventory)
+
+
+# Runs on the Proxmox host: prints one line per storage given as an argument,
+# "OK<tab>storage<tab>JSON volume list" or "FAIL<tab>storage<tab>error"
+REMOTE_LIST_SCRIPT = r"""
+for storage in "$@"; do
+  if output=$(pvesm list "$storage" --content images --output-format json 2>&1); then
+    printf 'OK\t%s\t%s\n' "$storage" "$(printf '%s' "$output" | tr -d '\n')"
+  else
+    printf 'FAIL\t%s\t%s\n' "$storage" "$(printf '%s' "$output" | tr '\t\n' '  ')"
+  fi
+done
+"""
+
+LIST_TIMEOUT = 60
+
+
+class StorageUnavailable(Exception):
+    """The Proxmox storage inventory could not be listed"""
+
+
+def list_storage_volumes(
+    proxmox_host: str, storages: Iterable[str], ssh: str = "ssh"
+) -> Dict[str, Dict]:
+    """Volume ID -> pvesm list entry for the given storages, in one SSH round trip"""
+    storages = sorted(set(storages))
+    remote_command = " ".join(
+        ["bash", "-c", shlex.quote(REMOTE_LIST_SCRIPT), "inventory"]
+        + [shlex.quote(storage) for storage in storages]
+    )
     try:
         result = subprocess.run(
-            ["kubectl", f"--kubeconfig={kubeconfig_path}", "get", "pv", "-o", "json"],
+            ssh_command(ssh, proxmox_host) + [remote_command],
             capture_output=True,
             text=True,
-            timeout=10,
+            timeout=LIST_TIMEOUT,
         )
-        if result.returncode != 0:
-            return []
-
-        pvs = json.loads(result.stdout)
-        volumes = []
-
-        for item in pvs.get("items", []):
-            spec = item.get("spec", {})
-
-            # Filter for Proxmox CSI with retain policy
-            if (
-                spec.get("storageClassName") == "proxmox-csi-retain"
-                and spec.get("csi", {}).get("driver") == "csi.proxmox.sinextra.dev"
-            ):
-                # Extract volume handle: cluster/atlas/local/9999/vm-9999-pvc-XXX.raw
-                # Convert to: local:9999/vm-9999-pvc-XXX.raw
-                volume_handle = spec.get("csi", {}).get("volumeHandle", "")
-                if volume_handle:
-                    # Remove "cluster/<node>/" prefix
-                    parts = volume_handle.split("/")
-                    if len(parts) >= 3:
-                        # Rejoin storage/vmid/volume with : separator after storage
-                        volume_id = f"{parts[2]}:{'/'.join(parts[3:])}"
-                        volumes.append(volume_id)
-
-        return volumes
-
-    except (subprocess.TimeoutExpired, json.JSONDecodeError, Exception):
-        return []
-
-
-def delete_volume(proxmox_host: str, volume_id: str) -> bool:
-    """Delete a volume from Proxmox storage."""
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise StorageUnavailable(str(e))
+    if result.returncode != 0:
+        raise StorageUnavailable(result.stderr.strip() or "ssh connection failed")
+
+    volumes: Dict[str, Dict] = {}
+    listed = set()
+    for line in result.stdout.splitlines():
+        status, _, rest = line.partition("\t")
+        storage, _, payload = rest.partition("\t")
+        if status == "FAIL":
+            raise StorageUnavailable(f"pvesm list {storage}: {payload.strip()}")
+        if status != "OK":
+            continue
+        try:
+            entries = json.loads(payload) if payload.strip() else []
+        except json.JSONDecodeError as e:
+            raise StorageUnavailable(f"pvesm list {storage}: bad JSON: {e}")
+        volumes.update((entry["volid"], entry) for entry in entries if "volid" in entry)
+        listed.add(storage)
+
+    if listed != set(storages):
+        missing = ", ".join(sorted(set(storages) - listed))
+        raise StorageUnavailable(f"no inventory reported for {missing}")
+    return volumes
+
+
+def storage_of(volume: str) -> str:
+    return volume.partition(":")[0]
+
+
+class Reconciliation(NamedTuple):
+    # Volumes to free, in a stable order
+    delete: List[str]
+    # Targets that are already gone from storage (nothing to do)
+    missing: List[str]
+    # Proxmox CSI volumes on storage that no PV refers to
+    orphans: List[str]
+    # Proxmox CSI volumes on storage that a PV still refers to
+    in_use: int
+
+    def to_dict(self) -> Dict:
+        return {
+            "delete": self.delete,
+            "missing": self.missing,
+            "orphans": self.orphans,
+            "in_use": self.in_use,
+        }
+
+
+def reconcile(
+    inventory: Dict[str, Dict],
+    pv_volumes: PVVolumes,
+    orphans_only: bool,
+    min_orphan_age: float = DEFAULT_MIN_ORPHAN_AGE,
+    now: Optional[float] = None,
+) -> Reconciliation:
+    """Diff the storage inventory against PV volume handles with set operations"""
+    now = time.time() if now is None else now
+    csi_volumes = {v for v in inventory if CSI_VOLUME_NAME.match(v)}
+    orphans = csi_volumes - pv_volumes.referenced
+    if orphans_only:
+        # Without a creation time an orphan counts as old enough
+        targets = {
+            v
+            for v in orphans
+            if now - float(inventory[v].get("ctime") or 0) >= min_orphan_age
+        }
+    else:
+        targets = set(pv_volumes.retained)
+    return Reconciliation(
+        delete=sorted(targets & inventory.keys()),
+        missing=sorted(targets - inventory.keys()),
+        orphans=sorted(orphans),
+        in_use=len(csi_volumes & pv_volumes.referenced),
+    )
+
+
+# Runs on the Proxmox host: frees every volume given as an argument with bounded
+# parallelism and prints one tab-separated result line per volume
+REMOTE_FREE_SCRIPT = r"""
+jobs="$1"; shift
+free_volume() {
+  if output=$(pvesm free "$1" 2>&1); then
+    printf 'OK\t%s\n' "$1"
+  else
+    printf 'FAIL\t%s\t%s\n' "$1" "$(printf '%s' "$output" | tr '\t\n' '  ')"
+  fi
+}
+export -f free_volume
+printf '%s\0' "$@" | xargs -0 -r -n 1 -P "$jobs" bash -c 'free_volume "$1"' _
+"""
+
+# Seconds allowed per `pvesm free`; the batch timeout scales with the number of rounds
+PER_VOLUME_TIMEOUT = 30
+
+
+def ssh_command(ssh: str, proxmox_host: str) -> List[str]:
+    """ssh invocation that shares one multiplexed connection across calls"""
+    control_path = os.path.join(tempfile.gettempdir(), "cleanup-proxmox-%C")
+    return [
+        ssh,
+        "-o",
+        "BatchMode=yes",
+        "-o",
+        "ControlMaster=auto",
+        "-o",
+        f"ControlPath={control_path}",
+        "-o",
+        "ControlPersist=30",
+        proxmox_host,
+    ]
+
+
+def delete_volumes(
+    proxmox_host: str, volumes: List[str], jobs: int = 8, ssh: str = "ssh"
+) -> Dict[str, Tuple[bool, str]]:
+    """Delete volumes from Proxmox storage in one SSH session.
+
+    Returns volume -> (deleted, message). Volumes the remote side never
+    reported on are marked failed.
+    """
+    if not volumes:
+        return {}
+
+    jobs = max(1, jobs)
+    rounds = -(-len(volumes) // jobs)
+    remote_command = " ".join(
+        ["bash", "-c", shlex.quote(REMOTE_FREE_SCRIPT), "cleanup", str(jobs)]
+        + [shlex.quote(v) for v in volumes]
+    )
+
+    results = {vol: (False, "no result reported") for vol in volumes}
     try:
         result = subprocess.run(
-            ["ssh", proxmox_host, f"pvesm free {volume_id}"],
+            ssh_command(ssh, proxmox_host) + [remote_command],
             capture_output=True,
-            timeout=30,
+            text=True,
+            timeout=PER_VOLUME_TIMEOUT * rounds + 30,
         )
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, Exception):
-        return False
+    except subprocess.TimeoutExpired:
+        return {vol: (False, "timed out") for vol in volumes}
+    except Exception as e:
+        return {vol: (False, str(e)) for vol in volumes}
+
+    for line in result.stdout.splitlines():
+        status, _, rest = line.partition("\t")
+        volume, _, message = rest.partition("\t")
+        if volume in results and status in ("OK", "FAIL"):
+            results[volume] = (status == "OK", message.strip())
+
+    if result.returncode == 255:
+        # ssh itself failed (connection/auth); nothing was reported
+        error = result.stderr.strip() or "ssh connection failed"
+        for vol, (deleted, message) in results.items():
+            if not deleted and message == "no result reported":
+                results[vol] = (False, error)
+
+    return results
+
+
+def print_reconciliation(plan: Reconciliation, orphans_only: bool) -> None:
+    print(
+        f"📦 Storage holds {plan.in_use + len(plan.orphans)} Proxmox CSI volumes: "
+        f"{plan.in_use} referenced by PVs, {len(plan.orphans)} orphaned"
+    )
+    if not orphans_only and plan.orphans:
+        print("   (orphans are left alone; run with --reconcile to delete them)")
+    for vol in plan.missing:
+        print(f"  · {vol} already deleted")
+    print(f"📋 {len(plan.delete)} volumes to delete:")
+    for vol in plan.delete:
+        print(f"  - {vol}")
 
 
 def main():
-    kubeconfig_path = sys.argv[1] if len(sys.argv) > 1 else "./kubeconfig"
-    proxmox_host = sys.argv[2] if len(sys.argv) > 2 else "root@atlas"
+    parser = argparse.ArgumentParser(
+        description="Delete Proxmox volumes backing retained Proxmox CSI PVs"
+    )
+    parser.add_argument("kubeconfig", nargs="?", default="./kubeconfig")
+    parser.add_argument("proxmox_host", nargs="?", default="root@atlas")
+    parser.add_argument(
+        "--jobs", type=int, default=8, help="Concurrent pvesm free calls"
+    )
+    parser.add_argument(
+        "--ssh", default="ssh", help="ssh binary (e.g. a local stub for testing)"
+    )
+    parser.add_argument(
+        "--kubectl",
+        default="kubectl",
+        help="kubectl binary (e.g. a local stub for testing)",
+    )
+    parser.add_argument(
+        "--label-selector", help="Only list PVs matching this label selector"
+    )
+    parser.add_argument(
+        "--field-selector", help="Only list PVs matching this field selector"
+    )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="Delete orphaned Proxmox CSI volumes (no PV refers to them) "
+        "instead of the volumes of retained PVs",
+    )
+    parser.add_argument(
+        "--min-age",
+        type=float,
+        default=DEFAULT_MIN_ORPHAN_AGE,
+        help="Seconds an orphan must have existed before --reconcile deletes it",
+    )
+    parser.add_argument(
+        "--storage",
+        action="append",
+        help="Proxmox storage to inventory in addition to those PVs use "
+        f"(repeatable; default: {', '.join(DEFAULT_STORAGES)})",
+    )
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument(
+        "--dry-run", action="store_true", help="Show what would be deleted"
+    )
+    output.add_argument(
+        "--report",
+        action="store_true",
+        help="Print the inventory difference as JSON without deleting anything",
+    )
+    args = parser.parse_args()
+    kubeconfig_path = args.kubeconfig
+    proxmox_host = args.proxmox_host
+    storages = args.storage or DEFAULT_STORAGES
 
-    print("🧹 Cleaning up Proxmox volumes from retained PVs...")
+    if args.reconcile and (args.label_selector or args.field_selector):
+        # A partial PV list would make every unlisted PV's volume look orphaned
+        parser.error("--reconcile needs the full PV list; drop the selectors")
 
-    # Query Kubernetes - MUST be accessible at this stage
-    volumes = get_volumes_from_kubernetes(kubeconfig_path)
+    # With --report, stdout carries nothing but the JSON document
+    log = sys.stderr if args.report else sys.stdout
+    if args.reconcile:
+        print("🧹 Reconciling Proxmox storage against Kubernetes PVs...", file=log)
+    else:
+        print("🧹 Cleaning up Proxmox volumes from retained PVs...", file=log)
 
-    if not volumes:
-        print("❌ ERROR: Cluster API unavailable - cannot safely identify volumes")
-        print(f"Manual cleanup: ssh {proxmox_host} 'pvesm list local | grep pvc-'")
+    # Query Kubernetes - MUST be accessible at this stage
+    try:
+        pv_volumes = get_volumes_from_kubernetes(
+            kubeconfig_path, args.label_selector, args.field_selector, args.kubectl
+        )
+    except InventoryUnavailable as e:
+        print(
+            "❌ ERROR: Cluster API unavailable - cannot safely identify volumes",
+            file=log,
+        )
+        print(f"   {e}", file=log)
+        try:
+            inventory = list_storage_volumes(proxmox_host, storages, args.ssh)
+        except StorageUnavailable:
+            print(
+                f"Manual cleanup: ssh {proxmox_host} 'pvesm list local | grep pvc-'",
+                file=log,
+            )
+        else:
+            # Show what a manual cleanup would be looking at
+            csi_volumes = sorted(v for v in inventory if CSI_VOLUME_NAME.match(v))
+            print(
+                f"Proxmox CSI volumes on {proxmox_host} ({len(csi_volumes)}):", file=log
+            )
+            for vol in csi_volumes:
+                print(f"  - {vol}", file=log)
         return 1
 
-    print(f"📋 Found {len(volumes)} volumes to delete:")
-    for vol in volumes:
-        print(f"  - {vol}")
+    if not pv_volumes.retained and not (args.reconcile or args.report):
+        print("✅ No retained Proxmox CSI volumes - nothing to delete", file=log)
+        return 0
+
+    # One `pvesm list` round trip covers every storage the PVs live on
+    storages = set(storages) | {storage_of(v) for v in pv_volumes.referenced}
+    try:
+        inventory = list_storage_volumes(proxmox_host, storages, args.ssh)
+    except StorageUnavailable as e:
+        if args.reconcile or args.report:
+            print(f"❌ ERROR: Cannot list Proxmox storage: {e}", file=log)
+            return 1
+        # Destroy can still proceed: freeing a missing volume just fails
+        print(
+            f"⚠️  Cannot list Proxmox storage ({e}); deleting every retained volume",
+            file=log,
+        )
+        inventory = {volume: {} for volume in pv_volumes.retained}
+
+    if args.reconcile:
+        # PVs bound while storage was being listed must not look orphaned
+        try:
+            relisted = get_volumes_from_kubernetes(
+                kubeconfig_path, kubectl=args.kubectl
+            )
+        except InventoryUnavailable as e:
+            print(f"❌ ERROR: Cluster API became unavailable: {e}", file=log)
+            return 1
+        pv_volumes.referenced.update(relisted.referenced)
+
+    plan = reconcile(inventory, pv_volumes, args.reconcile, args.min_age)
+    if args.report:
+        print(json.dumps(plan.to_dict(), indent=2))
+        return 0
+    print_reconciliation(plan, args.reconcile)
+    if args.dry_run or not plan.delete:
+        if not plan.delete:
+            print("✅ Storage already matches Kubernetes - nothing to delete")
+        return 0
+
+    volumes = plan.delete
+
+    # Delete all volumes in one SSH session, in parallel on the Proxmox host
+    print(f"🗑️  Deleting {len(volumes)} volumes ({args.jobs} in parallel)...")
+    results = delete_volumes(proxmox_host, volumes, args.jobs, args.ssh)
 
-    # Delete each volume
     cleaned = 0
     failed = 0
 
     for vol in volumes:
-        print(f"🗑️  Deleting: {vol}")
-        if delete_volume(proxmox_host, vol):
+        deleted, message = results[vol]
+        if deleted:
+            print(f"  ✓ {vol}")
             cleaned += 1
         else:
-            print(f"⚠️  Failed to delete {vol} (may not exist)")
+            print(f"⚠️  Failed to delete {vol}: {message}")
             failed += 1
 
-    print(f"✅ Cleanup complete: {cleaned} deleted, {failed} failed/not found")
+    print(
+        f"✅ Cleanup complete: {cleaned} deleted, {failed} failed, "
+        f"{len(plan.missing)} already gone"
+    )
     return 0
 
 